@@ -0,0 +1,99 @@
+from datetime import datetime, date
+from dateutil.relativedelta import relativedelta
+from sqlalchemy import Date, Float, Integer, case, cast, type_coerce
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.functions import FunctionElement
+
+
+def accounting_value(invoice_value, purchase_date, depreciation_months, today: date = None) -> float:
+    # Valor contábil com depreciação linear por dia ao longo de `depreciation_months`.
+    # Usado pelo ItemResponse e pela serialização rápida das listagens (backend/serializers.py).
+    if invoice_value is None or purchase_date is None:
+        return 0.0
+
+    # Se não houver depreciação configurada ou for 0, mantém o valor original
+    if not depreciation_months or depreciation_months <= 0:
+        return invoice_value
+
+    # Normaliza datas para evitar problemas com timezones e frações de dia (usa apenas a data)
+    start_date = purchase_date.date() if isinstance(purchase_date, datetime) else purchase_date
+    today = today or date.today()
+
+    # Calcula data final baseado nos meses
+    end_date = start_date + relativedelta(months=depreciation_months)
+
+    # Calcula dias totais de vida útil e dias passados
+    total_days = (end_date - start_date).days
+    elapsed_days = (today - start_date).days
+
+    if total_days <= 0:
+        return 0.0
+
+    if elapsed_days >= total_days:
+        return 0.0
+
+    if elapsed_days < 0:
+        return invoice_value
+
+    # Cálculo linear por dia
+    remaining_ratio = 1 - (elapsed_days / total_days)
+
+    # Garante que não retorne negativo (embora a checagem acima já deva prevenir)
+    final_value = max(0.0, invoice_value * remaining_ratio)
+
+    return round(final_value, 2)
+
+
+# Mesma conta em SQL, para ordenar /items/ pelo valor contábil no banco (sort=accounting_value).
+# Depende da data de hoje, então não há índice que a sirva: o banco calcula por linha.
+class days_between(FunctionElement):
+    type = Integer()
+    inherit_cache = True
+
+
+class add_months(FunctionElement):
+    type = Date()
+    inherit_cache = True
+
+
+@compiles(days_between)
+def _days_between(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return f"(CAST({compiler.process(end, **kw)} AS DATE) - CAST({compiler.process(start, **kw)} AS DATE))"
+
+
+@compiles(days_between, "sqlite")
+def _days_between_sqlite(element, compiler, **kw):
+    start, end = list(element.clauses)
+    return (
+        f"CAST(julianday(date({compiler.process(end, **kw)})) - "
+        f"julianday(date({compiler.process(start, **kw)})) AS INTEGER)"
+    )
+
+
+@compiles(add_months)
+def _add_months(element, compiler, **kw):
+    start, months = list(element.clauses)
+    return (
+        f"CAST(CAST({compiler.process(start, **kw)} AS DATE) + "
+        f"make_interval(months => {compiler.process(months, **kw)}) AS DATE)"
+    )
+
+
+@compiles(add_months, "sqlite")
+def _add_months_sqlite(element, compiler, **kw):
+    start, months = list(element.clauses)
+    return f"date({compiler.process(start, **kw)}, '+' || {compiler.process(months, **kw)} || ' months')"
+
+
+def accounting_value_sql(invoice_value, purchase_date, depreciation_months, today):
+    # Espelha accounting_value() (sem o arredondamento, irrelevante para ordenar)
+    total_days = days_between(purchase_date, add_months(purchase_date, depreciation_months))
+    elapsed_days = days_between(purchase_date, today)
+    return type_coerce(case(
+        (invoice_value.is_(None) | purchase_date.is_(None), 0.0),
+        (total_days.is_(None) | (total_days <= 0), invoice_value),
+        (elapsed_days >= total_days, 0.0),
+        (elapsed_days < 0, invoice_value),
+        else_=invoice_value * (1 - cast(elapsed_days, Float) / total_days),
+    ), Float)
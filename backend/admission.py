@@ -0,0 +1,212 @@
+import asyncio
+import math
+import os
+import time
+from collections import deque
+from urllib.parse import parse_qs
+from starlette.datastructures import Headers
+from starlette.responses import JSONResponse
+
+# Controle de admissão: cada requisição tem um custo conforme a classe da rota e só entra
+# se couber no orçamento global (ADMISSION_CAPACITY) e no do usuário
+# (ADMISSION_USER_CAPACITY). As que não cabem esperam numa fila justa (uma fila FIFO por
+# usuário, atendidas em rodízio) por até ADMISSION_QUEUE_TIMEOUT segundos; depois disso,
+# ou com a fila cheia, a resposta é 429 com Retry-After.
+# Escritas, aprovações, login e rotas leves custam 0 e nunca esperam: exportações e
+# listagens enormes não tiram a vez delas. O controle é por worker.
+ADMISSION_CAPACITY = int(os.getenv("ADMISSION_CAPACITY", "20"))
+ADMISSION_USER_CAPACITY = int(os.getenv("ADMISSION_USER_CAPACITY", "12"))
+ADMISSION_QUEUE_TIMEOUT = float(os.getenv("ADMISSION_QUEUE_TIMEOUT", "2"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "200"))
+ADMISSION_USER_QUEUE = int(os.getenv("ADMISSION_USER_QUEUE", "10"))
+# `limit=` acima disso em /items/ e /logs/ conta como consulta pesada
+ADMISSION_HEAVY_LIMIT = int(os.getenv("ADMISSION_HEAVY_LIMIT", "1000"))
+
+# Custo de cada classe, em "conexões": um pesado segura conexão e memória por muito mais tempo
+COSTS = {"interactive": 0, "read": 1, "heavy": 5}
+READ_PREFIXES = ("/items", "/logs", "/dashboard", "/reports")
+LIMITED_LISTS = ("/items/", "/logs/", "/logs/summary")
+
+
+def classify(method: str, path: str, query_string: bytes = b""):
+    if method != "GET":
+        return "interactive"
+    if path.startswith("/reports/export/"):
+        return "heavy"
+    if path in LIMITED_LISTS:
+        limit = parse_qs(query_string.decode("latin-1")).get("limit")
+        try:
+            if limit and int(limit[-1]) > ADMISSION_HEAVY_LIMIT:
+                return "heavy"
+        except ValueError:
+            pass  # a própria rota responde 422
+    if path.startswith(READ_PREFIXES):
+        return "read"
+    return "interactive"
+
+
+def client_key(scope):
+    # Mesmo critério de database._client_key (token do header); sem token, o IP
+    authorization = Headers(scope=scope).get("authorization")
+    if authorization:
+        return authorization
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+class AdmissionController:
+    def __init__(self, capacity=None, user_capacity=None, queue_timeout=None, max_queue=None, user_queue=None):
+        self.capacity = ADMISSION_CAPACITY if capacity is None else capacity
+        self.user_capacity = ADMISSION_USER_CAPACITY if user_capacity is None else user_capacity
+        self.queue_timeout = ADMISSION_QUEUE_TIMEOUT if queue_timeout is None else queue_timeout
+        self.max_queue = ADMISSION_MAX_QUEUE if max_queue is None else max_queue
+        self.user_queue = ADMISSION_USER_QUEUE if user_queue is None else user_queue
+        self.in_use = 0
+        self.user_in_use: dict[str, int] = {}
+        # Usuário -> fila de (future, custo); a ordem do dict é o rodízio
+        self.waiting: dict[str, deque] = {}
+        self.queued = 0
+        # Tempo médio (EWMA) de cada classe, para o Retry-After
+        self.hold_time: dict[str, float] = {}
+        # (classe, "admitted" | "queued" | "rejected") -> contagem, exportado em /metrics
+        self.stats: dict[tuple[str, str], int] = {}
+
+    def _cost(self, request_class):
+        # Nunca acima dos orçamentos, senão a classe não entraria nunca
+        return min(COSTS[request_class], self.capacity, self.user_capacity)
+
+    def _count(self, request_class, outcome):
+        self.stats[(request_class, outcome)] = self.stats.get((request_class, outcome), 0) + 1
+
+    def _fits(self, user, cost):
+        return (
+            self.in_use + cost <= self.capacity
+            and self.user_in_use.get(user, 0) + cost <= self.user_capacity
+        )
+
+    def _take(self, user, cost):
+        self.in_use += cost
+        self.user_in_use[user] = self.user_in_use.get(user, 0) + cost
+
+    def _dispatch(self):
+        # Rodízio entre usuários: a cada volta, no máximo um admitido por usuário (o
+        # primeiro da fila dele), até ninguém mais caber
+        admitted = True
+        while admitted and self.waiting:
+            admitted = False
+            for user in list(self.waiting):
+                queue = self.waiting[user]
+                # Futures já encerrados (timeout ou desconexão no mesmo tick, antes de acquire
+                # retomar e chamar _withdraw) saem da fila sem consumir orçamento
+                while queue and queue[0][0].done():
+                    queue.popleft()
+                    self.queued -= 1
+                if not queue:
+                    del self.waiting[user]
+                    continue
+                future, cost = queue[0]
+                if not self._fits(user, cost):
+                    continue
+                queue.popleft()
+                self.queued -= 1
+                # Vai para o fim do rodízio
+                del self.waiting[user]
+                if queue:
+                    self.waiting[user] = queue
+                self._take(user, cost)
+                future.set_result(True)
+                admitted = True
+
+    def _withdraw(self, user, waiter):
+        queue = self.waiting.get(user)
+        if queue is not None and waiter in queue:
+            queue.remove(waiter)
+            self.queued -= 1
+            if not queue:
+                del self.waiting[user]
+
+    async def acquire(self, user, request_class: str) -> bool:
+        cost = self._cost(request_class)
+        if self.capacity <= 0 or cost == 0:
+            return True
+        # Só passa direto se ninguém do mesmo usuário está esperando (FIFO por usuário)
+        # e se cabe; senão entra na fila
+        if user not in self.waiting and self._fits(user, cost):
+            self._take(user, cost)
+            self._count(request_class, "admitted")
+            return True
+        if self.queued >= self.max_queue or len(self.waiting.get(user, ())) >= self.user_queue:
+            self._count(request_class, "rejected")
+            return False
+
+        self._count(request_class, "queued")
+        waiter = (asyncio.get_running_loop().create_future(), cost)
+        self.waiting.setdefault(user, deque()).append(waiter)
+        self.queued += 1
+        try:
+            await asyncio.wait_for(waiter[0], self.queue_timeout)
+        except asyncio.TimeoutError:
+            pass
+        except BaseException:
+            # Cliente desconectou enquanto esperava
+            if waiter[0].done() and not waiter[0].cancelled():
+                self.release(user, request_class)
+            else:
+                self._withdraw(user, waiter)
+            raise
+        if waiter[0].done() and not waiter[0].cancelled():
+            self._count(request_class, "admitted")
+            return True
+        self._withdraw(user, waiter)
+        self._count(request_class, "rejected")
+        return False
+
+    def release(self, user, request_class: str, elapsed: float = None):
+        cost = self._cost(request_class)
+        if self.capacity <= 0 or cost == 0:
+            return
+        self.in_use -= cost
+        remaining = self.user_in_use.get(user, 0) - cost
+        if remaining > 0:
+            self.user_in_use[user] = remaining
+        else:
+            self.user_in_use.pop(user, None)
+        if elapsed is not None:
+            previous = self.hold_time.get(request_class)
+            self.hold_time[request_class] = elapsed if previous is None else 0.8 * previous + 0.2 * elapsed
+        self._dispatch()
+
+    def retry_after(self, request_class: str) -> int:
+        # Em média uma requisição da mesma classe termina nesse tempo e libera espaço
+        return max(1, math.ceil(self.hold_time.get(request_class, 1.0)))
+
+
+controller = AdmissionController()
+
+
+class AdmissionMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_class = classify(scope["method"], scope["path"], scope.get("query_string", b""))
+        user = client_key(scope)
+        # Referência local: o release vai para o mesmo controlador do acquire
+        admission = controller
+        if not await admission.acquire(user, request_class):
+            response = JSONResponse(
+                {"detail": "Servidor ocupado, tente novamente em instantes"},
+                status_code=429,
+                headers={"Retry-After": str(admission.retry_after(request_class))},
+            )
+            return await response(scope, receive, send)
+
+        started = time.monotonic()
+        try:
+            # Inclui o envio do corpo: exportações em streaming seguram o orçamento até o fim
+            await self.app(scope, receive, send)
+        finally:
+            admission.release(user, request_class, time.monotonic() - started)
@@ -0,0 +1,77 @@
+"""consolidate items.category text into category_id
+
+Revision ID: a0c2e4f6b8d1
+Revises: f8b0d2e4a6c9
+Create Date: 2026-10-19 19:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a0c2e4f6b8d1'
+down_revision: Union[str, None] = 'f8b0d2e4a6c9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Backfill em faixas de id, como na b4d6f8a0c2e3
+BATCH_SIZE = 50_000
+
+# Nomes usados em itens sem categoria cadastrada viram categorias, para não perder o dado
+CREATE_MISSING_CATEGORIES = """
+    INSERT INTO categories (name)
+    SELECT DISTINCT items.category FROM items
+    WHERE items.category_id IS NULL AND items.category IS NOT NULL AND items.category <> ''
+      AND NOT EXISTS (SELECT 1 FROM categories WHERE categories.name = items.category)
+"""
+
+# Onde os dois existem, category_id já era a fonte usada (category_rel) e prevalece
+BACKFILL_CATEGORY_ID = """
+    UPDATE items SET category_id = (SELECT categories.id FROM categories WHERE categories.name = items.category)
+    WHERE category_id IS NULL AND category IS NOT NULL AND id >= :start AND id < :end
+"""
+
+BACKFILL_CATEGORY = """
+    UPDATE items SET category = (SELECT categories.name FROM categories WHERE categories.id = items.category_id)
+    WHERE category_id IS NOT NULL AND id >= :start AND id < :end
+"""
+
+
+def _batched(bind, statement):
+    low, high = bind.execute(sa.text("SELECT min(id), max(id) FROM items")).one()
+    if low is None:
+        return
+    for start in range(low, high + 1, BATCH_SIZE):
+        bind.execute(sa.text(statement), {"start": start, "end": start + BATCH_SIZE})
+
+
+def _run_batched(statement):
+    bind = op.get_bind()
+    if bind.dialect.name == 'postgresql':
+        # Cada lote confirmado separadamente
+        with op.get_context().autocommit_block():
+            _batched(bind, statement)
+    else:
+        _batched(bind, statement)
+
+
+def upgrade() -> None:
+    op.execute(CREATE_MISSING_CATEGORIES)
+    # Caches de referência dos workers recarregam as categorias
+    op.execute("UPDATE reference_versions SET version = version + 1, updated_at = CURRENT_TIMESTAMP "
+               "WHERE name = 'categories'")
+    _run_batched(BACKFILL_CATEGORY_ID)
+
+    op.drop_index('ix_items_category', table_name='items')
+    with op.batch_alter_table('items') as batch_op:
+        batch_op.drop_column('category')
+
+
+def downgrade() -> None:
+    with op.batch_alter_table('items') as batch_op:
+        batch_op.add_column(sa.Column('category', sa.String(), nullable=True))
+    _run_batched(BACKFILL_CATEGORY)
+    op.create_index('ix_items_category', 'items', ['category'], unique=False)
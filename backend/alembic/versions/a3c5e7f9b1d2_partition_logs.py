@@ -0,0 +1,112 @@
+"""partition logs by month and index timestamp
+
+Revision ID: a3c5e7f9b1d2
+Revises: e497065c39e0
+Create Date: 2026-10-19 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+from datetime import date
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c5e7f9b1d2'
+down_revision: Union[str, None] = 'e497065c39e0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Partições criadas à frente do mês atual; as seguintes ficam a cargo de
+# backend/jobs/log_retention.py (ensure_partitions)
+MONTHS_AHEAD = 3
+
+
+def _add_months(d, months):
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+def _create_indexes():
+    op.create_index('ix_logs_timestamp', 'logs', ['timestamp'], unique=False)
+    op.create_index('ix_logs_item_id_timestamp', 'logs', ['item_id', 'timestamp'], unique=False)
+    op.create_index('ix_logs_user_id_timestamp', 'logs', ['user_id', 'timestamp'], unique=False)
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        # SQLite/outros: sem particionamento, apenas os índices
+        _create_indexes()
+        return
+
+    op.execute("""
+        CREATE TABLE logs_partitioned (
+            id INTEGER NOT NULL DEFAULT nextval('logs_id_seq'),
+            item_id INTEGER REFERENCES items (id),
+            user_id INTEGER REFERENCES users (id),
+            action VARCHAR,
+            timestamp TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            PRIMARY KEY (id, timestamp)
+        ) PARTITION BY RANGE (timestamp)
+    """)
+
+    first = bind.execute(sa.text("SELECT date_trunc('month', min(timestamp))::date FROM logs")).scalar()
+    today = date.today().replace(day=1)
+    month = (first or today).replace(day=1)
+    last = _add_months(today, MONTHS_AHEAD)
+    while month <= last:
+        upper = _add_months(month, 1)
+        op.execute(
+            f"CREATE TABLE logs_p{month:%Y_%m} PARTITION OF logs_partitioned "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+        )
+        month = upper
+    # Rede de segurança para datas fora das partições mensais
+    op.execute("CREATE TABLE logs_default PARTITION OF logs_partitioned DEFAULT")
+
+    op.execute("""
+        INSERT INTO logs_partitioned (id, item_id, user_id, action, timestamp)
+        SELECT id, item_id, user_id, action, COALESCE(timestamp, now()) FROM logs
+    """)
+
+    op.execute("ALTER SEQUENCE logs_id_seq OWNED BY NONE")
+    op.drop_table('logs')
+    op.execute("ALTER TABLE logs_partitioned RENAME TO logs")
+    op.execute("ALTER TABLE logs RENAME CONSTRAINT logs_partitioned_pkey TO logs_pkey")
+    op.execute("ALTER TABLE logs RENAME CONSTRAINT logs_partitioned_item_id_fkey TO logs_item_id_fkey")
+    op.execute("ALTER TABLE logs RENAME CONSTRAINT logs_partitioned_user_id_fkey TO logs_user_id_fkey")
+    op.execute("ALTER SEQUENCE logs_id_seq OWNED BY logs.id")
+
+    op.create_index('ix_logs_id', 'logs', ['id'], unique=False)
+    _create_indexes()
+
+
+def downgrade() -> None:
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        op.drop_index('ix_logs_user_id_timestamp', table_name='logs')
+        op.drop_index('ix_logs_item_id_timestamp', table_name='logs')
+        op.drop_index('ix_logs_timestamp', table_name='logs')
+        return
+
+    op.execute("""
+        CREATE TABLE logs_plain (
+            id INTEGER NOT NULL DEFAULT nextval('logs_id_seq') PRIMARY KEY,
+            item_id INTEGER REFERENCES items (id),
+            user_id INTEGER REFERENCES users (id),
+            action VARCHAR,
+            timestamp TIMESTAMP WITH TIME ZONE DEFAULT now()
+        )
+    """)
+    op.execute("INSERT INTO logs_plain (id, item_id, user_id, action, timestamp) SELECT id, item_id, user_id, action, timestamp FROM logs")
+    op.execute("ALTER SEQUENCE logs_id_seq OWNED BY NONE")
+    # Remove a tabela particionada junto com todas as partições
+    op.execute("DROP TABLE logs CASCADE")
+    op.execute("ALTER TABLE logs_plain RENAME TO logs")
+    op.execute("ALTER TABLE logs RENAME CONSTRAINT logs_plain_pkey TO logs_pkey")
+    op.execute("ALTER TABLE logs RENAME CONSTRAINT logs_plain_item_id_fkey TO logs_item_id_fkey")
+    op.execute("ALTER TABLE logs RENAME CONSTRAINT logs_plain_user_id_fkey TO logs_user_id_fkey")
+    op.execute("ALTER SEQUENCE logs_id_seq OWNED BY logs.id")
+    op.create_index('ix_logs_id', 'logs', ['id'], unique=False)
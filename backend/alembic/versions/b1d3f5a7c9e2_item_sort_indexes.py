@@ -0,0 +1,70 @@
+"""(column, id) indexes for sorted/keyset item listings
+
+Revision ID: b1d3f5a7c9e2
+Revises: a0c2e4f6b8d1
+Create Date: 2026-10-19 21:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b1d3f5a7c9e2'
+down_revision: Union[str, None] = 'a0c2e4f6b8d1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# ORDER BY coluna, id (e o keyset por (coluna, id)) direto do índice, nos dois sentidos
+INDEXES = [
+    ('ix_items_description_id', 'items', ['description', 'id']),
+    ('ix_items_purchase_date_id', 'items', ['purchase_date', 'id']),
+    ('ix_items_invoice_value_id', 'items', ['invoice_value', 'id']),
+    ('ix_items_status_id', 'items', ['status', 'id']),
+]
+# Prefixos dos novos índices: viram redundantes
+REPLACED = [
+    ('ix_items_description', 'items', ['description']),
+    ('ix_items_purchase_date', 'items', ['purchase_date']),
+]
+
+
+def _create(indexes, concurrently):
+    for name, table, columns in indexes:
+        if concurrently:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True, postgresql_concurrently=True)
+        else:
+            op.create_index(name, table, columns, unique=False)
+
+
+def _drop(indexes, concurrently):
+    for name, table, _ in reversed(indexes):
+        if concurrently:
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
+        else:
+            op.drop_index(name, table_name=table)
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        _create(INDEXES, False)
+        _drop(REPLACED, False)
+        return
+
+    # Mesmo esquema da e7a9c1d3f5b7: CONCURRENTLY fora de transação; os antigos só saem
+    # depois que os novos existem
+    with op.get_context().autocommit_block():
+        _create(INDEXES, True)
+        _drop(REPLACED, True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        _create(REPLACED, False)
+        _drop(INDEXES, False)
+        return
+
+    with op.get_context().autocommit_block():
+        _create(REPLACED, True)
+        _drop(INDEXES, True)
@@ -0,0 +1,126 @@
+"""structured audit events on logs
+
+Revision ID: b4d6f8a0c2e3
+Revises: a3c5e7f9b1d2
+Create Date: 2026-10-19 11:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b4d6f8a0c2e3'
+down_revision: Union[str, None] = 'a3c5e7f9b1d2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EVENT_TYPES = (
+    'ITEM_CREATED', 'STATUS_CHANGED',
+    'TRANSFER_REQUESTED', 'TRANSFER_APPROVED', 'TRANSFER_REJECTED',
+    'WRITE_OFF_REQUESTED', 'WRITE_OFF_APPROVED', 'WRITE_OFF_REJECTED',
+)
+ITEM_STATUSES = ('PENDING', 'APPROVED', 'REJECTED', 'TRANSFER_PENDING', 'WRITE_OFF_PENDING', 'WRITTEN_OFF')
+
+# Backfill em faixas de id para não segurar locks/transações enormes
+BATCH_SIZE = 50_000
+
+# Textos gravados em Log.action pelas versões anteriores (backend/crud.py)
+STATUS_PREFIX = 'Status changed to '
+WRITE_OFF_PREFIX = 'Write-off requested. Reason: '
+TRANSFER_PREFIX = 'Transfer requested to branch '
+
+
+def _backfill_statements(is_postgres):
+    status_expr = f"replace(substr(action, {len(STATUS_PREFIX) + 1}), 'ItemStatus.', '')"
+    to_status = f"CAST({status_expr} AS itemstatus)" if is_postgres else status_expr
+    statuses = ", ".join(f"'{s}'" for s in ITEM_STATUSES)
+    return [
+        "UPDATE logs SET event_type = 'ITEM_CREATED' WHERE action = 'Item created'",
+        # Sem o status anterior não dá para distinguir aprovação de transferência de
+        # uma aprovação comum; só a baixa efetivada é reconhecível pelo texto
+        f"UPDATE logs SET event_type = 'WRITE_OFF_APPROVED', to_status = 'WRITTEN_OFF' "
+        f"WHERE action LIKE '{STATUS_PREFIX}%WRITTEN_OFF'",
+        f"UPDATE logs SET event_type = 'STATUS_CHANGED', to_status = {to_status} "
+        f"WHERE event_type IS NULL AND action LIKE '{STATUS_PREFIX}%' AND {status_expr} IN ({statuses})",
+        f"UPDATE logs SET event_type = 'WRITE_OFF_REQUESTED', to_status = 'WRITE_OFF_PENDING', "
+        f"justification = substr(action, {len(WRITE_OFF_PREFIX) + 1}) "
+        f"WHERE action LIKE '{WRITE_OFF_PREFIX}%'",
+        f"UPDATE logs SET event_type = 'TRANSFER_REQUESTED', to_status = 'TRANSFER_PENDING', "
+        f"to_branch_id = (SELECT min(branches.id) FROM branches "
+        f"WHERE branches.name = substr(logs.action, {len(TRANSFER_PREFIX) + 1})) "
+        f"WHERE action LIKE '{TRANSFER_PREFIX}%'",
+        # Melhor aproximação disponível: a filial atual do item
+        "UPDATE logs SET from_branch_id = (SELECT items.branch_id FROM items WHERE items.id = logs.item_id) "
+        "WHERE from_branch_id IS NULL",
+    ]
+
+
+def _backfill(bind):
+    is_postgres = bind.dialect.name == 'postgresql'
+    low, high = bind.execute(sa.text("SELECT min(id), max(id) FROM logs")).one()
+    if low is None:
+        return
+    statements = _backfill_statements(is_postgres)
+    for start in range(low, high + 1, BATCH_SIZE):
+        for statement in statements:
+            bind.execute(
+                sa.text(f"{statement} AND id >= :start AND id < :end"),
+                {"start": start, "end": start + BATCH_SIZE},
+            )
+
+
+def upgrade() -> None:
+    bind = op.get_bind()
+    is_postgres = bind.dialect.name == 'postgresql'
+
+    event_type = sa.Enum(*EVENT_TYPES, name='logeventtype')
+    if is_postgres:
+        event_type.create(bind, checkfirst=True)
+        event_type = postgresql.ENUM(*EVENT_TYPES, name='logeventtype', create_type=False)
+        item_status = postgresql.ENUM(*ITEM_STATUSES, name='itemstatus', create_type=False)
+    else:
+        item_status = sa.Enum(*ITEM_STATUSES, name='itemstatus')
+
+    with op.batch_alter_table('logs') as batch_op:
+        batch_op.add_column(sa.Column('event_type', event_type, nullable=True))
+        batch_op.add_column(sa.Column('from_status', item_status, nullable=True))
+        batch_op.add_column(sa.Column('to_status', item_status, nullable=True))
+        batch_op.add_column(sa.Column('from_branch_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('to_branch_id', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('justification', sa.Text(), nullable=True))
+        batch_op.create_foreign_key('logs_from_branch_id_fkey', 'branches', ['from_branch_id'], ['id'])
+        batch_op.create_foreign_key('logs_to_branch_id_fkey', 'branches', ['to_branch_id'], ['id'])
+
+    if is_postgres:
+        # Cada lote confirmado separadamente
+        with op.get_context().autocommit_block():
+            _backfill(bind)
+    else:
+        _backfill(bind)
+
+    op.create_index('ix_logs_event_type_timestamp', 'logs', ['event_type', 'timestamp'], unique=False)
+    op.create_index('ix_logs_from_branch_id_timestamp', 'logs', ['from_branch_id', 'timestamp'], unique=False)
+    op.create_index('ix_logs_to_branch_id_timestamp', 'logs', ['to_branch_id', 'timestamp'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index('ix_logs_to_branch_id_timestamp', table_name='logs')
+    op.drop_index('ix_logs_from_branch_id_timestamp', table_name='logs')
+    op.drop_index('ix_logs_event_type_timestamp', table_name='logs')
+
+    with op.batch_alter_table('logs') as batch_op:
+        batch_op.drop_constraint('logs_to_branch_id_fkey', type_='foreignkey')
+        batch_op.drop_constraint('logs_from_branch_id_fkey', type_='foreignkey')
+        batch_op.drop_column('justification')
+        batch_op.drop_column('to_branch_id')
+        batch_op.drop_column('from_branch_id')
+        batch_op.drop_column('to_status')
+        batch_op.drop_column('from_status')
+        batch_op.drop_column('event_type')
+
+    if op.get_bind().dialect.name == 'postgresql':
+        sa.Enum(name='logeventtype').drop(op.get_bind(), checkfirst=True)
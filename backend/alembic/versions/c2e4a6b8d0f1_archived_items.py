@@ -0,0 +1,94 @@
+"""archive tables for written-off items and their logs
+
+Revision ID: c2e4a6b8d0f1
+Revises: b1d3f5a7c9e2
+Create Date: 2026-10-19 22:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e4a6b8d0f1'
+down_revision: Union[str, None] = 'b1d3f5a7c9e2'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+EVENT_TYPES = (
+    'ITEM_CREATED', 'STATUS_CHANGED',
+    'TRANSFER_REQUESTED', 'TRANSFER_APPROVED', 'TRANSFER_REJECTED',
+    'WRITE_OFF_REQUESTED', 'WRITE_OFF_APPROVED', 'WRITE_OFF_REJECTED',
+)
+ITEM_STATUSES = ('PENDING', 'APPROVED', 'REJECTED', 'TRANSFER_PENDING', 'WRITE_OFF_PENDING', 'WRITTEN_OFF')
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # Tipos já existem (items/logs)
+        item_status = postgresql.ENUM(*ITEM_STATUSES, name='itemstatus', create_type=False)
+        event_type = postgresql.ENUM(*EVENT_TYPES, name='logeventtype', create_type=False)
+    else:
+        item_status = sa.Enum(*ITEM_STATUSES, name='itemstatus')
+        event_type = sa.Enum(*EVENT_TYPES, name='logeventtype')
+
+    op.create_table(
+        'archived_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('description', sa.String(), nullable=True),
+        sa.Column('category_id', sa.Integer(), nullable=True),
+        sa.Column('purchase_date', sa.DateTime(), nullable=True),
+        sa.Column('invoice_value', sa.Float(), nullable=True),
+        sa.Column('invoice_number', sa.String(), nullable=True),
+        sa.Column('invoice_file', sa.String(), nullable=True),
+        sa.Column('serial_number', sa.String(), nullable=True),
+        sa.Column('fixed_asset_number', sa.String(), nullable=True),
+        sa.Column('supplier_id', sa.Integer(), nullable=True),
+        sa.Column('branch_id', sa.Integer(), nullable=True),
+        sa.Column('transfer_target_branch_id', sa.Integer(), nullable=True),
+        sa.Column('responsible_id', sa.Integer(), nullable=True),
+        sa.Column('status', item_status, nullable=True),
+        sa.Column('observations', sa.Text(), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('archived_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+        sa.ForeignKeyConstraint(['branch_id'], ['branches.id']),
+        sa.ForeignKeyConstraint(['category_id'], ['categories.id']),
+        sa.ForeignKeyConstraint(['responsible_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['supplier_id'], ['suppliers.id']),
+        sa.ForeignKeyConstraint(['transfer_target_branch_id'], ['branches.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_items_branch_id', 'archived_items', ['branch_id'], unique=False)
+
+    op.create_table(
+        'archived_logs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=True),
+        sa.Column('user_id', sa.Integer(), nullable=True),
+        sa.Column('action', sa.String(), nullable=True),
+        sa.Column('timestamp', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('event_type', event_type, nullable=True),
+        sa.Column('from_status', item_status, nullable=True),
+        sa.Column('to_status', item_status, nullable=True),
+        sa.Column('from_branch_id', sa.Integer(), nullable=True),
+        sa.Column('to_branch_id', sa.Integer(), nullable=True),
+        sa.Column('justification', sa.Text(), nullable=True),
+        sa.ForeignKeyConstraint(['item_id'], ['archived_items.id']),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id']),
+        sa.ForeignKeyConstraint(['from_branch_id'], ['branches.id']),
+        sa.ForeignKeyConstraint(['to_branch_id'], ['branches.id']),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_archived_logs_item_id', 'archived_logs', ['item_id'], unique=False)
+
+
+def downgrade() -> None:
+    # Itens arquivados não voltam para items aqui: exporte antes se precisar deles
+    op.drop_index('ix_archived_logs_item_id', table_name='archived_logs')
+    op.drop_table('archived_logs')
+    op.drop_index('ix_archived_items_branch_id', table_name='archived_items')
+    op.drop_table('archived_items')
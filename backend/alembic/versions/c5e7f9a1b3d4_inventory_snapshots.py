@@ -0,0 +1,47 @@
+"""inventory snapshots for point-in-time queries
+
+Revision ID: c5e7f9a1b3d4
+Revises: b4d6f8a0c2e3
+Create Date: 2026-10-19 13:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5e7f9a1b3d4'
+down_revision: Union[str, None] = 'b4d6f8a0c2e3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+ITEM_STATUSES = ('PENDING', 'APPROVED', 'REJECTED', 'TRANSFER_PENDING', 'WRITE_OFF_PENDING', 'WRITTEN_OFF')
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        item_status = postgresql.ENUM(*ITEM_STATUSES, name='itemstatus', create_type=False)
+    else:
+        item_status = sa.Enum(*ITEM_STATUSES, name='itemstatus')
+
+    op.create_table(
+        'inventory_snapshots',
+        sa.Column('taken_at', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('branch_id', sa.Integer(), nullable=True),
+        sa.Column('status', item_status, nullable=True),
+        sa.ForeignKeyConstraint(['item_id'], ['items.id']),
+        sa.ForeignKeyConstraint(['branch_id'], ['branches.id']),
+        sa.PrimaryKeyConstraint('taken_at', 'item_id'),
+    )
+    op.create_index(
+        'ix_inventory_snapshots_taken_at_branch_id', 'inventory_snapshots', ['taken_at', 'branch_id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_inventory_snapshots_taken_at_branch_id', table_name='inventory_snapshots')
+    op.drop_table('inventory_snapshots')
@@ -0,0 +1,38 @@
+"""approval queue claims (claimed_by_id / claim_expires_at) on items
+
+Revision ID: d4f6a8c0e2b3
+Revises: c2e4a6b8d0f1
+Create Date: 2026-10-19 23:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4f6a8c0e2b3'
+down_revision: Union[str, None] = 'c2e4a6b8d0f1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# archived_items tem as mesmas colunas de items (UNION ALL em include_archived e cópia no arquivamento)
+TABLES = ('items', 'archived_items')
+
+
+def upgrade() -> None:
+    # Colunas nulas sem default: no PostgreSQL só altera o catálogo, sem reescrever a tabela
+    for table in TABLES:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.add_column(sa.Column('claimed_by_id', sa.Integer(), nullable=True))
+            batch_op.add_column(sa.Column('claim_expires_at', sa.DateTime(timezone=True), nullable=True))
+            batch_op.create_foreign_key(f'fk_{table}_claimed_by_id_users', 'users', ['claimed_by_id'], ['id'])
+
+
+def downgrade() -> None:
+    for table in reversed(TABLES):
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.drop_constraint(f'fk_{table}_claimed_by_id_users', type_='foreignkey')
+            batch_op.drop_column('claim_expires_at')
+            batch_op.drop_column('claimed_by_id')
@@ -0,0 +1,35 @@
+"""reference data versions for cache invalidation
+
+Revision ID: d6f8a0b2c4e5
+Revises: c5e7f9a1b3d4
+Create Date: 2026-10-19 15:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd6f8a0b2c4e5'
+down_revision: Union[str, None] = 'c5e7f9a1b3d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    reference_versions = op.create_table(
+        'reference_versions',
+        sa.Column('name', sa.String(), nullable=False),
+        sa.Column('version', sa.Integer(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.text('CURRENT_TIMESTAMP'), nullable=True),
+        sa.PrimaryKeyConstraint('name'),
+    )
+    op.bulk_insert(reference_versions, [
+        {'name': name, 'version': 1} for name in ('branches', 'categories', 'suppliers', 'branding', 'users')
+    ])
+
+
+def downgrade() -> None:
+    op.drop_table('reference_versions')
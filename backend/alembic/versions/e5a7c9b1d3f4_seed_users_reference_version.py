@@ -0,0 +1,30 @@
+"""seed the 'users' row in reference_versions
+
+Revision ID: e5a7c9b1d3f4
+Revises: d4f6a8c0e2b3
+Create Date: 2026-10-20 10:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a7c9b1d3f4'
+down_revision: Union[str, None] = 'd4f6a8c0e2b3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # A d6f8a0b2c4e5 passou a semear 'users'; bancos migrados antes dela ficaram sem a linha
+    op.execute(
+        "INSERT INTO reference_versions (name, version) "
+        "SELECT 'users', 1 WHERE NOT EXISTS (SELECT 1 FROM reference_versions WHERE name = 'users')"
+    )
+
+
+def downgrade() -> None:
+    # A linha é inofensiva e pode ter sido incrementada desde então; fica
+    pass
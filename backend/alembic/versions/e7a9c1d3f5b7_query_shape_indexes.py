@@ -0,0 +1,61 @@
+"""composite and foreign-key indexes for the item/user query shapes
+
+Revision ID: e7a9c1d3f5b7
+Revises: d6f8a0b2c4e5
+Create Date: 2026-10-19 17:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e7a9c1d3f5b7'
+down_revision: Union[str, None] = 'd6f8a0b2c4e5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (nome, tabela, colunas, condição do índice parcial)
+INDEXES = [
+    # Dashboard: contagens/soma por status, opcionalmente com branch_id IN (...)
+    ('ix_items_status_branch_id', 'items', ['status', 'branch_id'], None),
+    # Escopo de filiais dos operadores, agrupamento por filial e FKs
+    ('ix_items_branch_id', 'items', ['branch_id'], None),
+    ('ix_items_category_id', 'items', ['category_id'], None),
+    ('ix_items_supplier_id', 'items', ['supplier_id'], None),
+    ('ix_items_responsible_id', 'items', ['responsible_id'], None),
+    ('ix_items_transfer_target_branch_id', 'items', ['transfer_target_branch_id'],
+     'transfer_target_branch_id IS NOT NULL'),
+    ('ix_users_branch_id', 'users', ['branch_id'], None),
+    ('ix_user_branches_branch_id', 'user_branches', ['branch_id'], None),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, columns, where in INDEXES:
+            op.create_index(name, table, columns, unique=False, sqlite_where=sa.text(where) if where else None)
+        return
+
+    # CREATE INDEX CONCURRENTLY não roda dentro de transação e não bloqueia escritas.
+    # if_not_exists permite reexecutar depois de uma falha no meio (um índice inválido
+    # deixado por uma falha precisa ser removido manualmente antes).
+    with op.get_context().autocommit_block():
+        for name, table, columns, where in INDEXES:
+            op.create_index(
+                name, table, columns, unique=False, if_not_exists=True,
+                postgresql_concurrently=True, postgresql_where=sa.text(where) if where else None,
+            )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,45 @@
+"""indexes for purchase_date/created_at range filters on items
+
+Revision ID: f8b0d2e4a6c9
+Revises: e7a9c1d3f5b7
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f8b0d2e4a6c9'
+down_revision: Union[str, None] = 'e7a9c1d3f5b7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+INDEXES = [
+    ('ix_items_purchase_date', 'items', ['purchase_date']),
+    ('ix_items_created_at', 'items', ['created_at']),
+]
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False)
+        return
+
+    # Mesmo esquema da e7a9c1d3f5b7: CONCURRENTLY fora de transação
+    with op.get_context().autocommit_block():
+        for name, table, columns in INDEXES:
+            op.create_index(name, table, columns, unique=False, if_not_exists=True, postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != 'postgresql':
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table)
+        return
+
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -8,6 +8,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from backend.database import get_db
 from backend.models import User
 from sqlalchemy.future import select
+from sqlalchemy.orm import joinedload
 import os
 
 # Configurações de segurança
@@ -51,7 +52,9 @@ async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession
     except JWTError:
         raise credentials_exception
 
-    result = await db.execute(select(User).where(User.email == email))
+    # branch (legado) carregado junto: o usuário fica completo no identity map
+    # e as rotinas do crud o reaproveitam sem novas consultas
+    result = await db.execute(select(User).options(joinedload(User.branch)).where(User.email == email))
     user = result.scalars().first()
 
     if user is None:
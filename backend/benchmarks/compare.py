@@ -0,0 +1,50 @@
+"""Compara dois resultados do loadtest e aponta regressões de latência/throughput.
+
+Uso:
+    python -m backend.benchmarks.compare results/antes.json results/depois.json --threshold 10
+"""
+import argparse
+import json
+import sys
+
+
+def _delta(before, after):
+    if not before or after is None:
+        return None
+    return (after - before) / before * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=10.0, help="%% de piora no p95 considerada regressão")
+    args = parser.parse_args()
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.candidate) as f:
+        candidate = json.load(f)
+
+    regressions = []
+    print(f"{'cenário':<20}{'p95 antes':>12}{'p95 depois':>12}{'Δ%':>9}{'rps antes':>11}{'rps depois':>12}")
+    for name, after in candidate["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if not before:
+            continue
+        delta = _delta(before["p95_ms"], after["p95_ms"])
+        flag = ""
+        if delta is not None and delta > args.threshold:
+            regressions.append(name)
+            flag = "  <- regressão"
+        delta_text = f"{delta:+.1f}" if delta is not None else "-"
+        print(f"{name:<20}{before['p95_ms'] or 0:>12}{after['p95_ms'] or 0:>12}{delta_text:>9}"
+              f"{before['throughput_rps']:>11}{after['throughput_rps']:>12}{flag}")
+
+    if regressions:
+        print(f"Regressões acima de {args.threshold}%: {', '.join(regressions)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
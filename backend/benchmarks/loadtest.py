@@ -0,0 +1,246 @@
+"""Carga concorrente sobre os endpoints quentes, com p50/p95/p99 e throughput por cenário.
+
+Uso (a partir da raiz do repositório, depois de gerar o dataset com backend.benchmarks.dataset):
+    # Contra a aplicação em processo (ASGI), usando o DATABASE_URL do ambiente
+    DATABASE_URL=sqlite+aiosqlite:///./bench.db SECRET_KEY=x \
+        python -m backend.benchmarks.loadtest --requests 2000 --concurrency 32 --label sqlite-10k
+
+    # Contra um servidor já rodando
+    python -m backend.benchmarks.loadtest --base-url http://localhost:8002 --duration 60
+
+O resultado é gravado em JSON (backend/benchmarks/results/ por padrão) para comparar versões
+com backend.benchmarks.compare.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timezone
+import httpx
+
+from backend.benchmarks.dataset import BENCH_PASSWORD
+
+RESULTS_DIR = os.path.join(os.path.dirname(__file__), "results")
+
+# (nome, peso, papel do usuário que executa)
+SCENARIOS = [
+    ("items_page", 30, "operator"),
+    ("items_search", 15, "operator"),
+    ("items_filtered", 10, "approver"),
+    ("items_large", 3, "approver"),
+    ("dashboard_stats", 15, "operator"),
+    ("logs", 5, "auditor"),
+    ("status_transition", 8, "approver"),
+    ("reference_data", 10, "operator"),
+    ("login", 2, "operator"),
+    ("export_excel", 1, "admin"),
+    ("export_pdf", 1, "admin"),
+]
+
+SEARCH_TERMS = ["Notebook", "Monitor", "Cadeira", "PAT-00", "SN1", "NF-1"]
+
+
+def percentile(values, p):
+    if not values:
+        return None
+    ordered = sorted(values)
+    k = (len(ordered) - 1) * p / 100
+    lower = int(k)
+    upper = min(lower + 1, len(ordered) - 1)
+    return ordered[lower] + (ordered[upper] - ordered[lower]) * (k - lower)
+
+
+class LoadTest:
+    def __init__(self, client, rng):
+        self.client = client
+        self.rng = rng
+        self.tokens = {}
+        self.users = {}
+        self.pending_items = []
+        self.samples = {name: [] for name, _, _ in SCENARIOS}
+        self.errors = {name: 0 for name, _, _ in SCENARIOS}
+
+    async def login(self, email):
+        response = await self.client.post("/token", data={"username": email, "password": BENCH_PASSWORD})
+        response.raise_for_status()
+        return response.json()["access_token"]
+
+    async def prepare(self):
+        self.tokens["admin"] = await self.login("bench-admin")
+        headers = {"Authorization": f"Bearer {self.tokens['admin']}"}
+        users = (await self.client.get("/users/", params={"limit": 5000}, headers=headers)).json()
+        for role in ("approver", "auditor", "operator"):
+            emails = [u["email"] for u in users if u["role"] == role.upper()]
+            if not emails:
+                raise SystemExit(f"Dataset sem usuários {role}: gere com backend.benchmarks.dataset")
+            self.users[role] = emails
+            # Alguns operadores diferentes para variar o escopo de filiais
+            self.tokens[role] = [await self.login(e) for e in self.rng.sample(emails, min(5, len(emails)))]
+        self.tokens["admin"] = [self.tokens["admin"]]
+
+        pending = await self.client.get("/items/", params={"status": "PENDING", "limit": 2000}, headers=headers)
+        self.pending_items = [i["id"] for i in pending.json()]
+        self.rng.shuffle(self.pending_items)
+
+    def headers(self, role):
+        return {"Authorization": f"Bearer {self.rng.choice(self.tokens[role])}"}
+
+    async def run_scenario(self, name, role):
+        h = self.headers(role)
+        get = self.client.get
+        if name == "items_page":
+            return await get("/items/", params={"limit": 100, "skip": self.rng.randint(0, 20) * 100}, headers=h)
+        if name == "items_search":
+            return await get("/items/", params={"search": self.rng.choice(SEARCH_TERMS), "limit": 100}, headers=h)
+        if name == "items_filtered":
+            params = {"status": self.rng.choice(["PENDING", "TRANSFER_PENDING", "WRITE_OFF_PENDING", "APPROVED"]), "limit": 200}
+            if self.rng.random() < 0.5:
+                params["branch_id"] = self.rng.randint(1, 20)
+            return await get("/items/", params=params, headers=h)
+        if name == "items_large":
+            return await get("/items/", params={"limit": 5000}, headers=h)
+        if name == "dashboard_stats":
+            return await get("/dashboard/stats", headers=h)
+        if name == "logs":
+            return await get("/logs/", params={"limit": 1000}, headers=h)
+        if name == "reference_data":
+            path = self.rng.choice(["/branches/", "/categories/", "/suppliers/", "/branding/"])
+            return await get(path, headers=h)
+        if name == "login":
+            return await self.client.post(
+                "/token", data={"username": self.rng.choice(self.users["operator"]), "password": BENCH_PASSWORD}
+            )
+        if name == "status_transition":
+            if not self.pending_items:
+                return await get("/items/", params={"status": "PENDING", "limit": 50}, headers=h)
+            item_id = self.pending_items.pop()
+            status = self.rng.choice(["APPROVED", "REJECTED"])
+            return await self.client.put(f"/items/{item_id}/status", params={"status_update": status}, headers=h)
+        if name == "export_excel":
+            return await get("/reports/export/excel", headers=h)
+        if name == "export_pdf":
+            return await get("/reports/export/pdf", headers=h)
+        raise ValueError(name)
+
+    async def worker(self, deadline, remaining):
+        names = [n for n, _, _ in SCENARIOS]
+        weights = [w for _, w, _ in SCENARIOS]
+        roles = {n: r for n, _, r in SCENARIOS}
+        while time.perf_counter() < deadline and remaining[0] > 0:
+            remaining[0] -= 1
+            name = self.rng.choices(names, weights=weights)[0]
+            started = time.perf_counter()
+            try:
+                response = await self.run_scenario(name, roles[name])
+                ok = response.status_code < 400
+            except httpx.HTTPError:
+                ok = False
+            elapsed = time.perf_counter() - started
+            if ok:
+                self.samples[name].append(elapsed)
+            else:
+                self.errors[name] += 1
+
+    def summary(self, wall_seconds):
+        scenarios = {}
+        for name, values in self.samples.items():
+            scenarios[name] = {
+                "requests": len(values),
+                "errors": self.errors[name],
+                "p50_ms": _ms(percentile(values, 50)),
+                "p95_ms": _ms(percentile(values, 95)),
+                "p99_ms": _ms(percentile(values, 99)),
+                "mean_ms": _ms(statistics.fmean(values) if values else None),
+                "throughput_rps": round(len(values) / wall_seconds, 2),
+            }
+        all_values = [v for values in self.samples.values() for v in values]
+        return {
+            "total_requests": len(all_values),
+            "total_errors": sum(self.errors.values()),
+            "throughput_rps": round(len(all_values) / wall_seconds, 2),
+            "p50_ms": _ms(percentile(all_values, 50)),
+            "p95_ms": _ms(percentile(all_values, 95)),
+            "p99_ms": _ms(percentile(all_values, 99)),
+            "scenarios": scenarios,
+        }
+
+
+def _ms(seconds):
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+def _git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        return None
+
+
+async def run(args):
+    if args.base_url:
+        transport, base_url = None, args.base_url
+    else:
+        # Aplicação em processo: mede o backend sem rede, usando o DATABASE_URL do ambiente
+        from backend.main import app
+        transport, base_url = httpx.ASGITransport(app=app), "http://bench"
+
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, transport=transport, timeout=120, limits=limits) as client:
+        test = LoadTest(client, random.Random(args.seed))
+        await test.prepare()
+
+        remaining = [args.requests or float("inf")]
+        deadline = time.perf_counter() + (args.duration or float("inf"))
+        started = time.perf_counter()
+        await asyncio.gather(*(test.worker(deadline, remaining) for _ in range(args.concurrency)))
+        wall = time.perf_counter() - started
+
+    return {
+        "label": args.label,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "target": args.base_url or "in-process",
+        "database": (os.getenv("DATABASE_URL") or "").split("://")[0] or None,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "wall_seconds": round(wall, 2),
+        **test.summary(wall),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", help="URL de um servidor rodando; sem ela a app roda em processo")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, help="total de requisições (padrão: 1000 se --duration não for dado)")
+    parser.add_argument("--duration", type=float, help="duração em segundos")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--label", default="local")
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: results/<label>-<timestamp>.json)")
+    args = parser.parse_args()
+    if not args.requests and not args.duration:
+        args.requests = 1000
+
+    result = asyncio.run(run(args))
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now().strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{args.label}-{stamp}.json")
+    with open(output, "w") as f:
+        json.dump(result, f, indent=2)
+
+    print(f"{'cenário':<20}{'reqs':>7}{'erros':>7}{'p50':>10}{'p95':>10}{'p99':>10}{'rps':>9}")
+    for name, s in result["scenarios"].items():
+        print(f"{name:<20}{s['requests']:>7}{s['errors']:>7}{s['p50_ms'] or 0:>10}{s['p95_ms'] or 0:>10}{s['p99_ms'] or 0:>10}{s['throughput_rps']:>9}")
+    print(f"total: {result['total_requests']} reqs, {result['throughput_rps']} req/s, p95 {result['p95_ms']} ms -> {output}")
+
+
+if __name__ == "__main__":
+    main()
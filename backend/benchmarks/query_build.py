@@ -0,0 +1,134 @@
+"""Custo em Python por chamada da consulta de /items/: select() reconstruído a cada chamada
+(como era o _filter_items) contra os statements cacheados por combinação de filtros
+(crud.item_statement).
+
+Mede duas coisas, sem depender de um banco com dados:
+  - build: montar o statement + gerar a cache key (o que o SQLAlchemy faz antes de procurar
+    o SQL compilado);
+  - execute: execução completa num SQLite em memória vazio, então o tempo é quase só
+    overhead de Python (compilação/cache, options do ORM, bind de parâmetros).
+
+Uso (a partir da raiz do repositório):
+    SECRET_KEY=x python -m backend.benchmarks.query_build --calls 20000
+"""
+import argparse
+import json
+import time
+from datetime import datetime
+from sqlalchemy import create_engine, event, select
+from sqlalchemy.engine.default import CACHE_HIT
+from sqlalchemy.orm import Session
+from backend import crud, models
+
+# Combinações típicas da tela de inventário
+SCENARIOS = {
+    "sem filtros": {},
+    "status+filial": {"status": "APPROVED", "branch_id": 1},
+    "busca+escopo": {"search": "notebook", "scope_user_id": 2},
+    "todos": {
+        "status": "APPROVED", "category": "Eletrônicos", "branch_id": 1, "search": "note",
+        "scope_user_id": 2, "description": "note", "fixed_asset_number": "PAT",
+        "purchase_date_from": datetime(2024, 1, 1), "purchase_date_to": datetime(2025, 1, 1),
+    },
+}
+
+
+def rebuilt(skip=0, limit=100, **filters):
+    # Montagem antiga: select novo, valores literais e .offset/.limit a cada chamada
+    query = select(models.Item).options(*crud.item_response_options())
+    if filters.get("status"):
+        query = query.where(models.Item.status == filters["status"])
+    if filters.get("category"):
+        category_ids = select(models.Category.id).where(models.Category.name == filters["category"])
+        query = query.where(models.Item.category_id == category_ids.scalar_subquery())
+    if filters.get("branch_id"):
+        query = query.where(models.Item.branch_id == filters["branch_id"])
+    if filters.get("scope_user_id"):
+        query = query.where(models.Item.branch_id.in_(crud.branch_scope(filters["scope_user_id"])))
+    if filters.get("description"):
+        query = query.where(models.Item.description.ilike(f"%{filters['description']}%"))
+    if filters.get("fixed_asset_number"):
+        query = query.where(models.Item.fixed_asset_number.ilike(f"%{filters['fixed_asset_number']}%"))
+    if filters.get("purchase_date_from"):
+        query = query.where(models.Item.purchase_date >= filters["purchase_date_from"])
+    if filters.get("purchase_date_to"):
+        query = query.where(models.Item.purchase_date < filters["purchase_date_to"])
+    if filters.get("search"):
+        pattern = f"%{filters['search']}%"
+        query = query.where(
+            models.Item.description.ilike(pattern) | models.Item.serial_number.ilike(pattern)
+            | models.Item.invoice_number.ilike(pattern) | models.Item.fixed_asset_number.ilike(pattern)
+        )
+    return query.order_by(models.Item.id).offset(skip).limit(limit), {}
+
+
+def cached(skip=0, limit=100, **filters):
+    return crud.item_statement("items", crud._items_page, skip=skip, limit=limit, **filters)
+
+
+def measure_build(builder, filters, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        statement, _ = builder(skip=i % 50, **filters)
+        statement._generate_cache_key()
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def measure_execute(engine, builder, filters, calls):
+    hits = 0
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        nonlocal hits
+        hits += context.cache_hit == CACHE_HIT
+
+    event.listen(engine, "after_cursor_execute", count)
+    try:
+        with Session(engine) as db:
+            start = time.perf_counter()
+            for i in range(calls):
+                statement, params = builder(skip=i % 50, **filters)
+                db.execute(statement, params).scalars().all()
+            elapsed = time.perf_counter() - start
+    finally:
+        event.remove(engine, "after_cursor_execute", count)
+    return elapsed / calls * 1e6, hits / calls
+
+
+def run(calls):
+    engine = create_engine("sqlite://")
+    models.Base.metadata.create_all(engine)
+    result = {"benchmark": "query_build", "calls": calls, "scenarios": {}}
+    for name, filters in SCENARIOS.items():
+        row = {}
+        for label, builder in (("rebuilt", rebuilt), ("cached", cached)):
+            # Aquece o compiled_cache e o cache de statements
+            measure_execute(engine, builder, filters, 10)
+            build_us = measure_build(builder, filters, calls)
+            execute_us, hit_rate = measure_execute(engine, builder, filters, calls)
+            row[label] = {
+                "build_us": round(build_us, 1),
+                "execute_us": round(execute_us, 1),
+                "calls_per_s": round(1e6 / execute_us),
+                "compiled_cache_hit_rate": round(hit_rate, 3),
+            }
+        row["build_speedup"] = round(row["rebuilt"]["build_us"] / row["cached"]["build_us"], 1)
+        row["execute_speedup"] = round(row["rebuilt"]["execute_us"] / row["cached"]["execute_us"], 2)
+        result["scenarios"][name] = row
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--output", help="arquivo JSON para guardar o resultado")
+    args = parser.parse_args()
+
+    result = run(args.calls)
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Benchmark de partida: tempo de import do backend.main e memória (RSS) de um worker.
+
+Uso (a partir da raiz do repositório):
+    SECRET_KEY=x python -m backend.benchmarks.startup --runs 5 --output startup.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+PROBE = r"""
+import json, resource, sys, time
+t0 = time.perf_counter()
+import backend.main
+elapsed = time.perf_counter() - t0
+heavy = [m for m in ("pandas", "openpyxl", "reportlab") if m in sys.modules]
+print(json.dumps({
+    "import_seconds": elapsed,
+    "max_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "heavy_modules_loaded": heavy,
+}))
+"""
+
+def run_once():
+    env = {**os.environ, "SECRET_KEY": os.environ.get("SECRET_KEY", "benchmark")}
+    out = subprocess.run([sys.executable, "-c", PROBE], capture_output=True, text=True, env=env, check=True)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--output", help="arquivo JSON para guardar o resultado")
+    args = parser.parse_args()
+
+    runs = [run_once() for _ in range(args.runs)]
+    result = {
+        "benchmark": "startup",
+        "runs": args.runs,
+        "import_seconds_median": statistics.median(r["import_seconds"] for r in runs),
+        "import_seconds_max": max(r["import_seconds"] for r in runs),
+        "max_rss_mb_median": statistics.median(r["max_rss_mb"] for r in runs),
+        "heavy_modules_loaded": runs[-1]["heavy_modules_loaded"],
+    }
+    print(json.dumps(result, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=2)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+import hashlib
+from datetime import timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from fastapi import Request, Response
+
+# Requisições condicionais (ETag / Last-Modified -> 304 Not Modified)
+
+
+def weak_etag(*parts) -> str:
+    # `parts` deve incluir tudo que muda o corpo: versões, parâmetros, escopo do usuário
+    return f'W/"{hashlib.sha1(repr(parts).encode("utf-8")).hexdigest()[:20]}"'
+
+
+def not_modified(request: Request, response: Response, etag: str, last_modified=None):
+    """Define ETag/Last-Modified na resposta e devolve um 304 se o cliente já tem esta versão."""
+    response.headers["ETag"] = etag
+    # O navegador guarda a resposta, mas sempre revalida (If-None-Match) antes de reutilizar
+    response.headers["Cache-Control"] = "private, no-cache"
+    if last_modified is not None:
+        if last_modified.tzinfo is None:
+            last_modified = last_modified.replace(tzinfo=timezone.utc)
+        last_modified = last_modified.astimezone(timezone.utc)
+        response.headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        matched = etag in tags or "*" in tags
+    else:
+        matched = _not_modified_since(request.headers.get("if-modified-since"), last_modified)
+
+    if matched:
+        return Response(status_code=304, headers=dict(response.headers))
+    return None
+
+
+def _not_modified_since(header, last_modified):
+    if not header or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(header)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        since = since.replace(tzinfo=timezone.utc)
+    # Last-Modified tem resolução de segundos
+    return last_modified.replace(microsecond=0) <= since
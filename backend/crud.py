@@ -1,9 +1,11 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy.orm import selectinload
-from sqlalchemy import or_, cast, String
-from backend import models, schemas
+from sqlalchemy.orm import selectinload, joinedload, lazyload, aliased
+from sqlalchemy import or_, and_, Date, DateTime, Integer, tuple_, case, func, union, union_all, bindparam, cast, String, literal, update
+from datetime import date, datetime, timedelta, timezone
+from backend import models, schemas, reference_cache, result_cache
 from backend.auth import get_password_hash
+from backend.accounting import accounting_value_sql
 
 # Users
 async def get_user_by_email(db: AsyncSession, email: str):
@@ -36,13 +38,12 @@ async def create_user(db: AsyncSession, user: schemas.UserCreate):
         db_user.branches = branches
 
     db.add(db_user)
+    await reference_cache.bump(db, reference_cache.USERS)
     await db.commit()
     await db.refresh(db_user)
     return db_user
 
-async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, search: str = None):
-    # Eager load branches for UserResponse
-    query = select(models.User).options(selectinload(models.User.branches), selectinload(models.User.branch))
+def _filter_users(query, search: str = None):
     if search:
         search_filter = f"%{search}%"
         query = query.where(
@@ -51,7 +52,12 @@ async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, search: s
                 models.User.email.ilike(search_filter)
             )
         )
-    result = await db.execute(query.offset(skip).limit(limit))
+    return query
+
+async def get_users(db: AsyncSession, skip: int = 0, limit: int = 100, search: str = None):
+    # Eager load branches for UserResponse
+    query = select(models.User).options(selectinload(models.User.branches), selectinload(models.User.branch))
+    result = await db.execute(_filter_users(query, search).offset(skip).limit(limit))
     return result.scalars().all()
 
 async def update_user(db: AsyncSession, user_id: int, user: schemas.UserUpdate):
@@ -78,6 +84,7 @@ async def update_user(db: AsyncSession, user_id: int, user: schemas.UserUpdate):
                 branches = result.scalars().all()
                 db_user.branches = branches
 
+        await reference_cache.bump(db, reference_cache.USERS)
         await db.commit()
         # Reload user to ensure clean state and avoid async refresh issues
         result = await db.execute(
@@ -93,6 +100,7 @@ async def delete_user(db: AsyncSession, user_id: int):
     db_user = result.scalars().first()
     if db_user:
         await db.delete(db_user)
+        await reference_cache.bump(db, reference_cache.USERS)
         await db.commit()
         return True
     return False
@@ -114,6 +122,7 @@ async def get_branches(db: AsyncSession, skip: int = 0, limit: int = 100, search
 async def create_branch(db: AsyncSession, branch: schemas.BranchCreate):
     db_branch = models.Branch(**branch.dict())
     db.add(db_branch)
+    await reference_cache.bump(db, reference_cache.BRANCHES)
     await db.commit()
     await db.refresh(db_branch)
     return db_branch
@@ -125,6 +134,7 @@ async def update_branch(db: AsyncSession, branch_id: int, branch: schemas.Branch
         if branch.name: db_branch.name = branch.name
         if branch.address: db_branch.address = branch.address
         if branch.cnpj: db_branch.cnpj = branch.cnpj
+        await reference_cache.bump(db, reference_cache.BRANCHES)
         await db.commit()
         await db.refresh(db_branch)
     return db_branch
@@ -134,6 +144,7 @@ async def delete_branch(db: AsyncSession, branch_id: int):
     db_branch = result.scalars().first()
     if db_branch:
         await db.delete(db_branch)
+        await reference_cache.bump(db, reference_cache.BRANCHES)
         await db.commit()
         return True
     return False
@@ -146,13 +157,22 @@ async def get_categories(db: AsyncSession, skip: int = 0, limit: int = 100, sear
     result = await db.execute(query.offset(skip).limit(limit))
     return result.scalars().all()
 
-async def get_category_by_name(db: AsyncSession, name: str):
-    result = await db.execute(select(models.Category).where(models.Category.name == name))
-    return result.scalars().first()
+async def get_category_names(db: AsyncSession):
+    # id -> nome, do cache de referência (sem query enquanto a versão de categorias não mudar)
+    async def load():
+        result = await db.execute(select(models.Category.id, models.Category.name))
+        return dict(result.all())
+
+    return await reference_cache.get_or_load(db, reference_cache.CATEGORIES, "names", load)
+
+async def get_category_id_by_name(db: AsyncSession, name: str):
+    names = await get_category_names(db)
+    return next((category_id for category_id, category_name in names.items() if category_name == name), None)
 
 async def create_category(db: AsyncSession, category: schemas.CategoryCreate):
     db_category = models.Category(**category.dict())
     db.add(db_category)
+    await reference_cache.bump(db, reference_cache.CATEGORIES)
     await db.commit()
     await db.refresh(db_category)
     return db_category
@@ -165,6 +185,7 @@ async def update_category(db: AsyncSession, category_id: int, category: schemas.
         # Update depreciation_months explicitly if present (even if 0, but check for None if field is optional)
         if category.depreciation_months is not None:
             db_category.depreciation_months = category.depreciation_months
+        await reference_cache.bump(db, reference_cache.CATEGORIES)
         await db.commit()
         await db.refresh(db_category)
     return db_category
@@ -174,6 +195,7 @@ async def delete_category(db: AsyncSession, category_id: int):
     db_category = result.scalars().first()
     if db_category:
         await db.delete(db_category)
+        await reference_cache.bump(db, reference_cache.CATEGORIES)
         await db.commit()
         return True
     return False
@@ -199,6 +221,7 @@ async def get_supplier_by_cnpj(db: AsyncSession, cnpj: str):
 async def create_supplier(db: AsyncSession, supplier: schemas.SupplierCreate):
     db_supplier = models.Supplier(**supplier.dict())
     db.add(db_supplier)
+    await reference_cache.bump(db, reference_cache.SUPPLIERS)
     await db.commit()
     await db.refresh(db_supplier)
     return db_supplier
@@ -209,6 +232,7 @@ async def update_supplier(db: AsyncSession, supplier_id: int, supplier_update: s
     if db_supplier:
         if supplier_update.name: db_supplier.name = supplier_update.name
         if supplier_update.cnpj: db_supplier.cnpj = supplier_update.cnpj
+        await reference_cache.bump(db, reference_cache.SUPPLIERS)
         await db.commit()
         await db.refresh(db_supplier)
     return db_supplier
@@ -218,84 +242,290 @@ async def delete_supplier(db: AsyncSession, supplier_id: int):
     db_supplier = result.scalars().first()
     if db_supplier:
         await db.delete(db_supplier)
+        await reference_cache.bump(db, reference_cache.SUPPLIERS)
         await db.commit()
         return True
     return False
 
 # Items
-async def get_items(
-    db: AsyncSession,
-    skip: int = 0,
-    limit: int = 100,
-    status: str = None,
-    category: str = None,
-    branch_id: int = None,
-    search: str = None,
-    allowed_branch_ids: list[int] = None,
-    description: str = None,
-    fixed_asset_number: str = None,
-    purchase_date: str = None
-):
-    query = select(models.Item).options(
-        selectinload(models.Item.branch),
-        selectinload(models.Item.transfer_target_branch),
-        selectinload(models.Item.category_rel),
-        selectinload(models.Item.supplier),
-        selectinload(models.Item.responsible)
+def _user_response_options(loader):
+    # UserResponse precisa de branch (legado) e branches
+    return loader.options(
+        joinedload(models.User.branch).lazyload("*"),
+        selectinload(models.User.branches).lazyload("*"),
     )
-    if status:
-        query = query.where(models.Item.status == status)
-    if category:
-        query = query.where(models.Item.category == category)
-    if branch_id:
-        query = query.where(models.Item.branch_id == branch_id)
-    if allowed_branch_ids is not None:
-        query = query.where(models.Item.branch_id.in_(allowed_branch_ids))
 
-    # Specific column filters
-    if description:
-        query = query.where(models.Item.description.ilike(f"%{description}%"))
-    if fixed_asset_number:
-        query = query.where(models.Item.fixed_asset_number.ilike(f"%{fixed_asset_number}%"))
-    if purchase_date:
-        query = query.where(cast(models.Item.purchase_date, String).ilike(f"%{purchase_date}%"))
+def item_response_options():
+    # Carrega exatamente o que o ItemResponse serializa. O lazyload("*") nas entidades
+    # relacionadas corta a cascata dos lazy="selectin" dos models (Branch.items,
+    # Branch.users, Category.items...), que não fazem parte da resposta.
+    return (
+        joinedload(models.Item.branch).lazyload("*"),
+        joinedload(models.Item.transfer_target_branch).lazyload("*"),
+        joinedload(models.Item.category_rel).lazyload("*"),
+        joinedload(models.Item.supplier).lazyload("*"),
+        _user_response_options(joinedload(models.Item.responsible)),
+        selectinload(models.Item.logs).options(
+            lazyload(models.Log.item),
+            _user_response_options(joinedload(models.Log.user)),
+        ),
+    )
 
-    if search:
-        search_filter = f"%{search}%"
-        query = query.where(
-            (models.Item.description.ilike(search_filter)) |
-            (models.Item.serial_number.ilike(search_filter)) |
-            (models.Item.invoice_number.ilike(search_filter)) |
-            (models.Item.fixed_asset_number.ilike(search_filter))
+async def _get_acting_user(db: AsyncSession, user_id: int):
+    # Normalmente já está no identity map (carregado por auth.get_current_user), sem query
+    return await db.get(
+        models.User,
+        user_id,
+        options=[joinedload(models.User.branch), selectinload(models.User.branches)]
+    )
+
+def branch_scope(user_id: int):
+    # Filiais visíveis para o usuário (user_branches + users.branch_id legado) como subquery.
+    # Um único parâmetro em vez de uma lista IN por filial: mesmo SQL para qualquer escopo.
+    return union(
+        select(models.user_branches.c.branch_id).where(models.user_branches.c.user_id == user_id),
+        select(models.User.branch_id).where(models.User.id == user_id, models.User.branch_id.isnot(None)),
+    )
+
+# Filtros da listagem de itens. Cada um vira uma cláusula com bindparam nomeado: o SQL
+# depende só de *quais* filtros vieram, nunca dos valores.
+ITEM_FILTERS = {
+    "status": lambda item: item.status == bindparam("status"),
+    # Nome resolvido no próprio SQL; a comparação é pela FK inteira (ix_items_category_id)
+    "category": lambda item: item.category_id == (
+        select(models.Category.id).where(models.Category.name == bindparam("category")).scalar_subquery()
+    ),
+    "category_id": lambda item: item.category_id == bindparam("category_id"),
+    "branch_id": lambda item: item.branch_id == bindparam("branch_id"),
+    "scope_user_id": lambda item: item.branch_id.in_(branch_scope(bindparam("scope_user_id"))),
+    # Specific column filters
+    "description": lambda item: item.description.ilike(bindparam("description")),
+    "fixed_asset_number": lambda item: item.fixed_asset_number.ilike(bindparam("fixed_asset_number")),
+    # Intervalos [from, to) comparando a coluna tipada (usa os índices de purchase_date/created_at)
+    "purchase_date_from": lambda item: item.purchase_date >= bindparam("purchase_date_from"),
+    "purchase_date_to": lambda item: item.purchase_date < bindparam("purchase_date_to"),
+    "created_at_from": lambda item: item.created_at >= bindparam("created_at_from"),
+    "created_at_to": lambda item: item.created_at < bindparam("created_at_to"),
+    "search": lambda item: or_(
+        item.description.ilike(bindparam("search")),
+        item.serial_number.ilike(bindparam("search")),
+        item.invoice_number.ilike(bindparam("search")),
+        item.fixed_asset_number.ilike(bindparam("search")),
+    ),
+}
+# Valor vai como padrão "%valor%" para o ILIKE
+ITEM_LIKE_FILTERS = {"search", "description", "fixed_asset_number"}
+
+# Ordenações de /items/ (sort=). description, purchase_date, invoice_value e status têm índice
+# (coluna, id) e servem a ordem nos dois sentidos; filial/categoria vêm das tabelas de referência
+# (pequenas, via LEFT JOIN) e o valor contábil depende da data de hoje, então esses o banco
+# ordena por linha.
+ITEM_SORTS = {
+    "id": lambda item: item.id,
+    "description": lambda item: item.description,
+    "purchase_date": lambda item: item.purchase_date,
+    "invoice_value": lambda item: item.invoice_value,
+    "status": lambda item: item.status,
+    "branch": lambda item: models.Branch.name,
+    "category": lambda item: models.Category.name,
+    "accounting_value": lambda item: accounting_value_sql(
+        item.invoice_value, item.purchase_date, models.Category.depreciation_months,
+        bindparam("today", type_=Date),
+    ),
+}
+ITEM_SORT_JOINS = {
+    "branch": lambda item: (models.Branch, models.Branch.id == item.branch_id),
+    "category": lambda item: (models.Category, models.Category.id == item.category_id),
+    "accounting_value": lambda item: (models.Category, models.Category.id == item.category_id),
+}
+ITEM_SORT_ORDERS = ("asc", "desc")
+
+def _item_ordering(item, sort: str, order: str, keyset):
+    # ORDER BY (chave, id) com NULLs no fim em asc e no começo em desc (o padrão do Postgres,
+    # que percorre o mesmo índice nos dois sentidos). `keyset` é None, "value" ou "null":
+    # se há cursor e se o valor da chave nele é nulo.
+    sort_key = ITEM_SORTS[sort](item)
+    descending = order == "desc"
+    if sort == "id":
+        where = []
+        if keyset:
+            after_id = bindparam("after_id", type_=Integer)
+            where.append(item.id < after_id if descending else item.id > after_id)
+        return sort_key, where, [item.id.desc() if descending else item.id.asc()]
+
+    order_by = (
+        [sort_key.desc().nulls_first(), item.id.desc()] if descending
+        else [sort_key.asc().nulls_last(), item.id.asc()]
+    )
+    where = []
+    after_id = bindparam("after_id", type_=Integer)
+    if keyset == "value":
+        after = tuple_(sort_key, item.id)
+        position = tuple_(bindparam("after_value", type_=sort_key.type), after_id)
+        # Depois de um valor não nulo: em asc ainda faltam os nulos; em desc eles já passaram
+        where.append(after < position if descending else or_(after > position, sort_key.is_(None)))
+    elif keyset == "null":
+        where.append(
+            or_(and_(sort_key.is_(None), item.id < after_id), sort_key.isnot(None)) if descending
+            else and_(sort_key.is_(None), item.id > after_id)
         )
+    return sort_key, where, order_by
+
+# Statements montados por (consulta, combinação de filtros, ordenação). Reusar o mesmo objeto
+# evita reconstruir o select() e as options a cada requisição; o SQLAlchemy memoiza a cache key
+# do objeto e acha o SQL já compilado no compiled_cache do engine.
+ITEM_STATEMENT_CACHE_SIZE = 512
+_item_statements: dict[tuple, object] = {}
+
+def _items_with_archive():
+    # items UNION ALL archived_items (mesmas colunas), mapeado como Item
+    columns = models.Item.__table__.columns
+    archived = models.ArchivedItem.__table__.columns
+    union = union_all(select(*columns), select(*(archived[column.key] for column in columns)))
+    return aliased(models.Item, union.subquery("items_all"))
+
+def _logs_with_archive():
+    # logs UNION ALL archived_logs (mesmas colunas), mapeado como Log
+    columns = models.Log.__table__.columns
+    archived = models.ArchivedLog.__table__.columns
+    union = union_all(select(*columns), select(*(archived[column.key] for column in columns)))
+    return aliased(models.Log, union.subquery("logs_all"))
+
+def item_statement(kind, build, skip: int = 0, limit: int = 100, sort: str = None, order: str = "asc",
+                   after: tuple = None, include_archived: bool = False, **filters):
+    # `kind` identifica a consulta base (hashable). `build(apply, sort_key, item)` monta o select
+    # sobre `item` (Item, ou a união com archived_items se include_archived): apply(query)
+    # acrescenta o join da ordenação, os filtros ativos e o ORDER BY (ordered=False para
+    # consultas sem ordem); OFFSET/LIMIT vão como bindparams "skip"/"limit".
+    # `after` = (valor da chave, id) do último item da página anterior.
+    unknown = set(filters) - ITEM_FILTERS.keys()
+    if unknown:
+        raise TypeError(f"Filtros de item desconhecidos: {', '.join(sorted(unknown))}")
+    sort = sort or "id"
+    active = tuple(name for name in ITEM_FILTERS if filters.get(name))
+    keyset = None if after is None else ("null" if after[0] is None else "value")
+    key = (kind, active, sort, order, keyset, bool(include_archived))
+    statement = _item_statements.get(key)
+    if statement is None:
+        item = _items_with_archive() if include_archived else models.Item
+        sort_key, keyset_where, order_by = _item_ordering(item, sort, order, keyset)
+        where = [ITEM_FILTERS[name](item) for name in active] + keyset_where
+        join = ITEM_SORT_JOINS[sort](item) if sort in ITEM_SORT_JOINS else None
+
+        def apply(query, ordered=True):
+            query = query.select_from(item)
+            if join is not None:
+                query = query.outerjoin(*join)
+            query = query.where(*where)
+            return query.order_by(*order_by) if ordered else query
+
+        statement = build(apply, sort_key, item)
+        if len(_item_statements) >= ITEM_STATEMENT_CACHE_SIZE:
+            _item_statements.clear()
+        _item_statements[key] = statement
+
+    params = {"skip": skip, "limit": limit}
+    for name in active:
+        value = filters[name]
+        params[name] = f"%{value}%" if name in ITEM_LIKE_FILTERS else value
+    if sort == "accounting_value":
+        params["today"] = date.today()
+    if keyset:
+        params["after_id"] = after[1]
+        if keyset == "value" and sort != "id":
+            params["after_value"] = after[0]
+    return statement, params
+
+def _items_page(apply, sort_key, item):
+    # Página ORM (ItemResponse): só a tabela viva, as options são de models.Item
+    if item is not models.Item:
+        raise TypeError("include_archived só é suportado nas listagens de backend/serializers.py")
+    return (
+        apply(select(models.Item).options(*item_response_options()))
+        .offset(bindparam("skip")).limit(bindparam("limit"))
+    )
 
-    result = await db.execute(query.offset(skip).limit(limit))
+async def get_items(db: AsyncSession, skip: int = 0, limit: int = 100, **filters):
+    statement, params = item_statement("items", _items_page, skip=skip, limit=limit, **filters)
+    result = await db.execute(statement, params)
     return result.scalars().all()
 
-async def get_item(db: AsyncSession, item_id: int):
-    query = select(models.Item).where(models.Item.id == item_id).options(
-        selectinload(models.Item.branch),
-        selectinload(models.Item.transfer_target_branch),
-        selectinload(models.Item.category_rel),
-        selectinload(models.Item.supplier),
-        selectinload(models.Item.responsible)
+def _items_fingerprint(apply, sort_key, item):
+    changed = func.coalesce(item.updated_at, item.created_at, type_=DateTime(timezone=True))
+    page = (
+        apply(select(item.id, changed.label("changed")))
+        .offset(bindparam("skip")).limit(bindparam("limit")).subquery()
     )
-    result = await db.execute(query)
-    return result.scalars().first()
+    return select(func.count(), func.max(page.c.id), func.sum(page.c.id), func.max(page.c.changed))
+
+async def get_items_fingerprint(db: AsyncSession, skip: int = 0, limit: int = 100, **filters):
+    # Resumo da página pedida (quantidade, ids e última alteração) sem carregar os itens,
+    # usado no ETag de /items/
+    statement, params = item_statement("fingerprint", _items_fingerprint, skip=skip, limit=limit, **filters)
+    result = await db.execute(statement, params)
+    return tuple(result.one())
+
+# Contagens de /items/facets, com os mesmos nomes dos filtros de /items/
+ITEM_FACETS = ("status", "branch_id", "category_id", "supplier_id")
+
+def _items_facets(apply, sort_key, item):
+    # Itens filtrados uma vez (CTE) e um GROUP BY por faceta, unidos num único statement
+    filtered = apply(select(*(getattr(item, name) for name in ITEM_FACETS)), ordered=False).cte("filtered")
+    return union_all(*(
+        select(literal(name).label("facet"), cast(filtered.c[name], String).label("value"), func.count())
+        .where(filtered.c[name].isnot(None)).group_by(filtered.c[name])
+        for name in ITEM_FACETS
+    ))
+
+async def get_item_facets(db: AsyncSession, **filters):
+    statement, params = item_statement("facets", _items_facets, **filters)
+    result = await db.execute(statement, params)
+    facets = {name: {} for name in ITEM_FACETS}
+    for facet, value, count in result.all():
+        facets[facet][value if facet == "status" else int(value)] = count
+    return facets
+
+async def get_item(db: AsyncSession, item_id: int, for_update: bool = False):
+    if for_update:
+        # SELECT ... FOR UPDATE OF items: quem decide o mesmo item ao mesmo tempo espera o
+        # commit anterior e relê o estado já alterado (populate_existing)
+        result = await db.execute(
+            select(models.Item)
+            .where(models.Item.id == item_id)
+            .options(*item_response_options())
+            .with_for_update(of=models.Item)
+            .execution_options(populate_existing=True)
+        )
+        return result.scalars().first()
+    # db.get reaproveita o item se ele já estiver carregado nesta sessão
+    return await db.get(models.Item, item_id, options=item_response_options())
 
 async def create_item(db: AsyncSession, item: schemas.ItemCreate):
-    db_item = models.Item(**item.dict())
+    # `category` (nome) é só entrada; o que se grava é category_id
+    db_item = models.Item(**item.dict(exclude={"category"}))
+    # Relacionamentos preenchidos com objetos já carregados (identity map) em vez de
+    # recarregar o item depois do commit. O INSERT usa RETURNING para id/created_at.
+    db_item.branch = await db.get(models.Branch, item.branch_id) if item.branch_id else None
+    db_item.category_rel = await db.get(models.Category, item.category_id)
+    if db_item.category_rel is None:
+        # Sem isso o INSERT gravaria category_id nulo
+        raise ValueError("Categoria não encontrada")
+    db_item.supplier = await db.get(models.Supplier, item.supplier_id) if item.supplier_id else None
+    db_item.responsible = await _get_acting_user(db, item.responsible_id) if item.responsible_id else None
+    db_item.transfer_target_branch = None
+    db_item.updated_at = None
+    db_item.logs = [models.Log(
+        user=db_item.responsible,
+        action="Item created",
+        event_type=models.LogEventType.ITEM_CREATED,
+        to_status=db_item.status or models.ItemStatus.PENDING,
+        from_branch_id=item.branch_id,
+    )]
     db.add(db_item)
     await db.commit()
-    # Eager load relationships for Pydantic serialization
-    query = select(models.Item).where(models.Item.id == db_item.id).options(
-        selectinload(models.Item.branch),
-        selectinload(models.Item.category_rel),
-        selectinload(models.Item.supplier),
-        selectinload(models.Item.responsible)
-    )
-    result = await db.execute(query)
-    return result.scalars().first()
+    # Dashboard e listagens em cache neste worker
+    result_cache.invalidate()
+    return db_item
 
 async def get_item_by_fixed_asset(db: AsyncSession, fixed_asset_number: str, exclude_item_id: int = None):
     query = select(models.Item).where(models.Item.fixed_asset_number == fixed_asset_number)
@@ -303,111 +533,286 @@ async def get_item_by_fixed_asset(db: AsyncSession, fixed_asset_number: str, exc
     if exclude_item_id:
         query = query.where(models.Item.id != exclude_item_id)
 
-    query = query.options(
-        selectinload(models.Item.branch),
-        selectinload(models.Item.category_rel),
-        selectinload(models.Item.supplier),
-        selectinload(models.Item.responsible)
-    )
+    query = query.options(*item_response_options())
     result = await db.execute(query)
     return result.scalars().first()
 
+TRANSFER_EVENTS = (
+    models.LogEventType.TRANSFER_REQUESTED,
+    models.LogEventType.TRANSFER_APPROVED,
+    models.LogEventType.TRANSFER_REJECTED,
+)
+
 async def update_item_status(db: AsyncSession, item_id: int, status: models.ItemStatus, user_id: int, fixed_asset_number: str = None):
-    result = await db.execute(select(models.Item).where(models.Item.id == item_id))
-    db_item = result.scalars().first()
+    db_item = await get_item(db, item_id, for_update=True)
     if db_item:
-        # Transfer Logic
-        if db_item.status == models.ItemStatus.TRANSFER_PENDING:
-            if status == models.ItemStatus.APPROVED:
-                # Execute Transfer
-                if db_item.transfer_target_branch_id:
-                    db_item.branch_id = db_item.transfer_target_branch_id
-                    db_item.transfer_target_branch_id = None
-                    db_item.status = models.ItemStatus.APPROVED
-            elif status == models.ItemStatus.REJECTED:
-                # Cancel Transfer
-                db_item.transfer_target_branch_id = None
-                db_item.status = models.ItemStatus.APPROVED # Revert to Approved state
-
-        # Write-off Logic
-        elif db_item.status == models.ItemStatus.WRITE_OFF_PENDING:
-            if status == models.ItemStatus.WRITTEN_OFF:
-                 db_item.status = models.ItemStatus.WRITTEN_OFF
-            elif status == models.ItemStatus.REJECTED:
-                 db_item.status = models.ItemStatus.APPROVED # Revert to Approved
-
-        else:
-            # Normal Approval
-            db_item.status = status
-
-        if fixed_asset_number:
-            db_item.fixed_asset_number = fixed_asset_number
-
-        # Log the action
-        log = models.Log(item_id=item_id, user_id=user_id, action=f"Status changed to {status}")
-        db.add(log)
-        await db.commit()
+        # Item reservado na fila de aprovação (/approvals) por outro aprovador
+        if _claimed_by_other(db_item, user_id, datetime.now(timezone.utc)):
+            await db.rollback()
+            raise ApprovalConflict("Item reservado por outro aprovador")
+        await _apply_status(db, db_item, status, user_id, fixed_asset_number)
+    return db_item
+
+async def _apply_status(db: AsyncSession, db_item: models.Item, status: models.ItemStatus, user_id: int, fixed_asset_number: str = None):
+    # `db_item` já travado (get_item(for_update=True)); o commit libera a linha
+    from_status = db_item.status
+    from_branch_id = db_item.branch_id
+    to_branch_id = db_item.transfer_target_branch_id
+    event_type = models.LogEventType.STATUS_CHANGED
+
+    # Transfer Logic
+    if db_item.status == models.ItemStatus.TRANSFER_PENDING:
+        event_type = None
+        if status == models.ItemStatus.APPROVED:
+            # Execute Transfer
+            if db_item.transfer_target_branch_id:
+                # Atribui os objetos (não só os ids) para a resposta já sair consistente
+                db_item.branch = db_item.transfer_target_branch
+                db_item.transfer_target_branch = None
+                db_item.status = models.ItemStatus.APPROVED
+                event_type = models.LogEventType.TRANSFER_APPROVED
+        elif status == models.ItemStatus.REJECTED:
+            # Cancel Transfer
+            db_item.transfer_target_branch = None
+            db_item.status = models.ItemStatus.APPROVED # Revert to Approved state
+            event_type = models.LogEventType.TRANSFER_REJECTED
+
+    # Write-off Logic
+    elif db_item.status == models.ItemStatus.WRITE_OFF_PENDING:
+        event_type = None
+        if status == models.ItemStatus.WRITTEN_OFF:
+             db_item.status = models.ItemStatus.WRITTEN_OFF
+             event_type = models.LogEventType.WRITE_OFF_APPROVED
+        elif status == models.ItemStatus.REJECTED:
+             db_item.status = models.ItemStatus.APPROVED # Revert to Approved
+             event_type = models.LogEventType.WRITE_OFF_REJECTED
+
+    else:
+        # Normal Approval
+        db_item.status = status
 
-        # Reload item with relationships to prevent MissingGreenlet
-        query = select(models.Item).where(models.Item.id == item_id).options(
-            selectinload(models.Item.branch),
-            selectinload(models.Item.transfer_target_branch),
-            selectinload(models.Item.category_rel),
-            selectinload(models.Item.supplier),
-            selectinload(models.Item.responsible)
+    if fixed_asset_number:
+        db_item.fixed_asset_number = fixed_asset_number
+    # Decidido: sai da fila de aprovação
+    db_item.claimed_by_id = None
+    db_item.claim_expires_at = None
+
+    # Log the action
+    log = models.Log(
+        item=db_item,
+        user=await _get_acting_user(db, user_id),
+        action=f"Status changed to {status}",
+        event_type=event_type or models.LogEventType.STATUS_CHANGED,
+        from_status=from_status,
+        to_status=db_item.status,
+        from_branch_id=from_branch_id,
+        to_branch_id=to_branch_id if event_type in TRANSFER_EVENTS else None,
+    )
+    db.add(log)
+    await db.commit()
+    result_cache.invalidate()
+
+# Fila de aprovação (/approvals): cada aprovador reserva um lote com FOR UPDATE SKIP LOCKED
+APPROVAL_STATUSES = (
+    models.ItemStatus.PENDING, models.ItemStatus.TRANSFER_PENDING, models.ItemStatus.WRITE_OFF_PENDING,
+)
+# Decisões que mudam o item em cada status (as demais seriam ignoradas por _apply_status)
+APPROVAL_DECISIONS = {
+    models.ItemStatus.PENDING: (models.ItemStatus.APPROVED, models.ItemStatus.REJECTED),
+    models.ItemStatus.TRANSFER_PENDING: (models.ItemStatus.APPROVED, models.ItemStatus.REJECTED),
+    models.ItemStatus.WRITE_OFF_PENDING: (models.ItemStatus.WRITTEN_OFF, models.ItemStatus.REJECTED),
+}
+
+class ApprovalConflict(ValueError):
+    pass
+
+def _claimed_by_other(db_item: models.Item, user_id: int, now: datetime):
+    expires = db_item.claim_expires_at
+    if db_item.claimed_by_id in (None, user_id) or expires is None:
+        return False
+    if expires.tzinfo is None:  # SQLite devolve sem fuso
+        expires = expires.replace(tzinfo=timezone.utc)
+    return expires > now
+
+async def claim_approvals(db: AsyncSession, user_id: int, limit: int, lease_seconds: int,
+                          status: models.ItemStatus = None, branch_id: int = None):
+    now = datetime.now(timezone.utc)
+    expires = now + timedelta(seconds=lease_seconds)
+    # Livres, com reserva vencida ou já deste aprovador (chamar de novo renova o lote).
+    # SKIP LOCKED: linhas que outro aprovador está reservando ou decidindo agora são
+    # puladas em vez de esperadas, então cada um recebe um lote diferente.
+    claimable = (
+        select(models.Item.id)
+        .where(
+            models.Item.status.in_([status] if status else APPROVAL_STATUSES),
+            or_(
+                models.Item.claimed_by_id.is_(None),
+                models.Item.claimed_by_id == user_id,
+                models.Item.claim_expires_at < now,
+            ),
+        )
+        .order_by(models.Item.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if branch_id:
+        claimable = claimable.where(models.Item.branch_id == branch_id)
+    ids = (await db.execute(claimable)).scalars().all()
+    if ids:
+        # A reserva não entra no ItemResponse: mantém updated_at (e os ETags das listagens)
+        await db.execute(
+            update(models.Item)
+            .where(models.Item.id.in_(ids))
+            .values(claimed_by_id=user_id, claim_expires_at=expires, updated_at=models.Item.updated_at)
+            .execution_options(synchronize_session=False)
         )
-        result = await db.execute(query)
-        db_item = result.scalars().first()
+    await db.commit()
+
+    if not ids:
+        return [], expires
+    result = await db.execute(
+        select(models.Item).where(models.Item.id.in_(ids)).options(*item_response_options()).order_by(models.Item.id)
+    )
+    return result.scalars().all(), expires
 
+async def release_approvals(db: AsyncSession, user_id: int, item_ids: list = None):
+    query = update(models.Item).where(
+        models.Item.claimed_by_id == user_id, models.Item.status.in_(APPROVAL_STATUSES)
+    )
+    if item_ids:
+        query = query.where(models.Item.id.in_(item_ids))
+    result = await db.execute(
+        query.values(claimed_by_id=None, claim_expires_at=None, updated_at=models.Item.updated_at)
+        .execution_options(synchronize_session=False)
+    )
+    await db.commit()
+    return result.rowcount
+
+async def decide_approval(db: AsyncSession, item_id: int, status: models.ItemStatus, user_id: int,
+                          fixed_asset_number: str = None):
+    # Verificação e decisão na mesma transação, com a linha travada: dois aprovadores
+    # não decidem o mesmo item e nenhuma decisão sobrescreve a outra
+    db_item = await get_item(db, item_id, for_update=True)
+    if db_item is None:
+        return None
+    if db_item.status not in APPROVAL_DECISIONS:
+        await db.rollback()
+        raise ApprovalConflict("Item não está aguardando aprovação")
+    if status not in APPROVAL_DECISIONS[db_item.status]:
+        await db.rollback()
+        raise ApprovalConflict("Decisão inválida para o status atual do item")
+    if _claimed_by_other(db_item, user_id, datetime.now(timezone.utc)):
+        await db.rollback()
+        raise ApprovalConflict("Item reservado por outro aprovador")
+    await _apply_status(db, db_item, status, user_id, fixed_asset_number)
     return db_item
 
-async def get_all_logs(db: AsyncSession, limit: int = 1000):
+def _filter_logs(query, item_id=None, user_id=None, branch_id=None, action=None, event_type=None,
+                 start=None, end=None, before=None):
+    if item_id:
+        query = query.where(models.Log.item_id == item_id)
+    if user_id:
+        query = query.where(models.Log.user_id == user_id)
+    if branch_id:
+        # Filial no momento do evento (origem) ou destino de uma transferência
+        query = query.where(or_(models.Log.from_branch_id == branch_id, models.Log.to_branch_id == branch_id))
+    if action:
+        query = query.where(models.Log.action.ilike(f"%{action}%"))
+    if event_type:
+        query = query.where(models.Log.event_type == event_type)
+    # Intervalo [start, end): no PostgreSQL só as partições mensais do período são lidas
+    if start:
+        query = query.where(models.Log.timestamp >= start)
+    if end:
+        query = query.where(models.Log.timestamp < end)
+    # Keyset: continua a partir do último (timestamp, id) da página anterior
+    if before:
+        query = query.where(tuple_(models.Log.timestamp, models.Log.id) < tuple_(*before))
+    return query.order_by(models.Log.timestamp.desc(), models.Log.id.desc())
+
+async def get_all_logs(db: AsyncSession, limit: int = 1000, **filters):
     query = select(models.Log).options(
-        selectinload(models.Log.user),
-        selectinload(models.Log.item)
-    ).order_by(models.Log.timestamp.desc()).limit(limit)
-    result = await db.execute(query)
+        _user_response_options(joinedload(models.Log.user)),
+        joinedload(models.Log.item).options(lazyload("*")),
+    )
+    result = await db.execute(_filter_logs(query, **filters).limit(limit))
     return result.scalars().all()
 
+async def get_logs_fingerprint(db: AsyncSession, limit: int = 1000, **filters):
+    # Logs não mudam depois de gravados: ids da página + última alteração dos itens embutidos
+    page = _filter_logs(
+        select(
+            models.Log.id,
+            func.coalesce(models.Item.updated_at, models.Item.created_at, type_=DateTime(timezone=True)).label("changed"),
+        )
+        .outerjoin(models.Item, models.Item.id == models.Log.item_id),
+        **filters
+    ).limit(limit).subquery()
+    result = await db.execute(select(
+        func.count(), func.max(page.c.id), func.sum(page.c.id), func.max(page.c.changed)
+    ))
+    return tuple(result.one())
+
+async def get_log_summaries(db: AsyncSession, limit: int = 1000, **filters):
+    # Projeção só com as colunas exibidas no histórico, sem montar usuários/filiais
+    query = (
+        select(
+            models.Log.id,
+            models.Log.timestamp,
+            models.Log.action,
+            models.Log.event_type,
+            models.Log.from_status,
+            models.Log.to_status,
+            models.Log.from_branch_id,
+            models.Log.to_branch_id,
+            models.Log.justification,
+            models.Log.item_id,
+            models.Item.description.label("item_description"),
+            models.Item.fixed_asset_number.label("item_fixed_asset_number"),
+            models.Log.user_id,
+            models.User.name.label("user_name"),
+            models.User.email.label("user_email"),
+        )
+        .outerjoin(models.Item, models.Item.id == models.Log.item_id)
+        .outerjoin(models.User, models.User.id == models.Log.user_id)
+    )
+    result = await db.execute(_filter_logs(query, **filters).limit(limit))
+    return result.mappings().all()
+
 async def request_write_off(db: AsyncSession, item_id: int, justification: str, user_id: int):
-    result = await db.execute(select(models.Item).where(models.Item.id == item_id))
-    db_item = result.scalars().first()
+    db_item = await get_item(db, item_id)
     if db_item:
+        from_status = db_item.status
         db_item.status = models.ItemStatus.WRITE_OFF_PENDING
 
-        log = models.Log(item_id=item_id, user_id=user_id, action=f"Write-off requested. Reason: {justification}")
+        log = models.Log(
+            item=db_item,
+            user=await _get_acting_user(db, user_id),
+            action=f"Write-off requested. Reason: {justification}",
+            event_type=models.LogEventType.WRITE_OFF_REQUESTED,
+            from_status=from_status,
+            to_status=db_item.status,
+            from_branch_id=db_item.branch_id,
+            justification=justification,
+        )
         db.add(log)
         await db.commit()
-
-        # Reload with relationships
-        query = select(models.Item).where(models.Item.id == item_id).options(
-            selectinload(models.Item.branch),
-            selectinload(models.Item.transfer_target_branch),
-            selectinload(models.Item.category_rel),
-            selectinload(models.Item.supplier),
-            selectinload(models.Item.responsible)
-        )
-        result = await db.execute(query)
-        db_item = result.scalars().first()
+        result_cache.invalidate()
 
     return db_item
 
 async def update_item(db: AsyncSession, item_id: int, item: schemas.ItemUpdate):
-    result = await db.execute(select(models.Item).where(models.Item.id == item_id))
-    db_item = result.scalars().first()
+    db_item = await get_item(db, item_id)
     if db_item:
         if item.description is not None:
             db_item.description = item.description
-        if item.category is not None:
-            db_item.category = item.category
-            # Update category_id
-            cat_obj = await get_category_by_name(db, item.category)
-            if cat_obj:
-                db_item.category_id = cat_obj.id
-            else:
-                 # Should we unset it if not found? Probably safe to keep existing or unset.
-                 # If category string is set but ID not found, maybe invalid category?
-                 db_item.category_id = None
+        if item.category_id is not None:
+            # Categoria atual já está carregada; db.get só consulta o banco se mudar.
+            # Id inexistente (já recusado pelo router) nunca apaga a categoria do item.
+            category = await db.get(models.Category, item.category_id)
+            if category is None:
+                raise ValueError("Categoria não encontrada")
+            db_item.category_rel = category
 
         if item.invoice_value is not None:
             db_item.invoice_value = item.invoice_value
@@ -418,53 +823,128 @@ async def update_item(db: AsyncSession, item_id: int, item: schemas.ItemUpdate):
         if item.observations is not None:
             db_item.observations = item.observations
         if item.supplier_id is not None:
-            db_item.supplier_id = item.supplier_id
+            db_item.supplier = await db.get(models.Supplier, item.supplier_id)
 
         await db.commit()
-
-        # Reload with relationships
-        query = select(models.Item).where(models.Item.id == item_id).options(
-            selectinload(models.Item.branch),
-            selectinload(models.Item.transfer_target_branch),
-            selectinload(models.Item.category_rel),
-            selectinload(models.Item.supplier),
-            selectinload(models.Item.responsible)
-        )
-        result = await db.execute(query)
-        db_item = result.scalars().first()
+        result_cache.invalidate()
 
     return db_item
 
 async def request_transfer(db: AsyncSession, item_id: int, target_branch_id: int, user_id: int):
-    result = await db.execute(select(models.Item).where(models.Item.id == item_id))
-    db_item = result.scalars().first()
+    db_item = await get_item(db, item_id)
     if db_item:
+        from_status = db_item.status
         db_item.status = models.ItemStatus.TRANSFER_PENDING
         db_item.transfer_target_branch_id = target_branch_id
 
-        # Fetch branch name for logging
-        branch_result = await db.execute(select(models.Branch).where(models.Branch.id == target_branch_id))
-        target_branch = branch_result.scalars().first()
+        # Fetch branch name for logging (identity map quando a filial já foi carregada)
+        target_branch = await db.get(models.Branch, target_branch_id)
+        if target_branch:
+            db_item.transfer_target_branch = target_branch
         branch_name = target_branch.name if target_branch else str(target_branch_id)
 
-        log = models.Log(item_id=item_id, user_id=user_id, action=f"Transfer requested to branch {branch_name}")
+        log = models.Log(
+            item=db_item,
+            user=await _get_acting_user(db, user_id),
+            action=f"Transfer requested to branch {branch_name}",
+            event_type=models.LogEventType.TRANSFER_REQUESTED,
+            from_status=from_status,
+            to_status=db_item.status,
+            from_branch_id=db_item.branch_id,
+            to_branch_id=target_branch_id,
+        )
         db.add(log)
         await db.commit()
+        result_cache.invalidate()
 
-        # Reload with relationships
-        query = select(models.Item).where(models.Item.id == item_id).options(
-            selectinload(models.Item.branch),
-            selectinload(models.Item.transfer_target_branch),
-            selectinload(models.Item.category_rel),
-            selectinload(models.Item.supplier),
-            selectinload(models.Item.responsible)
+    return db_item
+
+# Histórico (as-of)
+async def get_items_as_of(
+    db: AsyncSession,
+    at: datetime,
+    skip: int = 0,
+    limit: int = 100,
+    branch_id: int = None,
+    status: str = None,
+    scope_user_id: int = None,
+):
+    # Filial e status de cada item no instante `at`: parte da última foto em inventory_snapshots
+    # anterior a `at` e aplica só o último evento de cada item entre a foto e `at`. Itens fora
+    # da foto usam o estado anterior ao primeiro evento depois de `at` ou, sem eventos, o atual.
+    # Itens arquivados (jobs/item_archive.py) saem das fotos mas não do histórico: a consulta
+    # lê items + archived_items e logs + archived_logs.
+    Log, Item, Snapshot = _logs_with_archive(), _items_with_archive(), models.InventorySnapshot
+
+    snapshot_at = (await db.execute(
+        select(func.max(Snapshot.taken_at)).where(Snapshot.taken_at <= at)
+    )).scalar()
+
+    # Filial depois do evento: o destino quando a transferência foi aprovada
+    branch_after = case(
+        (Log.event_type == models.LogEventType.TRANSFER_APPROVED, Log.to_branch_id),
+        else_=Log.from_branch_id,
+    )
+    events = select(
+        Log.item_id,
+        Log.to_status.label("status"),
+        branch_after.label("branch_id"),
+        func.row_number().over(
+            partition_by=Log.item_id, order_by=(Log.timestamp.desc(), Log.id.desc())
+        ).label("rn"),
+    ).where(Log.event_type.isnot(None), Log.to_status.isnot(None), Log.timestamp <= at)
+    if snapshot_at:
+        events = events.where(Log.timestamp > snapshot_at)
+    events = events.subquery()
+    delta = select(events.c.item_id, events.c.status, events.c.branch_id).where(events.c.rn == 1).subquery()
+
+    snapshot = select(Snapshot.item_id, Snapshot.status, Snapshot.branch_id).where(
+        Snapshot.taken_at == snapshot_at
+    ).subquery()
+
+    # Só avaliados (COALESCE é preguiçoso) para itens sem foto nem evento na janela
+    next_event = (
+        select(Log.from_status, Log.from_branch_id)
+        .where(Log.item_id == Item.id, Log.from_status.isnot(None), Log.timestamp > at)
+        .order_by(Log.timestamp, Log.id)
+        .limit(1)
+    )
+    next_status = next_event.with_only_columns(Log.from_status).scalar_subquery()
+    next_branch = next_event.with_only_columns(Log.from_branch_id).scalar_subquery()
+
+    state = (
+        select(
+            Item.id,
+            Item.description,
+            models.Category.name.label("category"),
+            Item.fixed_asset_number,
+            func.coalesce(delta.c.status, snapshot.c.status, next_status, Item.status).label("status"),
+            func.coalesce(delta.c.branch_id, snapshot.c.branch_id, next_branch, Item.branch_id).label("branch_id"),
         )
-        result = await db.execute(query)
-        db_item = result.scalars().first()
+        .outerjoin(models.Category, models.Category.id == Item.category_id)
+        .outerjoin(delta, delta.c.item_id == Item.id)
+        .outerjoin(snapshot, snapshot.c.item_id == Item.id)
+        .where(or_(Item.created_at <= at, Item.created_at.is_(None)))
+        .subquery()
+    )
 
-    return db_item
+    query = select(state)
+    if branch_id:
+        query = query.where(state.c.branch_id == branch_id)
+    if scope_user_id is not None:
+        query = query.where(state.c.branch_id.in_(branch_scope(scope_user_id)))
+    if status:
+        query = query.where(state.c.status == status)
+
+    result = await db.execute(query.order_by(state.c.id).offset(skip).limit(limit))
+    return result.mappings().all()
 
 # Branding
+async def read_branding(db: AsyncSession):
+    # Leitura sem efeitos colaterais: sem linha ainda, devolve os valores padrão
+    db_branding = await db.get(models.Branding, 1)
+    return schemas.BrandingResponse.model_validate(db_branding) if db_branding else schemas.BrandingResponse(id=1)
+
 async def get_branding(db: AsyncSession):
     result = await db.execute(select(models.Branding).where(models.Branding.id == 1))
     db_branding = result.scalars().first()
@@ -472,6 +952,7 @@ async def get_branding(db: AsyncSession):
         # Create default branding if not exists
         db_branding = models.Branding(id=1)
         db.add(db_branding)
+        await reference_cache.bump(db, reference_cache.BRANDING)
         await db.commit()
         await db.refresh(db_branding)
     return db_branding
@@ -486,7 +967,8 @@ async def update_branding(db: AsyncSession, branding: schemas.BrandingUpdate):
         db_branding.primary_color = branding.primary_color
     if branding.primary_color_hover is not None:
         db_branding.primary_color_hover = branding.primary_color_hover
-    
+
+    await reference_cache.bump(db, reference_cache.BRANDING)
     await db.commit()
     await db.refresh(db_branding)
     return db_branding
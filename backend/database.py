@@ -1,6 +1,13 @@
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy.orm import sessionmaker, declarative_base, Session
+from fastapi import Request, Response
+from backend.metrics import instrument_engine
+from backend import slow_queries
+import hashlib
+import hmac
 import os
+import time
 
 DATABASE_URL = os.getenv("DATABASE_URL")
 if not DATABASE_URL:
@@ -11,12 +18,33 @@ if not DATABASE_URL:
     db_name = os.getenv("POSTGRES_DB", "inventory")
     DATABASE_URL = f"postgresql+asyncpg://{user}:{password}@{db_host}:5432/{db_name}"
 
+# Réplica somente leitura opcional (ex: standby do PostgreSQL ou outro arquivo SQLite).
+# Se não configurada, as leituras continuam indo para o banco principal.
+READ_DATABASE_URL = os.getenv("READ_DATABASE_URL")
+
+# Janela (em segundos) em que as leituras de um usuário continuam no banco principal
+# logo após uma escrita dele, para não ler um estado antigo da réplica.
+# Com vários workers a escrita pode ter passado por outro processo: por isso, além do
+# registro em memória (_recent_writes, por worker), a resposta da escrita leva o header
+# READ_AFTER_WRITE_HEADER (horário do commit assinado com SECRET_KEY) e o frontend o
+# reenvia; qualquer worker que receber um header válido e recente lê do principal.
+READ_AFTER_WRITE_SECONDS = float(os.getenv("READ_AFTER_WRITE_SECONDS", "5"))
+READ_AFTER_WRITE_HEADER = "X-Last-Write"
+_SIGNING_KEY = os.getenv("SECRET_KEY", "").encode()
+
 # echo=True means all SQL queries are logged to stdout
 # This should be False in production
 sql_echo_env = os.getenv("SQL_ECHO", "False").lower()
 echo_sql = sql_echo_env == "true"
 
 engine = create_async_engine(DATABASE_URL, echo=echo_sql)
+read_engine = create_async_engine(READ_DATABASE_URL, echo=echo_sql) if READ_DATABASE_URL else engine
+
+# Contagem/tempo de statements por requisição (ver backend/metrics.py)
+instrument_engine(engine.sync_engine)
+instrument_engine(read_engine.sync_engine)
+# Log de queries lentas com EXPLAIN amostrado (opt-in via SLOW_QUERY_MS)
+slow_queries.enable(engine, read_engine)
 
 SessionLocal = sessionmaker(
     bind=engine,
@@ -26,8 +54,95 @@ SessionLocal = sessionmaker(
     autoflush=False,
 )
 
+ReadSessionLocal = sessionmaker(
+    bind=read_engine,
+    class_=AsyncSession,
+    expire_on_commit=False,
+    autocommit=False,
+    autoflush=False,
+)
+
 Base = declarative_base()
 
-async def get_db():
+# Último commit de cada cliente (chave = header Authorization), em time.monotonic()
+_recent_writes: dict[str, float] = {}
+
+def _client_key(request: Request):
+    if request is None:
+        return None
+    return request.headers.get("authorization")
+
+def mark_write(key: str):
+    now = time.monotonic()
+    _recent_writes[key] = now
+    # Limpeza simples para o dicionário não crescer indefinidamente
+    if len(_recent_writes) > 10000:
+        for k, ts in list(_recent_writes.items()):
+            if now - ts > READ_AFTER_WRITE_SECONDS:
+                _recent_writes.pop(k, None)
+
+def wrote_recently(key: str) -> bool:
+    if not key:
+        return False
+    ts = _recent_writes.get(key)
+    return ts is not None and time.monotonic() - ts < READ_AFTER_WRITE_SECONDS
+
+def _signature(written_at: str, key: str) -> str:
+    # Amarrado ao token do cliente: o header de um usuário não vale para outro
+    return hmac.new(_SIGNING_KEY, f"{written_at}|{key}".encode(), hashlib.sha256).hexdigest()[:32]
+
+def write_marker(key: str) -> str:
+    # Relógio de parede (time.monotonic não vale entre processos)
+    written_at = str(int(time.time() * 1000))
+    return f"{written_at}.{_signature(written_at, key)}"
+
+def _marked_recently(request: Request) -> bool:
+    key = _client_key(request)
+    marker = request.headers.get(READ_AFTER_WRITE_HEADER) if key else None
+    if not marker:
+        return False
+    written_at, _, signature = marker.partition(".")
+    if not written_at.isdigit() or not hmac.compare_digest(signature, _signature(written_at, key)):
+        return False
+    return 0 <= time.time() - int(written_at) / 1000 < READ_AFTER_WRITE_SECONDS
+
+def read_after_write(request: Request) -> bool:
+    # O cliente escreveu há pouco, neste worker ou em outro (header READ_AFTER_WRITE_HEADER):
+    # lê do principal e não usa caches compartilhados, que podem ser anteriores à escrita
+    return wrote_recently(_client_key(request)) or _marked_recently(request)
+
+@event.listens_for(Session, "after_commit")
+def _record_write(session):
+    key = session.info.get("client_key")
+    if key:
+        mark_write(key)
+        response = session.info.get("response")
+        if response is not None:
+            response.headers[READ_AFTER_WRITE_HEADER] = write_marker(key)
+
+async def get_db(request: Request = None, response: Response = None):
     async with SessionLocal() as session:
+        key = _client_key(request)
+        if key:
+            session.info["client_key"] = key
+            session.info["response"] = response
+        yield session
+
+def session_source(session) -> str:
+    # De onde a sessão lê; entra nas chaves de cache compartilhadas entre usuários para que
+    # um resultado lido da réplica atrasada não seja servido a quem foi fixado no principal
+    if read_engine is not engine and session.bind is read_engine:
+        return "replica"
+    return "primary"
+
+async def get_read_db(request: Request = None, response: Response = None):
+    # Usa a réplica apenas quando existe uma e o cliente não escreveu há pouco
+    # (leitura "sticky" no principal para enxergar as próprias escritas), neste worker
+    # ou em outro (header READ_AFTER_WRITE_HEADER).
+    if read_engine is engine or read_after_write(request):
+        async for session in get_db(request, response):
+            yield session
+        return
+
+    async with ReadSessionLocal() as session:
         yield session
@@ -1,6 +1,7 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend import models, schemas, crud
 from backend.database import SessionLocal
+import asyncio
 import logging
 
 logging.basicConfig(level=logging.INFO)
@@ -36,3 +37,7 @@ async def init_db():
 
         except Exception as e:
             logger.error(f"Error during initial data seeding: {e}")
+
+if __name__ == "__main__":
+    # Usado pelo start.sh para semear o banco uma única vez antes de subir os workers
+    asyncio.run(init_db())
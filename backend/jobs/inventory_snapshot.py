@@ -0,0 +1,58 @@
+"""Foto periódica da filial e do status de cada item (inventory_snapshots).
+
+As consultas /items/as-of e /branches/{id}/inventory-as-of partem da última foto anterior à
+data pedida e aplicam apenas os eventos de logs posteriores a ela, sem reprocessar o log todo.
+
+Uso (cron diário ou semanal, por exemplo):
+    python -m backend.jobs.inventory_snapshot --keep 60
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timezone
+from sqlalchemy import select, insert, delete, literal, DateTime
+from backend import models
+from backend.database import engine
+
+# Quantas fotos manter (0 = todas). Consultas anteriores à foto mais antiga continuam
+# funcionando, só ficam mais caras.
+INVENTORY_SNAPSHOT_KEEP = int(os.getenv("INVENTORY_SNAPSHOT_KEEP", "0"))
+
+logger = logging.getLogger(__name__)
+
+
+async def take_snapshot(taken_at: datetime = None, keep: int = INVENTORY_SNAPSHOT_KEEP):
+    taken_at = taken_at or datetime.now(timezone.utc)
+    Snapshot, Item = models.InventorySnapshot, models.Item
+
+    async with engine.begin() as conn:
+        result = await conn.execute(
+            insert(Snapshot.__table__).from_select(
+                ["taken_at", "item_id", "branch_id", "status"],
+                select(literal(taken_at, DateTime(timezone=True)), Item.id, Item.branch_id, Item.status),
+            )
+        )
+        rows = result.rowcount
+
+        if keep:
+            oldest_kept = (await conn.execute(
+                select(Snapshot.taken_at).distinct().order_by(Snapshot.taken_at.desc()).offset(keep - 1).limit(1)
+            )).scalar()
+            if oldest_kept:
+                await conn.execute(delete(Snapshot.__table__).where(Snapshot.taken_at < oldest_kept))
+
+    logger.info(f"Foto do inventário em {taken_at.isoformat()} ({rows} itens)")
+    return {"taken_at": taken_at, "items": rows}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keep", type=int, default=INVENTORY_SNAPSHOT_KEEP, help="fotos mantidas (0 = todas)")
+    args = parser.parse_args()
+    print(asyncio.run(take_snapshot(keep=args.keep)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Move itens baixados (WRITTEN_OFF) há mais de ITEM_ARCHIVE_AFTER_DAYS para archived_items,
+junto com os seus logs (archived_logs).
+
+Listagens, buscas, dashboard e exportações continuam lendo só items/logs, que passam a
+conter apenas o conjunto vivo; /items/?include_archived=true consulta também o arquivo.
+As fotos de inventory_snapshots dos itens movidos são removidas (referenciam items); as
+consultas as-of (crud.get_items_as_of) reconstroem o estado deles a partir de archived_logs.
+
+Uso (cron diário, por exemplo):
+    python -m backend.jobs.item_archive --after-days 365
+"""
+import argparse
+import asyncio
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import select, insert, delete, func
+from backend import models
+from backend.database import engine
+
+ITEM_ARCHIVE_AFTER_DAYS = int(os.getenv("ITEM_ARCHIVE_AFTER_DAYS", "365"))
+# Itens por transação: cada lote move itens, logs e fotos e confirma
+ARCHIVE_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+
+def _copy(target, source, where):
+    # INSERT INTO target (colunas de source) SELECT ... FROM source WHERE ...
+    columns = [column.key for column in source.columns]
+    return insert(target).from_select(columns, select(*source.columns).where(where))
+
+
+async def archive_batch(conn, cutoff: datetime, batch_size: int = ARCHIVE_BATCH_SIZE):
+    Item, Log = models.Item.__table__, models.Log.__table__
+    result = await conn.execute(
+        select(Item.c.id)
+        .where(
+            Item.c.status == models.ItemStatus.WRITTEN_OFF,
+            func.coalesce(Item.c.updated_at, Item.c.created_at) < cutoff,
+        )
+        .order_by(Item.c.id)
+        .limit(batch_size)
+    )
+    ids = [row[0] for row in result.all()]
+    if not ids:
+        return 0, 0
+
+    await conn.execute(_copy(models.ArchivedItem.__table__, Item, Item.c.id.in_(ids)))
+    logs = await conn.execute(_copy(models.ArchivedLog.__table__, Log, Log.c.item_id.in_(ids)))
+    await conn.execute(delete(Log).where(Log.c.item_id.in_(ids)))
+    snapshots = models.InventorySnapshot.__table__
+    await conn.execute(delete(snapshots).where(snapshots.c.item_id.in_(ids)))
+    await conn.execute(delete(Item).where(Item.c.id.in_(ids)))
+    return len(ids), logs.rowcount
+
+
+async def run(after_days: int = ITEM_ARCHIVE_AFTER_DAYS, batch_size: int = ARCHIVE_BATCH_SIZE):
+    cutoff = datetime.now(timezone.utc) - timedelta(days=after_days)
+    items = logs = 0
+    while True:
+        async with engine.begin() as conn:
+            moved, moved_logs = await archive_batch(conn, cutoff, batch_size)
+        items += moved
+        logs += moved_logs
+        if moved:
+            logger.info(f"{moved} itens arquivados ({moved_logs} logs)")
+        if moved < batch_size:
+            return {"items": items, "logs": logs}
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--after-days", type=int, default=ITEM_ARCHIVE_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+    result = asyncio.run(run(args.after_days, args.batch_size))
+    print(f"{result['items']} itens e {result['logs']} logs arquivados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Manutenção da tabela logs: cria as partições mensais futuras e arquiva as antigas.
+
+Partições (PostgreSQL) com todos os registros anteriores ao corte de retenção são exportadas
+para CSV compactado (gzip) em LOG_ARCHIVE_DIR e depois desanexadas e removidas. Em bancos sem
+particionamento (SQLite) as linhas antigas são exportadas e apagadas.
+
+Uso (cron diário, por exemplo):
+    python -m backend.jobs.log_retention --retention-months 24 --archive-dir /app/archive/logs
+"""
+import argparse
+import asyncio
+import csv
+import gzip
+import logging
+import os
+import re
+from datetime import date, datetime, time, timezone
+from sqlalchemy import text
+from backend.database import engine
+
+LOG_RETENTION_MONTHS = int(os.getenv("LOG_RETENTION_MONTHS", "24"))
+LOG_ARCHIVE_DIR = os.getenv("LOG_ARCHIVE_DIR", "/app/archive/logs")
+PARTITION_MONTHS_AHEAD = 3
+EXPORT_BATCH_SIZE = 10_000
+
+PARTITION_NAME = re.compile(r"^logs_p(\d{4})_(\d{2})$")
+LOG_COLUMNS = [
+    "id", "item_id", "user_id", "action", "timestamp", "event_type",
+    "from_status", "to_status", "from_branch_id", "to_branch_id", "justification",
+]
+
+logger = logging.getLogger(__name__)
+
+
+def add_months(d: date, months: int) -> date:
+    month = d.month - 1 + months
+    return date(d.year + month // 12, month % 12 + 1, 1)
+
+
+async def ensure_partitions(conn, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    month = date.today().replace(day=1)
+    for _ in range(months_ahead + 1):
+        upper = add_months(month, 1)
+        try:
+            async with conn.begin_nested():
+                await conn.execute(text(
+                    f"CREATE TABLE IF NOT EXISTS logs_p{month:%Y_%m} PARTITION OF logs "
+                    f"FOR VALUES FROM ('{month.isoformat()}') TO ('{upper.isoformat()}')"
+                ))
+        except Exception as e:
+            # Acontece se a partição default já tiver linhas desse intervalo
+            logger.warning(f"Não foi possível criar a partição de {month:%Y-%m}: {e}")
+        month = upper
+
+
+async def _export(conn, table, where, params, path):
+    tmp_path = path + ".tmp"
+    rows = 0
+    last_id = 0
+    with gzip.open(tmp_path, "wt", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(LOG_COLUMNS)
+        # Lotes por id (keyset) para a partição inteira não precisar caber em memória
+        while True:
+            result = await conn.execute(text(
+                f"SELECT {', '.join(LOG_COLUMNS)} FROM {table} WHERE id > :last_id{where} "
+                f"ORDER BY id LIMIT {EXPORT_BATCH_SIZE}"
+            ), {**params, "last_id": last_id})
+            batch = result.all()
+            if not batch:
+                break
+            writer.writerows(batch)
+            rows += len(batch)
+            last_id = batch[-1][0]
+    # Só aparece com o nome final depois de completamente escrito
+    os.replace(tmp_path, path)
+    return rows
+
+
+async def archive_partitions(cutoff: date, archive_dir: str):
+    archived = []
+    async with engine.connect() as conn:
+        result = await conn.execute(text("""
+            SELECT child.relname FROM pg_inherits
+            JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+            JOIN pg_class parent ON parent.oid = pg_inherits.inhparent
+            WHERE parent.relname = 'logs'
+        """))
+        partitions = sorted(row[0] for row in result.all())
+
+    for name in partitions:
+        match = PARTITION_NAME.match(name)
+        if not match:
+            continue
+        month = date(int(match.group(1)), int(match.group(2)), 1)
+        if add_months(month, 1) > cutoff:
+            continue
+
+        # Uma transação por partição: exporta, desanexa e remove
+        async with engine.begin() as conn:
+            path = os.path.join(archive_dir, f"logs_{month:%Y_%m}.csv.gz")
+            rows = await _export(conn, name, "", {}, path)
+            await conn.execute(text(f"ALTER TABLE logs DETACH PARTITION {name}"))
+            await conn.execute(text(f"DROP TABLE {name}"))
+        logger.info(f"Partição {name} arquivada em {path} ({rows} registros)")
+        archived.append({"partition": name, "file": path, "rows": rows})
+    return archived
+
+
+async def archive_rows(cutoff: date, archive_dir: str):
+    # Sem particionamento: exporta e apaga as linhas anteriores ao corte
+    cutoff_ts = datetime.combine(cutoff, time.min, tzinfo=timezone.utc)
+    path = os.path.join(archive_dir, f"logs_before_{cutoff:%Y_%m}.csv.gz")
+    async with engine.begin() as conn:
+        rows = await _export(conn, "logs", " AND timestamp < :cutoff", {"cutoff": cutoff_ts}, path)
+        if rows:
+            await conn.execute(text("DELETE FROM logs WHERE timestamp < :cutoff"), {"cutoff": cutoff_ts})
+        else:
+            os.remove(path)
+    return [{"partition": None, "file": path, "rows": rows}] if rows else []
+
+
+async def run(retention_months: int = LOG_RETENTION_MONTHS, archive_dir: str = LOG_ARCHIVE_DIR):
+    os.makedirs(archive_dir, exist_ok=True)
+    cutoff = add_months(date.today().replace(day=1), -retention_months)
+
+    if engine.dialect.name != "postgresql":
+        return await archive_rows(cutoff, archive_dir)
+
+    async with engine.begin() as conn:
+        await ensure_partitions(conn)
+    return await archive_partitions(cutoff, archive_dir)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retention-months", type=int, default=LOG_RETENTION_MONTHS)
+    parser.add_argument("--archive-dir", default=LOG_ARCHIVE_DIR)
+    args = parser.parse_args()
+    archived = asyncio.run(run(args.retention_months, args.archive_dir))
+    print(f"{len(archived)} lote(s) arquivado(s), {sum(a['rows'] for a in archived)} registros")
+
+
+if __name__ == "__main__":
+    main()
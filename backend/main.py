@@ -16,14 +16,19 @@ if not hasattr(bcrypt, '__about__'):
     except Exception:
         pass
 
-from backend.routers import auth, users, items, dashboard, reports, branches, categories, logs, suppliers, branding
+from backend.routers import auth, users, items, approvals, dashboard, reports, branches, categories, logs, suppliers, branding, metrics as metrics_router
 from backend.initial_data import init_db
 from backend.websocket_manager import manager
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
-from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
+from backend.metrics import InstrumentedRoute, MetricsMiddleware
+from backend.compression import CompressionMiddleware
+from backend.admission import AdmissionMiddleware
+
+# Com vários workers o seed inicial roda uma única vez no start.sh (antes do uvicorn),
+# e cada worker sobe com SEED_ON_STARTUP=false para não repetir as consultas/escritas.
+SEED_ON_STARTUP = os.getenv("SEED_ON_STARTUP", "true").lower() == "true"
 
 app = FastAPI(title="Inventory Management API")
+app.router.route_class = InstrumentedRoute
 
 @app.on_event("startup")
 async def on_startup():
@@ -37,6 +42,9 @@ async def on_startup():
         # Se falhar mapper, não adianta continuar muito, mas vamos tentar
         pass
 
+    if not SEED_ON_STARTUP:
+        return
+
     try:
         await init_db()
     except Exception as e:
@@ -47,6 +55,11 @@ async def on_startup():
 async def health_check():
     return {"status": "ok", "message": "Server is running"}
 
+# Orçamento de concorrência por classe de rota (exportações/listagens grandes x rotas
+# interativas), com fila justa por usuário e 429 + Retry-After quando saturado.
+# Registrado antes do CORS para ficar dentro dele: o 429 também leva os headers de CORS.
+app.add_middleware(AdmissionMiddleware)
+
 # Configuração do CORS
 # Permitir tudo (Wildcard) para evitar bloqueios em LAN/Docker
 # Quando allow_credentials=True, não pode usar allow_origins=["*"].
@@ -60,6 +73,13 @@ app.add_middleware(
     expose_headers=["*"],
 )
 
+# gzip/brotli acima de COMPRESSION_MIN_SIZE; dentro do MetricsMiddleware para o tempo de
+# compressão entrar na fase de serialização
+app.add_middleware(CompressionMiddleware)
+
+# Latência, nº de queries, tempo de banco e serialização por rota (/metrics e Server-Timing)
+app.add_middleware(MetricsMiddleware)
+
 # Servir arquivos estáticos (uploads)
 UPLOAD_DIR = "/app/uploads"
 if not os.path.exists(UPLOAD_DIR):
@@ -79,6 +99,7 @@ async def websocket_endpoint(websocket: WebSocket):
 app.include_router(auth.router)
 app.include_router(users.router)
 app.include_router(items.router)
+app.include_router(approvals.router)
 app.include_router(dashboard.router)
 app.include_router(reports.router)
 app.include_router(branches.router)
@@ -86,6 +107,7 @@ app.include_router(categories.router)
 app.include_router(logs.router)
 app.include_router(suppliers.router)
 app.include_router(branding.router)
+app.include_router(metrics_router.router)
 
 @app.get("/")
 async def read_root():
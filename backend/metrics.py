@@ -0,0 +1,250 @@
+import asyncio
+import contextvars
+import functools
+import time
+from fastapi.routing import APIRoute
+from sqlalchemy import event
+from sqlalchemy.engine.default import CACHE_HIT, CACHE_MISS, CACHING_DISABLED, NO_CACHE_KEY, NO_DIALECT_SUPPORT
+from backend import admission, result_cache
+
+# Métricas por rota (latência, nº de statements SQL, tempo de banco, linhas e serialização).
+# Ficam em memória no processo: com vários workers, cada um expõe os próprios contadores.
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 250)
+COMPILED_CACHE_OUTCOMES = {
+    CACHE_HIT: "hit",
+    CACHE_MISS: "miss",
+    CACHING_DISABLED: "disabled",
+    NO_CACHE_KEY: "no_key",
+    NO_DIALECT_SUPPORT: "no_dialect_support",
+}
+
+
+class RequestMetrics:
+    __slots__ = ("scope", "started", "db_statements", "db_time", "db_rows", "db_compiled_cache", "endpoint_done")
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.started = time.perf_counter()
+        self.db_statements = 0
+        self.db_time = 0.0
+        self.db_rows = 0
+        # Resultado do compiled_cache do SQLAlchemy por statement (hit, miss, ...)
+        self.db_compiled_cache = {}
+        self.endpoint_done = None
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.sum += value
+        self.count += 1
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class RouteStats:
+    def __init__(self):
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.statements = Histogram(STATEMENT_BUCKETS)
+        self.db_time = 0.0
+        self.db_rows = 0
+        self.serialization_time = 0.0
+        self.compiled_cache = {}
+        self.responses = {}
+
+
+_current = contextvars.ContextVar("request_metrics", default=None)
+_routes: dict[tuple[str, str], RouteStats] = {}
+
+
+def current_request_metrics():
+    return _current.get()
+
+
+def current_route(scope):
+    route = scope.get("route")
+    return getattr(route, "path", None) or "unmatched"
+
+
+# SQLAlchemy
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.db_statements += 1
+    stats.db_time += elapsed
+    # rowcount é informado pelo asyncpg também para SELECT; -1 quando o driver não sabe
+    if cursor.rowcount and cursor.rowcount > 0:
+        stats.db_rows += cursor.rowcount
+    # Só existe para statements compilados (não para SQL textual do driver)
+    cache_hit = getattr(context, "cache_hit", None)
+    if cache_hit is not None:
+        outcome = COMPILED_CACHE_OUTCOMES.get(cache_hit, "other")
+        stats.db_compiled_cache[outcome] = stats.db_compiled_cache.get(outcome, 0) + 1
+
+
+def instrument_engine(sync_engine):
+    if not event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+# FastAPI
+class InstrumentedRoute(APIRoute):
+    """APIRoute que marca o fim do endpoint, separando o tempo de serialização da resposta."""
+
+    def __init__(self, path, endpoint, **kwargs):
+        if asyncio.iscoroutinefunction(endpoint):
+            original = endpoint
+
+            @functools.wraps(original)
+            async def endpoint(*args, **kw):
+                try:
+                    return await original(*args, **kw)
+                finally:
+                    stats = _current.get()
+                    if stats is not None:
+                        stats.endpoint_done = time.perf_counter()
+
+        super().__init__(path, endpoint, **kwargs)
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestMetrics(scope)
+        token = _current.set(stats)
+        status_code = 500
+        serialization = 0.0
+
+        async def send_wrapper(message):
+            nonlocal status_code, serialization
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                now = time.perf_counter()
+                if stats.endpoint_done is not None:
+                    serialization = now - stats.endpoint_done
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(stats, now, serialization).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            record(scope.get("method", "GET"), current_route(scope), status_code, stats, serialization)
+
+
+def server_timing(stats, now, serialization):
+    total_ms = (now - stats.started) * 1000
+    return (
+        f'app;dur={total_ms:.1f}, '
+        f'db;dur={stats.db_time * 1000:.1f};desc="{stats.db_statements} queries", '
+        f'ser;dur={serialization * 1000:.1f}'
+    )
+
+
+def record(method, route, status_code, stats, serialization):
+    route_stats = _routes.get((method, route))
+    if route_stats is None:
+        route_stats = _routes[(method, route)] = RouteStats()
+    route_stats.latency.observe(time.perf_counter() - stats.started)
+    route_stats.statements.observe(stats.db_statements)
+    route_stats.db_time += stats.db_time
+    route_stats.db_rows += stats.db_rows
+    route_stats.serialization_time += serialization
+    for outcome, count in stats.db_compiled_cache.items():
+        route_stats.compiled_cache[outcome] = route_stats.compiled_cache.get(outcome, 0) + count
+    route_stats.responses[status_code] = route_stats.responses.get(status_code, 0) + 1
+
+
+# Prometheus (formato texto 0.0.4)
+def _labels(method, route, **extra):
+    labels = {"method": method, "route": route, **extra}
+    return ",".join(f'{k}="{v}"' for k, v in labels.items())
+
+
+def _render_histogram(lines, name, histogram, method, route):
+    for bound, count in zip(histogram.buckets, histogram.counts):
+        lines.append(f"{name}_bucket{{{_labels(method, route, le=bound)}}} {count}")
+    lines.append(f"{name}_bucket{{{_labels(method, route, le='+Inf')}}} {histogram.count}")
+    lines.append(f"{name}_sum{{{_labels(method, route)}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{_labels(method, route)}}} {histogram.count}")
+
+
+def render_prometheus():
+    lines = []
+    series = sorted(_routes.items())
+
+    lines.append("# HELP http_request_duration_seconds Latência das requisições por rota.")
+    lines.append("# TYPE http_request_duration_seconds histogram")
+    for (method, route), stats in series:
+        _render_histogram(lines, "http_request_duration_seconds", stats.latency, method, route)
+
+    lines.append("# HELP http_requests_total Requisições por rota e status.")
+    lines.append("# TYPE http_requests_total counter")
+    for (method, route), stats in series:
+        for status_code, count in sorted(stats.responses.items()):
+            lines.append(f"http_requests_total{{{_labels(method, route, status=status_code)}}} {count}")
+
+    lines.append("# HELP db_statements_per_request Statements SQL executados por requisição.")
+    lines.append("# TYPE db_statements_per_request histogram")
+    for (method, route), stats in series:
+        _render_histogram(lines, "db_statements_per_request", stats.statements, method, route)
+
+    lines.append("# HELP db_compiled_cache_total Statements por resultado no cache de compilação do SQLAlchemy.")
+    lines.append("# TYPE db_compiled_cache_total counter")
+    for (method, route), stats in series:
+        for outcome, count in sorted(stats.compiled_cache.items()):
+            lines.append(f"db_compiled_cache_total{{{_labels(method, route, result=outcome)}}} {count}")
+
+    lines.append("# HELP result_cache_requests_total Leituras do result_cache: hit, merge (esperou a execução em andamento), miss ou bypass (cliente com escrita recente).")
+    lines.append("# TYPE result_cache_requests_total counter")
+    for (endpoint, outcome), count in sorted(result_cache.stats.items()):
+        lines.append(f'result_cache_requests_total{{endpoint="{endpoint}",result="{outcome}"}} {count}')
+
+    controller = admission.controller
+    lines.append("# HELP admission_requests_total Requisições por classe de custo: admitted, queued (esperou na fila) ou rejected (429).")
+    lines.append("# TYPE admission_requests_total counter")
+    for (request_class, outcome), count in sorted(controller.stats.items()):
+        lines.append(f'admission_requests_total{{class="{request_class}",result="{outcome}"}} {count}')
+    lines.append("# HELP admission_in_use Orçamento de concorrência em uso.")
+    lines.append("# TYPE admission_in_use gauge")
+    lines.append(f"admission_in_use {controller.in_use}")
+    lines.append("# HELP admission_queue_length Requisições esperando na fila de admissão.")
+    lines.append("# TYPE admission_queue_length gauge")
+    lines.append(f"admission_queue_length {controller.queued}")
+
+    counters = (
+        ("db_time_seconds_total", "Tempo gasto no banco por rota.", "db_time"),
+        ("db_rows_total", "Linhas retornadas/afetadas pelo banco por rota.", "db_rows"),
+        ("serialization_seconds_total", "Tempo de serialização da resposta por rota.", "serialization_time"),
+    )
+    for name, help_text, attr in counters:
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for (method, route), stats in series:
+            lines.append(f"{name}{{{_labels(method, route)}}} {getattr(stats, attr)}")
+
+    return "\n".join(lines) + "\n"
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, Enum, Table
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, Enum, Table, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 import enum
@@ -10,6 +10,8 @@ user_branches = Table(
     Base.metadata,
     Column("user_id", Integer, ForeignKey("users.id"), primary_key=True),
     Column("branch_id", Integer, ForeignKey("branches.id"), primary_key=True),
+    # A PK (user_id, branch_id) não serve para "usuários da filial X"
+    Index("ix_user_branches_branch_id", "branch_id"),
     extend_existing=True
 )
 
@@ -27,6 +29,16 @@ class ItemStatus(str, enum.Enum):
     WRITE_OFF_PENDING = "WRITE_OFF_PENDING"
     WRITTEN_OFF = "WRITTEN_OFF"
 
+class LogEventType(str, enum.Enum):
+    ITEM_CREATED = "ITEM_CREATED"
+    STATUS_CHANGED = "STATUS_CHANGED"
+    TRANSFER_REQUESTED = "TRANSFER_REQUESTED"
+    TRANSFER_APPROVED = "TRANSFER_APPROVED"
+    TRANSFER_REJECTED = "TRANSFER_REJECTED"
+    WRITE_OFF_REQUESTED = "WRITE_OFF_REQUESTED"
+    WRITE_OFF_APPROVED = "WRITE_OFF_APPROVED"
+    WRITE_OFF_REJECTED = "WRITE_OFF_REJECTED"
+
 class Branch(Base):
     __tablename__ = "branches"
     __table_args__ = {'extend_existing': True}
@@ -36,11 +48,14 @@ class Branch(Base):
     address = Column(String)
     cnpj = Column(String, nullable=True)
 
+    # Coleções "reversas" (itens e usuários da filial) não são serializadas em nenhuma resposta.
+    # Ficam com o lazy padrão: com lazy="selectin" cada filial carregada puxava todos os seus
+    # itens e usuários (e, em cascata, os relacionamentos deles).
     # Nota: foreign_keys como string lista para evitar erro de inicialização
-    items = relationship("Item", foreign_keys="[Item.branch_id]", back_populates="branch", lazy="selectin")
+    items = relationship("Item", foreign_keys="[Item.branch_id]", back_populates="branch")
     # Restaurado nome users_legacy para tentar compatibilidade com cache teimoso, mas definindo antes de User
-    users_legacy = relationship("User", back_populates="branch", lazy="selectin")
-    users = relationship("User", secondary=user_branches, back_populates="branches", lazy="selectin")
+    users_legacy = relationship("User", back_populates="branch")
+    users = relationship("User", secondary=user_branches, back_populates="branches")
 
 class User(Base):
     __tablename__ = "users"
@@ -53,7 +68,7 @@ class User(Base):
     role = Column(Enum(UserRole), default=UserRole.OPERATOR)
     all_branches = Column(Boolean, default=False)
     # branch_id mantido para compatibilidade
-    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True, index=True)
 
     # Relacionamento legado (Many-to-One)
     branch = relationship("Branch", back_populates="users_legacy")
@@ -61,7 +76,7 @@ class User(Base):
     branches = relationship("Branch", secondary=user_branches, back_populates="users", lazy="selectin")
 
     logs = relationship("Log", back_populates="user")
-    items_responsible = relationship("Item", back_populates="responsible")
+    items_responsible = relationship("Item", foreign_keys="Item.responsible_id", back_populates="responsible")
 
 class Category(Base):
     __tablename__ = "categories"
@@ -71,7 +86,8 @@ class Category(Base):
     name = Column(String, index=True, unique=True)
     depreciation_months = Column(Integer, nullable=True)
 
-    items = relationship("Item", back_populates="category_rel", lazy="selectin")
+    # Sem lazy="selectin": carregar uma categoria não deve carregar todos os itens dela
+    items = relationship("Item", back_populates="category_rel")
 
 class Supplier(Base):
     __tablename__ = "suppliers"
@@ -81,51 +97,153 @@ class Supplier(Base):
     name = Column(String, index=True)
     cnpj = Column(String, unique=True, index=True)
 
-    items = relationship("Item", back_populates="supplier", lazy="selectin")
+    items = relationship("Item", back_populates="supplier")
 
 class Item(Base):
     __tablename__ = "items"
-    __table_args__ = {'extend_existing': True}
+    __table_args__ = (
+        # Dashboard (contagens por status, com ou sem escopo de filiais) e filtros de /items/
+        Index("ix_items_status_branch_id", "status", "branch_id"),
+        # Ordenações de /items/ (sort=) e keyset por (coluna, id)
+        Index("ix_items_description_id", "description", "id"),
+        Index("ix_items_purchase_date_id", "purchase_date", "id"),
+        Index("ix_items_invoice_value_id", "invoice_value", "id"),
+        Index("ix_items_status_id", "status", "id"),
+        # Quase sempre nulo: só os itens com transferência pendente entram no índice
+        Index(
+            "ix_items_transfer_target_branch_id", "transfer_target_branch_id",
+            postgresql_where=text("transfer_target_branch_id IS NOT NULL"),
+            sqlite_where=text("transfer_target_branch_id IS NOT NULL"),
+        ),
+        {'extend_existing': True},
+    )
+    # Busca created_at/updated_at via RETURNING no próprio INSERT/UPDATE,
+    # evitando um SELECT extra (ou MissingGreenlet) após o commit
+    __mapper_args__ = {"eager_defaults": True}
 
     id = Column(Integer, primary_key=True, index=True)
-    description = Column(String, index=True)
-    category = Column(String, index=True)
-    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    description = Column(String)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True, index=True)
     purchase_date = Column(DateTime)
     invoice_value = Column(Float)
     invoice_number = Column(String, index=True)
     invoice_file = Column(String, nullable=True)
     serial_number = Column(String, index=True, nullable=True)
     fixed_asset_number = Column(String, index=True, nullable=True)
-    supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=True)
-    branch_id = Column(Integer, ForeignKey("branches.id"))
+    supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=True, index=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), index=True)
     transfer_target_branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True)
-    responsible_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    responsible_id = Column(Integer, ForeignKey("users.id"), nullable=True, index=True)
     status = Column(Enum(ItemStatus), default=ItemStatus.PENDING)
     observations = Column(Text, nullable=True)
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Fila de aprovação (/approvals): aprovador que reservou o item e até quando.
+    # Reserva vencida vale como livre; a decisão limpa as duas colunas.
+    claimed_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    claim_expires_at = Column(DateTime(timezone=True), nullable=True)
 
     branch = relationship("Branch", foreign_keys=[branch_id], back_populates="items", lazy="selectin")
     transfer_target_branch = relationship("Branch", foreign_keys=[transfer_target_branch_id], lazy="selectin")
     category_rel = relationship("Category", back_populates="items", lazy="selectin")
     supplier = relationship("Supplier", back_populates="items", lazy="selectin")
-    responsible = relationship("User", back_populates="items_responsible", lazy="selectin")
+    responsible = relationship("User", foreign_keys=[responsible_id], back_populates="items_responsible", lazy="selectin")
     logs = relationship("Log", back_populates="item", lazy="selectin")
 
+    @property
+    def category(self):
+        # Nome da categoria; a coluna texto foi substituída por category_id
+        return self.category_rel.name if self.category_rel is not None else None
+
 class Log(Base):
     __tablename__ = "logs"
-    __table_args__ = {'extend_existing': True}
+    # No PostgreSQL a tabela é particionada por mês em timestamp (ver migração a3c5e7f9b1d2)
+    __table_args__ = (
+        Index("ix_logs_timestamp", "timestamp"),
+        Index("ix_logs_item_id_timestamp", "item_id", "timestamp"),
+        Index("ix_logs_user_id_timestamp", "user_id", "timestamp"),
+        Index("ix_logs_event_type_timestamp", "event_type", "timestamp"),
+        Index("ix_logs_from_branch_id_timestamp", "from_branch_id", "timestamp"),
+        Index("ix_logs_to_branch_id_timestamp", "to_branch_id", "timestamp"),
+        {'extend_existing': True},
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     item_id = Column(Integer, ForeignKey("items.id"))
     user_id = Column(Integer, ForeignKey("users.id"))
     action = Column(String)
     timestamp = Column(DateTime(timezone=True), server_default=func.now())
+    # Evento estruturado; `action` continua como texto legível para a interface
+    event_type = Column(Enum(LogEventType), nullable=True)
+    from_status = Column(Enum(ItemStatus), nullable=True)
+    to_status = Column(Enum(ItemStatus), nullable=True)
+    # Filial do item no momento do evento / filial de destino (transferências)
+    from_branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True)
+    to_branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True)
+    justification = Column(Text, nullable=True)
 
     item = relationship("Item", back_populates="logs", lazy="selectin")
     user = relationship("User", back_populates="logs", lazy="selectin")
 
+class InventorySnapshot(Base):
+    # Foto periódica de filial/status de cada item (backend/jobs/inventory_snapshot.py).
+    # Consultas "as-of" partem da última foto e aplicam só os eventos de logs posteriores.
+    __tablename__ = "inventory_snapshots"
+    __table_args__ = (
+        Index("ix_inventory_snapshots_taken_at_branch_id", "taken_at", "branch_id"),
+        {'extend_existing': True},
+    )
+
+    taken_at = Column(DateTime(timezone=True), primary_key=True)
+    item_id = Column(Integer, ForeignKey("items.id"), primary_key=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"))
+    status = Column(Enum(ItemStatus))
+
+class ArchivedItem(Base):
+    # Itens baixados há mais de ITEM_ARCHIVE_AFTER_DAYS, movidos de items pelo
+    # backend/jobs/item_archive.py. Mesmas colunas (e ids) de items; só
+    # /items/?include_archived=true consulta esta tabela.
+    __tablename__ = "archived_items"
+    __table_args__ = {'extend_existing': True}
+
+    id = Column(Integer, primary_key=True)
+    description = Column(String)
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=True)
+    purchase_date = Column(DateTime)
+    invoice_value = Column(Float)
+    invoice_number = Column(String)
+    invoice_file = Column(String, nullable=True)
+    serial_number = Column(String, nullable=True)
+    fixed_asset_number = Column(String, nullable=True)
+    supplier_id = Column(Integer, ForeignKey("suppliers.id"), nullable=True)
+    branch_id = Column(Integer, ForeignKey("branches.id"), index=True)
+    transfer_target_branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True)
+    responsible_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    status = Column(Enum(ItemStatus))
+    observations = Column(Text, nullable=True)
+    created_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True))
+    claimed_by_id = Column(Integer, ForeignKey("users.id"), nullable=True)
+    claim_expires_at = Column(DateTime(timezone=True), nullable=True)
+    archived_at = Column(DateTime(timezone=True), server_default=func.now())
+
+class ArchivedLog(Base):
+    # Logs dos itens arquivados, movidos junto com eles
+    __tablename__ = "archived_logs"
+    __table_args__ = {'extend_existing': True}
+
+    id = Column(Integer, primary_key=True)
+    item_id = Column(Integer, ForeignKey("archived_items.id"), index=True)
+    user_id = Column(Integer, ForeignKey("users.id"))
+    action = Column(String)
+    timestamp = Column(DateTime(timezone=True))
+    event_type = Column(Enum(LogEventType), nullable=True)
+    from_status = Column(Enum(ItemStatus), nullable=True)
+    to_status = Column(Enum(ItemStatus), nullable=True)
+    from_branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True)
+    to_branch_id = Column(Integer, ForeignKey("branches.id"), nullable=True)
+    justification = Column(Text, nullable=True)
+
 class Branding(Base):
     __tablename__ = "branding"
     __table_args__ = {'extend_existing': True}
@@ -135,3 +253,14 @@ class Branding(Base):
     logo_url = Column(Text, nullable=True)
     primary_color = Column(String, default="#2563eb")
     primary_color_hover = Column(String, default="#1d4ed8")
+
+class ReferenceVersion(Base):
+    # Versão de cada tabela de referência (branches, categories, suppliers, branding).
+    # Incrementada na mesma transação da escrita; os workers consultam esta tabela
+    # para invalidar o cache em memória (ver backend/reference_cache.py).
+    __tablename__ = "reference_versions"
+    __table_args__ = {'extend_existing': True}
+
+    name = Column(String, primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -0,0 +1,89 @@
+import hashlib
+import os
+import time
+from datetime import datetime
+from fastapi import Request, Response
+from sqlalchemy import select, func
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend import models, conditional
+
+# Cache em memória das tabelas de referência (filiais, categorias, fornecedores, branding).
+# Cada entrada guarda a versão da tabela com que foi carregada; as escritas incrementam a
+# versão em reference_versions na mesma transação. Cada worker relê as versões no máximo
+# a cada REFERENCE_CACHE_TTL segundos, então uma escrita em outro worker aparece em até TTL.
+REFERENCE_CACHE_TTL = float(os.getenv("REFERENCE_CACHE_TTL", "2"))
+MAX_ENTRIES = 1000
+
+BRANCHES = "branches"
+CATEGORIES = "categories"
+SUPPLIERS = "suppliers"
+BRANDING = "branding"
+# Sem cache próprio: a versão só entra nos ETags de /users/ e das listas que embutem usuários
+USERS = "users"
+
+# INSERT ... ON CONFLICT de cada dialeto suportado (PostgreSQL em produção, SQLite nos testes)
+_UPSERT = {"postgresql": postgresql.insert, "sqlite": sqlite.insert}
+
+_versions: dict[str, tuple[int, datetime]] = {}
+_last_poll = 0.0
+_entries: dict[tuple, tuple[int, object]] = {}
+
+
+def clear():
+    global _last_poll
+    _versions.clear()
+    _entries.clear()
+    _last_poll = 0.0
+
+
+async def current_versions(db: AsyncSession):
+    global _last_poll
+    now = time.monotonic()
+    if now - _last_poll >= REFERENCE_CACHE_TTL:
+        result = await db.execute(select(
+            models.ReferenceVersion.name, models.ReferenceVersion.version, models.ReferenceVersion.updated_at
+        ))
+        _versions.clear()
+        _versions.update({name: (version, updated_at) for name, version, updated_at in result.all()})
+        _last_poll = now
+    return _versions
+
+
+async def version_of(db: AsyncSession, name: str):
+    # Tabela sem linha em reference_versions (ex: banco criado sem a migração) = versão 0
+    return (await current_versions(db)).get(name, (0, None))
+
+
+async def get_or_load(db: AsyncSession, name: str, key, loader):
+    version, _ = await version_of(db, name)
+    entry = _entries.get((name, key))
+    if entry is not None and entry[0] == version:
+        return entry[1]
+
+    value = await loader()
+    if len(_entries) >= MAX_ENTRIES:
+        _entries.clear()
+    _entries[(name, key)] = (version, value)
+    return value
+
+
+async def bump(db: AsyncSession, name: str):
+    # Chamado pelo crud antes do commit da escrita
+    global _last_poll
+    # Um único upsert: dois primeiros bumps simultâneos (sem linha ainda) não colidem na PK
+    table = models.ReferenceVersion
+    statement = _UPSERT[db.bind.dialect.name](table).values(name=name, version=1, updated_at=func.now())
+    await db.execute(statement.on_conflict_do_update(
+        index_elements=[table.name],
+        set_={"version": table.version + 1, "updated_at": func.now()},
+    ))
+    # Este worker relê as versões na próxima requisição
+    _last_poll = 0.0
+
+
+async def not_modified(request: Request, response: Response, db: AsyncSession, name: str, *vary):
+    # `vary` entra no ETag: parâmetros da consulta e o que mais mudar o conteúdo (ex: escopo do usuário)
+    version, updated_at = await version_of(db, name)
+    digest = hashlib.sha1(repr(vary).encode("utf-8")).hexdigest()[:10]
+    return conditional.not_modified(request, response, f'W/"{name}-{version}-{digest}"', updated_at)
@@ -0,0 +1,99 @@
+import asyncio
+import os
+import time
+
+# Single-flight + cache curto de resultados de leitura (/dashboard/stats, /items/).
+# A chave é (endpoint, origem da leitura, parâmetros normalizados, escopo): usuários que
+# enxergam as mesmas filiais compartilham a entrada, mas leituras da réplica e do principal
+# (read-after-write, ver database.session_source) nunca. Requisições idênticas
+# simultâneas esperam a execução já em andamento (merge) em vez de repetir as consultas;
+# o resultado fica RESULT_CACHE_TTL segundos. Mutações de itens (crud) chamam invalidate() depois do commit.
+# O cache é por worker: escritas feitas em outro worker (ou pelos jobs) aparecem em até TTL,
+# exceto para quem as fez: com read-after-write ativo (database.read_after_write) o router
+# passa bypass=True e a requisição consulta o banco sem ler nem gravar o cache.
+RESULT_CACHE_TTL = float(os.getenv("RESULT_CACHE_TTL", "2"))
+MAX_ENTRIES = 1000
+
+_entries: dict[tuple, tuple[float, object]] = {}
+_inflight: dict[tuple, asyncio.Future] = {}
+_generation = 0
+# (endpoint, "hit" | "merge" | "miss" | "bypass") -> contagem, exportado em /metrics
+stats: dict[tuple[str, str], int] = {}
+
+
+def clear():
+    _entries.clear()
+    _inflight.clear()
+    stats.clear()
+
+
+def invalidate():
+    global _generation
+    # Execuções já em andamento ainda respondem quem está esperando por elas, mas não
+    # guardam o resultado nem recebem requisições novas
+    _generation += 1
+    _entries.clear()
+    _inflight.clear()
+
+
+def branch_scope_key(user):
+    # Mesmas filiais visíveis (user_branches + branch_id legado) = mesmos dados
+    branch_ids = {branch.id for branch in user.branches}
+    if user.branch_id:
+        branch_ids.add(user.branch_id)
+    return tuple(sorted(branch_ids))
+
+
+def _count(endpoint: str, outcome: str):
+    stats[(endpoint, outcome)] = stats.get((endpoint, outcome), 0) + 1
+
+
+async def get_or_compute(endpoint: str, key, compute, bypass: bool = False):
+    if RESULT_CACHE_TTL <= 0:
+        return await compute()
+    if bypass:
+        _count(endpoint, "bypass")
+        return await compute()
+
+    cache_key = (endpoint, key)
+    entry = _entries.get(cache_key)
+    if entry is not None and entry[0] > time.monotonic():
+        _count(endpoint, "hit")
+        return entry[1]
+
+    pending = _inflight.get(cache_key)
+    if pending is not None:
+        _count(endpoint, "merge")
+        try:
+            # shield: cancelar quem espera não cancela a execução compartilhada
+            return await asyncio.shield(pending)
+        except asyncio.CancelledError:
+            if not pending.cancelled():
+                raise
+        # A requisição que executava foi cancelada (cliente desconectou): executa de novo
+        return await get_or_compute(endpoint, key, compute)
+
+    _count(endpoint, "miss")
+    generation = _generation
+    future = asyncio.get_running_loop().create_future()
+    _inflight[cache_key] = future
+    try:
+        value = await compute()
+    except asyncio.CancelledError:
+        future.cancel()
+        raise
+    except Exception as exc:
+        future.set_exception(exc)
+        # Sem ninguém esperando, evita o aviso "exception was never retrieved"
+        future.exception()
+        raise
+    finally:
+        if _inflight.get(cache_key) is future:
+            del _inflight[cache_key]
+
+    future.set_result(value)
+    if generation == _generation:
+        if len(_entries) >= MAX_ENTRIES:
+            _entries.clear()
+        _entries[cache_key] = (time.monotonic() + RESULT_CACHE_TTL, value)
+    return value
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+import os
+from backend import models, crud, auth, schemas
+from backend.database import get_db
+from backend.metrics import InstrumentedRoute
+
+router = APIRouter(prefix="/approvals", tags=["approvals"], route_class=InstrumentedRoute)
+
+# Fila de aprovação para vários aprovadores: cada um reserva um lote (FOR UPDATE SKIP
+# LOCKED), decide os itens reservados e a reserva vence sozinha depois de
+# APPROVAL_LEASE_SECONDS (aprovador que fechou a tela não prende os itens).
+APPROVAL_LEASE_SECONDS = int(os.getenv("APPROVAL_LEASE_SECONDS", "300"))
+APPROVAL_BATCH_MAX = 100
+
+def require_approver(current_user: models.User = Depends(auth.get_current_user)):
+    if current_user.role not in [models.UserRole.ADMIN, models.UserRole.APPROVER]:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Não autorizado a aprovar/rejeitar itens")
+    return current_user
+
+@router.post("/claim", response_model=schemas.ApprovalBatch)
+async def claim_approvals(
+    limit: int = 20,
+    status_filter: Optional[schemas.ItemStatus] = Query(None, alias="status"),
+    branch_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(require_approver)
+):
+    if status_filter is not None and status_filter not in crud.APPROVAL_STATUSES:
+        raise HTTPException(status_code=400, detail="Status fora da fila de aprovação")
+    # Chamar de novo renova a reserva dos itens ainda não decididos e completa o lote
+    items, expires = await crud.claim_approvals(
+        db, current_user.id, max(1, min(limit, APPROVAL_BATCH_MAX)), APPROVAL_LEASE_SECONDS,
+        status=status_filter, branch_id=branch_id
+    )
+    return {"claim_expires_at": expires, "items": items}
+
+@router.post("/release", response_model=schemas.ApprovalRelease)
+async def release_approvals(
+    item_ids: Optional[List[int]] = Query(None),
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(require_approver)
+):
+    # Devolve à fila os itens indicados (ou todos os reservados por este aprovador)
+    return {"released": await crud.release_approvals(db, current_user.id, item_ids)}
+
+@router.post("/{item_id}/decision", response_model=schemas.ItemResponse)
+async def decide_approval(
+    item_id: int,
+    status_update: schemas.ItemStatus,
+    fixed_asset_number: Optional[str] = None,
+    db: AsyncSession = Depends(get_db),
+    current_user: models.User = Depends(require_approver)
+):
+    try:
+        item = await crud.decide_approval(db, item_id, status_update, current_user.id, fixed_asset_number)
+    except crud.ApprovalConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
+    if not item:
+        raise HTTPException(status_code=404, detail="Item não encontrado")
+
+    from backend.websocket_manager import manager
+    await manager.broadcast(f"Item {item.description} status changed to {status_update}")
+
+    return item
@@ -4,10 +4,11 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend import schemas, models, auth, crud
 from backend.database import get_db
+from backend.metrics import InstrumentedRoute
 from sqlalchemy.future import select
 from sqlalchemy import func
 
-router = APIRouter()
+router = APIRouter(route_class=InstrumentedRoute)
 
 @router.post("/token", response_model=schemas.Token)
 async def login_for_access_token(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_db)):
@@ -1,32 +1,67 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import List, Optional
+from datetime import datetime
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend import schemas, crud, auth, models
-from backend.database import get_db
+from backend import schemas, crud, auth, models, reference_cache
+from backend.database import get_db, get_read_db
+from backend.metrics import InstrumentedRoute
 
-router = APIRouter(prefix="/branches", tags=["branches"])
+router = APIRouter(prefix="/branches", tags=["branches"], route_class=InstrumentedRoute)
 
 @router.get("/", response_model=List[schemas.BranchResponse])
 async def read_branches(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     search: str = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    branches = await crud.get_branches(db, skip=skip, limit=limit, search=search)
-
     # Filter for Operators: only return assigned branches
+    allowed_branch_ids = None
     if current_user.role == models.UserRole.OPERATOR:
         allowed_branch_ids = {b.id for b in current_user.branches}
         if current_user.branch_id:
             allowed_branch_ids.add(current_user.branch_id)
 
+    cached = await reference_cache.not_modified(
+        request, response, db, reference_cache.BRANCHES, skip, limit, search, sorted(allowed_branch_ids or [])
+    )
+    if cached:
+        return cached
+
+    async def load():
+        branches = await crud.get_branches(db, skip=skip, limit=limit, search=search)
+        return [schemas.BranchResponse.model_validate(b) for b in branches]
+
+    branches = await reference_cache.get_or_load(db, reference_cache.BRANCHES, (skip, limit, search), load)
+
+    if allowed_branch_ids is not None:
         # Filter the list
         branches = [b for b in branches if b.id in allowed_branch_ids]
 
     return branches
 
+@router.get("/{branch_id}/inventory-as-of", response_model=List[schemas.ItemAsOf])
+async def read_branch_inventory_as_of(
+    branch_id: int,
+    date: datetime,
+    skip: int = 0,
+    limit: int = 1000,
+    status: Optional[models.ItemStatus] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role == models.UserRole.OPERATOR and not current_user.all_branches:
+        allowed_branch_ids = {b.id for b in current_user.branches}
+        if current_user.branch_id:
+            allowed_branch_ids.add(current_user.branch_id)
+        if branch_id not in allowed_branch_ids:
+            raise HTTPException(status_code=403, detail="Acesso negado a esta filial")
+
+    return await crud.get_items_as_of(db, date, skip=skip, limit=limit, branch_id=branch_id, status=status)
+
 @router.post("/", response_model=schemas.BranchResponse)
 async def create_branch(
     branch: schemas.BranchCreate,
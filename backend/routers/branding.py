@@ -1,14 +1,19 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend import crud, schemas, models
-from backend.database import get_db
+from backend import crud, schemas, models, reference_cache
+from backend.database import get_db, get_read_db
 from backend.auth import get_current_user
+from backend.metrics import InstrumentedRoute
 
-router = APIRouter(prefix="/branding", tags=["branding"])
+router = APIRouter(prefix="/branding", tags=["branding"], route_class=InstrumentedRoute)
 
 @router.get("/", response_model=schemas.BrandingResponse)
-async def read_branding(db: AsyncSession = Depends(get_db)):
-    return await crud.get_branding(db)
+async def read_branding(request: Request, response: Response, db: AsyncSession = Depends(get_read_db)):
+    # Público (tela de login) e consultado em toda carga de página
+    cached = await reference_cache.not_modified(request, response, db, reference_cache.BRANDING)
+    if cached:
+        return cached
+    return await reference_cache.get_or_load(db, reference_cache.BRANDING, None, lambda: crud.read_branding(db))
 
 @router.patch("/", response_model=schemas.BrandingResponse)
 async def update_branding(
@@ -1,20 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend import schemas, crud, auth, models
-from backend.database import get_db
+from backend import schemas, crud, auth, models, reference_cache
+from backend.database import get_db, get_read_db
+from backend.metrics import InstrumentedRoute
 
-router = APIRouter(prefix="/categories", tags=["categories"])
+router = APIRouter(prefix="/categories", tags=["categories"], route_class=InstrumentedRoute)
 
 @router.get("/", response_model=List[schemas.CategoryResponse])
 async def read_categories(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     search: str = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
-    return await crud.get_categories(db, skip=skip, limit=limit, search=search)
+    cached = await reference_cache.not_modified(request, response, db, reference_cache.CATEGORIES, skip, limit, search)
+    if cached:
+        return cached
+
+    async def load():
+        rows = await crud.get_categories(db, skip=skip, limit=limit, search=search)
+        return [schemas.CategoryResponse.model_validate(r) for r in rows]
+
+    return await reference_cache.get_or_load(db, reference_cache.CATEGORIES, (skip, limit, search), load)
 
 @router.post("/", response_model=schemas.CategoryResponse)
 async def create_category(
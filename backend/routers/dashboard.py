@@ -1,29 +1,33 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import func
 from sqlalchemy.future import select
-from backend import models, auth
-from backend.database import get_db
+from backend import models, auth, crud, result_cache
+from backend.database import get_read_db, session_source, read_after_write
+from backend.metrics import InstrumentedRoute
 
-router = APIRouter(prefix="/dashboard", tags=["dashboard"])
+router = APIRouter(prefix="/dashboard", tags=["dashboard"], route_class=InstrumentedRoute)
 
 @router.get("/stats")
-async def get_dashboard_stats(db: AsyncSession = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
+async def get_dashboard_stats(request: Request, db: AsyncSession = Depends(get_read_db), current_user: models.User = Depends(auth.get_current_user)):
     # Base Filters based on user role
     branch_filter = None
+    scope = "all"
     # AUDITOR também pode ver tudo
     if current_user.role not in [models.UserRole.ADMIN, models.UserRole.APPROVER, models.UserRole.AUDITOR]:
-         # Filtrar por lista de branches permitidas
-         allowed_branches = [b.id for b in current_user.branches]
-         if current_user.branch_id and current_user.branch_id not in allowed_branches:
-             allowed_branches.append(current_user.branch_id)
+         # Filiais permitidas via subquery em user_branches (sem filiais, não vê nada)
+         branch_filter = models.Item.branch_id.in_(crud.branch_scope(current_user.id))
+         scope = result_cache.branch_scope_key(current_user)
 
-         if allowed_branches:
-             branch_filter = models.Item.branch_id.in_(allowed_branches)
-         else:
-             # Se não tem branches, não vê nada (filtros impossível)
-             branch_filter = models.Item.id == -1
+    # Todas as filiais abrem o dashboard ao mesmo tempo: quem tem o mesmo escopo
+    # compartilha uma única execução das consultas (e o resultado por alguns segundos);
+    # quem acabou de escrever consulta direto
+    return await result_cache.get_or_compute(
+        "dashboard.stats", (session_source(db), scope), lambda: _dashboard_stats(db, branch_filter),
+        read_after_write(request),
+    )
 
+async def _dashboard_stats(db: AsyncSession, branch_filter):
     # Total Pending Items
     query_pending = select(func.count(models.Item.id)).where(models.Item.status == models.ItemStatus.PENDING)
     if branch_filter is not None:
@@ -47,15 +51,20 @@ async def get_dashboard_stats(db: AsyncSession = Depends(get_db), current_user:
 
     # Items by Category (Pending only? Request says "Itens Pendentes" behavior... usually dashboard shows aggregates.
     # Let's filter aggregates by the user's branch if they are an operator, otherwise all.)
-    query_category = select(models.Item.category, func.count(models.Item.id))
+    query_category = select(models.Item.category_id, func.count(models.Item.id))
     # Note: User request implies "Inventory button empty... items pending white page".
     # The stats should also reflect what they can see.
     if branch_filter is not None:
         query_category = query_category.where(branch_filter)
 
-    query_category = query_category.group_by(models.Item.category)
+    # Agrupa pela FK; os nomes vêm do cache de referência
+    query_category = query_category.group_by(models.Item.category_id)
     result_category = await db.execute(query_category)
-    items_by_category = [{"category": row[0], "count": row[1]} for row in result_category.all()]
+    category_names = await crud.get_category_names(db)
+    items_by_category = [
+        {"category_id": row[0], "category": category_names.get(row[0]), "count": row[1]}
+        for row in result_category.all()
+    ]
 
     # Items by Branch
     # We need to join with Branch table to get branch name and ID
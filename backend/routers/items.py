@@ -1,32 +1,115 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, status
-from typing import List, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, UploadFile, File, Form, status
+from typing import List, Optional, Union
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend import schemas, models, crud, auth
-from backend.database import get_db
+from backend import schemas, models, crud, auth, conditional, reference_cache, result_cache, serializers
+from backend.database import get_db, get_read_db, session_source, read_after_write
+from backend.metrics import InstrumentedRoute
+import base64
+import json
+import re
 import shutil
 import os
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 
-router = APIRouter(prefix="/items", tags=["items"])
+router = APIRouter(prefix="/items", tags=["items"], route_class=InstrumentedRoute)
+
+# Tabelas de referência embutidas no ItemResponse (filial, categoria, fornecedor, responsável)
+EMBEDDED_REFERENCES = (
+    reference_cache.BRANCHES, reference_cache.CATEGORIES, reference_cache.SUPPLIERS, reference_cache.USERS
+)
 
 UPLOAD_DIR = "/app/uploads"
 if not os.path.exists(UPLOAD_DIR):
     os.makedirs(UPLOAD_DIR)
 
-@router.get("/", response_model=List[schemas.ItemResponse])
-async def read_items(
-    skip: int = 0,
-    limit: int = 100,
+# Formatos de /items/: "embedded" (padrão, List[ItemResponse]) ou "normalized"
+ITEM_LIST_FORMATS = ("embedded", "normalized")
+# Campos aceitos em `fields=`; no formato normalizado os relacionamentos viram os ids
+ITEM_FIELDS = serializers.ITEM_FIELDS + ("category_id",)
+
+# Atalhos de data parcial aceitos em purchase_date
+PARTIAL_DATE_FORMATS = (
+    re.compile(r"(?P<year>\d{4})(?:-(?P<month>\d{1,2})(?:-(?P<day>\d{1,2}))?)?"),
+    re.compile(r"(?:(?P<day>\d{1,2})/)?(?P<month>\d{1,2})/(?P<year>\d{4})"),
+)
+
+def partial_date_range(value: str):
+    # "2024", "2024-03", "2024-03-15" (ou "03/2024", "15/03/2024") -> intervalo [início, fim)
+    for pattern in PARTIAL_DATE_FORMATS:
+        match = pattern.fullmatch(value.strip())
+        if not match:
+            continue
+        year, month, day = (int(part) if part else None for part in match.group("year", "month", "day"))
+        try:
+            if month is None:
+                return datetime(year, 1, 1), datetime(year + 1, 1, 1)
+            if day is None:
+                return datetime(year, month, 1), datetime(year + month // 12, month % 12 + 1, 1)
+            start = datetime(year, month, day)
+            return start, start + timedelta(days=1)
+        except ValueError:
+            break
+    raise HTTPException(status_code=400, detail="Data de compra inválida")
+
+async def _category_id(db: AsyncSession, name: Optional[str] = None, category_id: Optional[int] = None):
+    # category_id ou nome vindo dos formulários -> category_id existente, pelo cache de
+    # referência. None só quando nenhum dos dois veio.
+    if category_id is not None:
+        if category_id not in await crud.get_category_names(db):
+            raise HTTPException(status_code=400, detail="Categoria não encontrada")
+        return category_id
+    if not name:
+        return None
+    category_id = await crud.get_category_id_by_name(db, name)
+    if category_id is None:
+        raise HTTPException(status_code=400, detail="Categoria não encontrada")
+    return category_id
+
+def _naive(value: Optional[datetime]):
+    # purchase_date é gravada sem fuso
+    return value.replace(tzinfo=None) if value and value.tzinfo else value
+
+def _aware(value: Optional[datetime]):
+    # created_at tem fuso; sem fuso na consulta = UTC
+    return value.replace(tzinfo=timezone.utc) if value and value.tzinfo is None else value
+
+def item_filters(
     status: Optional[str] = None,
     category: Optional[str] = None,
+    category_id: Optional[int] = None,
     branch_id: Optional[int] = None,
     search: Optional[str] = None,
     description: Optional[str] = None,
     fixed_asset_number: Optional[str] = None,
-    purchase_date: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    purchase_date: Optional[str] = Query(None, description="Ano, ano-mês ou data (2024, 2024-03, 2024-03-15)"),
+    purchase_date_from: Optional[datetime] = None,
+    purchase_date_to: Optional[datetime] = Query(None, description="Exclusivo"),
+    created_at_from: Optional[datetime] = None,
+    created_at_to: Optional[datetime] = Query(None, description="Exclusivo"),
+    include_archived: bool = Query(False, description="Inclui itens baixados já arquivados (archived_items)"),
     current_user: models.User = Depends(auth.get_current_user)
 ):
+    # Filtros comuns de /items/ e /items/facets, já com o escopo de filiais do usuário
+    filters = dict(
+        status=status,
+        category=category,
+        category_id=category_id,
+        branch_id=branch_id,
+        search=search,
+        description=description,
+        fixed_asset_number=fixed_asset_number,
+        purchase_date_from=_naive(purchase_date_from),
+        purchase_date_to=_naive(purchase_date_to),
+        created_at_from=_aware(created_at_from),
+        created_at_to=_aware(created_at_to),
+        include_archived=include_archived
+    )
+    if purchase_date:
+        # O atalho vira um intervalo, combinado com os limites explícitos se houver
+        start, end = partial_date_range(purchase_date)
+        filters["purchase_date_from"] = max(filter(None, (start, filters["purchase_date_from"])))
+        filters["purchase_date_to"] = min(filter(None, (end, filters["purchase_date_to"])))
+
     # Enforce branch filtering for non-admins (Approvers and Auditors can see all)
     # Operadores agora podem ter acesso a multiplas filiais ou a todas se a flag estiver ativa.
     if current_user.role not in [models.UserRole.ADMIN, models.UserRole.APPROVER, models.UserRole.AUDITOR] and not current_user.all_branches:
@@ -45,32 +128,142 @@ async def read_items(
                  # Vamos forçar um filtro impossível ou levantar erro.
                  raise HTTPException(status_code=403, detail="Acesso negado a esta filial")
         else:
-            return await crud.get_items(
-                db,
-                skip=skip,
-                limit=limit,
-                status=status,
-                category=category,
-                branch_id=None,
-                search=search,
-                allowed_branch_ids=allowed_branches,
-                description=description,
-                fixed_asset_number=fixed_asset_number,
-                purchase_date=purchase_date
+            # Escopo resolvido no SQL (user_branches), não como lista IN
+            filters["scope_user_id"] = current_user.id
+    return filters
+
+# Keyset: cursor = (valor da chave de ordenação, id) do último item, no header da resposta
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+CURSOR_VALUE_TYPES = {
+    "id": int,
+    "purchase_date": datetime.fromisoformat,
+    "invoice_value": float,
+    "accounting_value": float,
+}
+
+def encode_cursor(value, item_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    elif isinstance(value, models.ItemStatus):
+        value = value.name
+    return base64.urlsafe_b64encode(json.dumps([value, item_id]).encode()).decode()
+
+def decode_cursor(sort: str, cursor: str):
+    try:
+        value, item_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if value is not None:
+            value = CURSOR_VALUE_TYPES.get(sort, str)(value)
+        return value, int(item_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def item_sorting(
+    sort: Optional[str] = Query(None, description=", ".join(crud.ITEM_SORTS)),
+    order: str = "asc",
+    cursor: Optional[str] = Query(None, description=f"Valor do header {NEXT_CURSOR_HEADER} da página anterior"),
+):
+    if sort is not None and sort not in crud.ITEM_SORTS:
+        raise HTTPException(status_code=400, detail="Ordenação inválida")
+    if order not in crud.ITEM_SORT_ORDERS:
+        raise HTTPException(status_code=400, detail="Ordem inválida")
+    return {"sort": sort, "order": order, "after": decode_cursor(sort or "id", cursor) if cursor else None}
+
+@router.get("/", response_model=Union[List[schemas.ItemResponse], schemas.NormalizedItemList])
+async def read_items(
+    request: Request,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    format: str = "embedded",
+    filters: dict = Depends(item_filters),
+    sorting: dict = Depends(item_sorting),
+    fields: Optional[tuple] = Depends(serializers.field_selector(ITEM_FIELDS)),
+    db: AsyncSession = Depends(get_read_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if format not in ITEM_LIST_FORMATS:
+        raise HTTPException(status_code=400, detail="Formato inválido")
+
+    # Chave do result_cache: o escopo entra pelas filiais visíveis, não pelo usuário, para
+    # que operadores das mesmas filiais compartilhem a consulta; a origem (principal ou
+    # réplica) separa quem acabou de escrever de quem lê da réplica. Quem escreveu há pouco
+    # não usa o cache: a entrada pode ser de outro worker e anterior à escrita
+    shared_filters = dict(filters)
+    if shared_filters.pop("scope_user_id", None) is not None:
+        shared_filters["scope"] = result_cache.branch_scope_key(current_user)
+    key = (
+        session_source(db), format, fields, skip, limit,
+        tuple(sorted(shared_filters.items())), tuple(sorted(sorting.items())),
+    )
+    bypass = read_after_write(request)
+
+    async def load_version():
+        fingerprint = await crud.get_items_fingerprint(db, skip=skip, limit=limit, **sorting, **filters)
+        versions = await reference_cache.current_versions(db)
+        return fingerprint, tuple(versions.get(name) for name in EMBEDDED_REFERENCES)
+
+    # ETag da página: ids/última alteração dos itens + filtros + versões dos dados embutidos.
+    # Clientes que repetem a consulta recebem 304 sem carregar nem serializar os itens.
+    fingerprint, embedded = await result_cache.get_or_compute("items.fingerprint", key, load_version, bypass)
+    etag = conditional.weak_etag(
+        "items", format, fields, fingerprint, skip, limit, sorted(filters.items(), key=lambda f: f[0]),
+        sorted(sorting.items()), embedded
+    )
+    cached = conditional.not_modified(request, response, etag, fingerprint[3])
+    if cached:
+        return cached
+
+    async def load_page():
+        # Mesmo JSON do response_model, montado direto das projeções (sem ORM/Pydantic por item)
+        if format == "normalized":
+            rows, content = await serializers.normalized_item_list(
+                db, skip=skip, limit=limit, fields=fields, **sorting, **filters
             )
+        else:
+            rows, content = await serializers.item_list(db, skip=skip, limit=limit, fields=fields, **sorting, **filters)
+        next_cursor = None
+        if rows and len(rows) == limit:
+            next_cursor = encode_cursor(rows[-1].sort_key, rows[-1].id)
+        return serializers.dumps(content), next_cursor
+
+    # Corpo já serializado, compartilhado enquanto a página não muda
+    body, next_cursor = await result_cache.get_or_compute(
+        "items", (key, fingerprint, embedded), load_page, bypass
+    )
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    return serializers.encoded_json_response(body, response)
+
+@router.get("/facets", response_model=schemas.ItemFacets)
+async def read_item_facets(
+    filters: dict = Depends(item_filters),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Contagens por status/filial/categoria/fornecedor dos itens que os filtros atuais trazem
+    return await crud.get_item_facets(db, **filters)
 
-    # If the user IS Admin, Approver or Auditor, and they passed a branch_id, we use it.
-    return await crud.get_items(
-        db,
-        skip=skip,
-        limit=limit,
-        status=status,
-        category=category,
-        branch_id=branch_id,
-        search=search,
-        description=description,
-        fixed_asset_number=fixed_asset_number,
-        purchase_date=purchase_date
+@router.get("/as-of", response_model=List[schemas.ItemAsOf])
+async def read_items_as_of(
+    date: datetime,
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[models.ItemStatus] = None,
+    branch_id: Optional[int] = None,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    # Mesmo escopo de filiais da listagem atual
+    scope_user_id = None
+    if current_user.role not in [models.UserRole.ADMIN, models.UserRole.APPROVER, models.UserRole.AUDITOR] and not current_user.all_branches:
+        allowed_branches = [b.id for b in current_user.branches]
+        if current_user.branch_id and current_user.branch_id not in allowed_branches:
+            allowed_branches.append(current_user.branch_id)
+        if branch_id and branch_id not in allowed_branches:
+            raise HTTPException(status_code=403, detail="Acesso negado a esta filial")
+        scope_user_id = current_user.id
+
+    return await crud.get_items_as_of(
+        db, date, skip=skip, limit=limit, branch_id=branch_id, status=status, scope_user_id=scope_user_id
     )
 
 from pydantic import BaseModel
@@ -94,7 +287,8 @@ async def check_asset(
 @router.post("/", response_model=schemas.ItemResponse)
 async def create_item(
     description: str = Form(...),
-    category: str = Form(...),
+    category: Optional[str] = Form(None),
+    category_id: Optional[int] = Form(None),
     purchase_date: datetime = Form(...),
     invoice_value: float = Form(...),
     invoice_number: str = Form(...),
@@ -119,6 +313,11 @@ async def create_item(
         if branch_id not in allowed_branches:
             raise HTTPException(status_code=403, detail="Você não tem permissão para criar itens nesta filial")
 
+    # Categoria obrigatória (por id ou nome); validada antes de gravar o anexo
+    category_id = await _category_id(db, category, category_id)
+    if category_id is None:
+        raise HTTPException(status_code=400, detail="Categoria é obrigatória")
+
     # Save file if uploaded
     file_path = None
     if file:
@@ -135,20 +334,13 @@ async def create_item(
         # Store relative path for serving
         file_path = f"uploads/{safe_filename}"
 
-    # Resolve category_id from name if provided
-    category_id = None
-    if category:
-        cat_obj = await crud.get_category_by_name(db, category)
-        if cat_obj:
-            category_id = cat_obj.id
-
     item_data = schemas.ItemCreate(
         description=description,
-        category=category,
         category_id=category_id,
         purchase_date=purchase_date,
         invoice_value=invoice_value,
         invoice_number=invoice_number,
+        invoice_file=file_path,
         branch_id=branch_id,
         supplier_id=supplier_id,
         serial_number=serial_number,
@@ -157,26 +349,9 @@ async def create_item(
         responsible_id=current_user.id
     )
 
-    # Create item
+    # Create item (o anexo entra no mesmo INSERT)
     try:
-        db_item = await crud.create_item(db, item_data)
-        # Note: file path setting is missing in crud.create_item, need to handle it or update crud
-        # Better: Update item with file path after creation or pass to crud
-        if file_path:
-            db_item.invoice_file = file_path
-            db.add(db_item)
-            await db.commit()
-            # Refresh again with relations
-            from sqlalchemy.orm import selectinload
-            from sqlalchemy.future import select
-            query = select(models.Item).where(models.Item.id == db_item.id).options(
-                selectinload(models.Item.branch),
-                selectinload(models.Item.category_rel)
-            )
-            result = await db.execute(query)
-            db_item = result.scalars().first()
-
-        return db_item
+        return await crud.create_item(db, item_data)
     except Exception as e:
         print(f"Error creating item: {e}")
         raise HTTPException(status_code=400, detail=f"Erro ao criar item: {str(e)}")
@@ -192,7 +367,10 @@ async def update_item_status(
     if current_user.role not in [models.UserRole.ADMIN, models.UserRole.APPROVER]:
          raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Não autorizado a aprovar/rejeitar itens")
 
-    item = await crud.update_item_status(db, item_id, status_update, current_user.id, fixed_asset_number)
+    try:
+        item = await crud.update_item_status(db, item_id, status_update, current_user.id, fixed_asset_number)
+    except crud.ApprovalConflict as e:
+        raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=str(e))
     if not item:
         raise HTTPException(status_code=404, detail="Item não encontrado")
 
@@ -296,5 +474,7 @@ async def update_item(
         else:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Apenas administradores e aprovadores podem editar itens (ou operadores corrigindo rejeições)")
 
+    item_update.category_id = await _category_id(db, item_update.category, item_update.category_id)
+
     updated_item = await crud.update_item(db, item_id, item_update)
     return updated_item
@@ -1,22 +1,99 @@
 
-from fastapi import APIRouter, Depends
+import base64
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List
-from backend import models, crud, auth, schemas
-from backend.database import get_db
+from typing import List, Optional
+from datetime import datetime
+from backend import models, crud, auth, schemas, conditional, reference_cache, serializers
+from backend.database import get_read_db
+from backend.metrics import InstrumentedRoute
 
-router = APIRouter(prefix="/logs", tags=["logs"])
+router = APIRouter(prefix="/logs", tags=["logs"], route_class=InstrumentedRoute)
 
-@router.get("/", response_model=List[schemas.LogResponse])
-async def read_logs(
-    limit: int = 1000,
-    db: AsyncSession = Depends(get_db),
+# Próxima página (keyset) vai no header; o corpo continua sendo uma lista
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+def encode_cursor(timestamp: datetime, log_id: int) -> str:
+    return base64.urlsafe_b64encode(f"{timestamp.isoformat()}|{log_id}".encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        timestamp, log_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(timestamp), int(log_id)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Cursor inválido")
+
+def log_filters(
+    item_id: Optional[int] = None,
+    user_id: Optional[int] = None,
+    branch_id: Optional[int] = None,
+    action: Optional[str] = None,
+    event_type: Optional[models.LogEventType] = None,
+    start: Optional[datetime] = None,
+    end: Optional[datetime] = None,
+    cursor: Optional[str] = None,
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Only Admin/Approver/Auditor can see audit logs
     if current_user.role not in [models.UserRole.ADMIN, models.UserRole.APPROVER, models.UserRole.AUDITOR]:
         # Operator can't see system-wide logs
-        from fastapi import HTTPException
         raise HTTPException(status_code=403, detail="Not authorized to view system logs")
 
-    return await crud.get_all_logs(db, limit=limit)
+    return {
+        "item_id": item_id,
+        "user_id": user_id,
+        "branch_id": branch_id,
+        "action": action,
+        "event_type": event_type,
+        "start": start,
+        "end": end,
+        "before": decode_cursor(cursor) if cursor else None,
+    }
+
+async def _not_modified(request: Request, response: Response, db: AsyncSession, view, limit: int, filters: dict):
+    fingerprint = await crud.get_logs_fingerprint(db, limit=limit, **filters)
+    users_version = (await reference_cache.version_of(db, reference_cache.USERS))[0]
+    branches_version = (await reference_cache.version_of(db, reference_cache.BRANCHES))[0]
+    etag = conditional.weak_etag(
+        "logs", view, fingerprint, limit, sorted(filters.items(), key=lambda f: f[0]), users_version, branches_version
+    )
+    return conditional.not_modified(request, response, etag)
+
+def _set_next_cursor(response: Response, rows, limit: int):
+    if rows and len(rows) == limit:
+        last = rows[-1]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(last.timestamp, last.id)
+
+@router.get("/", response_model=List[schemas.LogResponse])
+async def read_logs(
+    request: Request,
+    response: Response,
+    limit: int = 1000,
+    filters: dict = Depends(log_filters),
+    fields: Optional[tuple] = Depends(serializers.field_selector(serializers.LOG_FIELDS)),
+    db: AsyncSession = Depends(get_read_db)
+):
+    cached = await _not_modified(request, response, db, ("full", fields), limit, filters)
+    if cached:
+        return cached
+
+    logs, content = await serializers.log_list(db, limit=limit, fields=fields, **filters)
+    _set_next_cursor(response, logs, limit)
+    return serializers.json_response(content, response)
+
+@router.get("/summary", response_model=List[schemas.LogSummary])
+async def read_log_summaries(
+    request: Request,
+    response: Response,
+    limit: int = 1000,
+    filters: dict = Depends(log_filters),
+    db: AsyncSession = Depends(get_read_db)
+):
+    # Mesmos filtros de /logs/, mas só ids, nomes e ação (sem usuário/filiais completos)
+    cached = await _not_modified(request, response, db, "summary", limit, filters)
+    if cached:
+        return cached
+
+    logs = await crud.get_log_summaries(db, limit=limit, **filters)
+    _set_next_cursor(response, logs, limit)
+    return logs
@@ -0,0 +1,25 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import PlainTextResponse
+from backend import metrics, models, auth, slow_queries
+
+router = APIRouter(tags=["metrics"], route_class=metrics.InstrumentedRoute)
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def read_metrics():
+    # Formato texto do Prometheus (scrape sem autenticação, como o /health)
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+@router.get("/metrics/slow-queries")
+async def read_slow_queries(
+    limit: int = 50,
+    current_user: models.User = Depends(auth.get_current_user)
+):
+    if current_user.role != models.UserRole.ADMIN:
+        raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Apenas administradores podem ver as queries lentas")
+
+    # Mais recentes primeiro; o buffer é por worker (SLOW_QUERY_BUFFER_SIZE)
+    return {
+        "threshold_ms": slow_queries.SLOW_QUERY_MS,
+        "enabled": slow_queries.SLOW_QUERY_MS > 0,
+        "queries": list(reversed(slow_queries.recent))[:limit],
+    }
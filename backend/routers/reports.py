@@ -2,16 +2,19 @@ from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from backend import schemas, models, crud, auth
-from backend.database import get_db
-import pandas as pd
+from backend.database import get_read_db
+from backend.metrics import InstrumentedRoute
 from io import BytesIO
-from reportlab.pdfgen import canvas
-from reportlab.lib.pagesizes import letter
 
-router = APIRouter(prefix="/reports", tags=["reports"])
+# pandas/openpyxl/reportlab são importados dentro das rotas de exportação:
+# carregá-los no import do módulo pesava na partida e na memória de cada worker.
+
+router = APIRouter(prefix="/reports", tags=["reports"], route_class=InstrumentedRoute)
 
 @router.get("/export/excel")
-async def export_inventory_excel(db: AsyncSession = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
+async def export_inventory_excel(db: AsyncSession = Depends(get_read_db), current_user: models.User = Depends(auth.get_current_user)):
+    import pandas as pd
+
     items = await crud.get_items(db, limit=10000) # Fetch all relevant items
 
     data = []
@@ -40,7 +43,10 @@ async def export_inventory_excel(db: AsyncSession = Depends(get_db), current_use
     )
 
 @router.get("/export/pdf")
-async def export_inventory_pdf(db: AsyncSession = Depends(get_db), current_user: models.User = Depends(auth.get_current_user)):
+async def export_inventory_pdf(db: AsyncSession = Depends(get_read_db), current_user: models.User = Depends(auth.get_current_user)):
+    from reportlab.pdfgen import canvas
+    from reportlab.lib.pagesizes import letter
+
     items = await crud.get_items(db, limit=10000)
 
     stream = BytesIO()
@@ -69,7 +75,7 @@ async def export_inventory_pdf(db: AsyncSession = Depends(get_db), current_user:
 
         p.drawString(x_positions[0], y, str(item.id))
         p.drawString(x_positions[1], y, item.description[:30])
-        p.drawString(x_positions[2], y, item.category)
+        p.drawString(x_positions[2], y, item.category or "")
         p.drawString(x_positions[3], y, f"{item.invoice_value:.2f}")
         p.drawString(x_positions[4], y, item.status)
         y -= 20
@@ -1,22 +1,33 @@
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend import schemas, models, crud, auth
-from backend.database import get_db
+from backend import schemas, models, crud, auth, reference_cache
+from backend.database import get_db, get_read_db
+from backend.metrics import InstrumentedRoute
 
-router = APIRouter(prefix="/suppliers", tags=["suppliers"])
+router = APIRouter(prefix="/suppliers", tags=["suppliers"], route_class=InstrumentedRoute)
 
 @router.get("/", response_model=List[schemas.SupplierResponse])
 async def read_suppliers(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     search: Optional[str] = None,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     # Todos podem visualizar
-    return await crud.get_suppliers(db, skip=skip, limit=limit, search=search)
+    cached = await reference_cache.not_modified(request, response, db, reference_cache.SUPPLIERS, skip, limit, search)
+    if cached:
+        return cached
+
+    async def load():
+        rows = await crud.get_suppliers(db, skip=skip, limit=limit, search=search)
+        return [schemas.SupplierResponse.model_validate(r) for r in rows]
+
+    return await reference_cache.get_or_load(db, reference_cache.SUPPLIERS, (skip, limit, search), load)
 
 @router.post("/", response_model=schemas.SupplierResponse)
 async def create_supplier(
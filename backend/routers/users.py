@@ -1,10 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException, status
-from typing import List
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend import schemas, models, crud, auth
+from backend import schemas, models, crud, auth, reference_cache, serializers
 from backend.database import get_db
+from backend.metrics import InstrumentedRoute
 
-router = APIRouter(prefix="/users", tags=["users"])
+router = APIRouter(prefix="/users", tags=["users"], route_class=InstrumentedRoute)
 
 @router.get("/me", response_model=schemas.UserResponse)
 async def read_users_me(current_user: models.User = Depends(auth.get_current_user)):
@@ -12,15 +13,27 @@ async def read_users_me(current_user: models.User = Depends(auth.get_current_use
 
 @router.get("/", response_model=List[schemas.UserResponse])
 async def read_users(
+    request: Request,
+    response: Response,
     skip: int = 0,
     limit: int = 100,
     search: str = None,
+    fields: Optional[tuple] = Depends(serializers.field_selector(serializers.USER_FIELDS)),
     db: AsyncSession = Depends(get_db),
     current_user: models.User = Depends(auth.get_current_user)
 ):
     if current_user.role not in [models.UserRole.ADMIN, models.UserRole.APPROVER, models.UserRole.AUDITOR]:
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Não autorizado")
-    return await crud.get_users(db, skip=skip, limit=limit, search=search)
+
+    # Versão de usuários (incrementada nas escritas do crud) + filiais embutidas na resposta
+    branches_version = (await reference_cache.version_of(db, reference_cache.BRANCHES))[0]
+    cached = await reference_cache.not_modified(
+        request, response, db, reference_cache.USERS, skip, limit, search, fields, branches_version
+    )
+    if cached:
+        return cached
+    users = await serializers.user_list(db, skip=skip, limit=limit, search=search, fields=fields)
+    return serializers.json_response(users, response)
 
 @router.post("/", response_model=schemas.UserResponse)
 async def create_user(
@@ -1,7 +1,8 @@
 from pydantic import BaseModel, EmailStr, computed_field
-from typing import Optional, List
-from datetime import datetime, date
-from backend.models import UserRole, ItemStatus
+from typing import Optional, List, Dict
+from datetime import datetime
+from backend.models import UserRole, ItemStatus, LogEventType
+from backend.accounting import accounting_value
 
 # Token
 class Token(BaseModel):
@@ -103,16 +104,40 @@ class LogResponse(BaseModel):
     user_id: Optional[int] = None
     action: str
     timestamp: datetime
+    event_type: Optional[LogEventType] = None
+    from_status: Optional[ItemStatus] = None
+    to_status: Optional[ItemStatus] = None
+    from_branch_id: Optional[int] = None
+    to_branch_id: Optional[int] = None
+    justification: Optional[str] = None
     user: Optional[UserResponse] = None
     item: Optional[ItemSummary] = None
 
     class Config:
         from_attributes = True
 
+class LogSummary(BaseModel):
+    id: int
+    timestamp: datetime
+    action: str
+    event_type: Optional[LogEventType] = None
+    from_status: Optional[ItemStatus] = None
+    to_status: Optional[ItemStatus] = None
+    from_branch_id: Optional[int] = None
+    to_branch_id: Optional[int] = None
+    justification: Optional[str] = None
+    item_id: Optional[int] = None
+    item_description: Optional[str] = None
+    item_fixed_asset_number: Optional[str] = None
+    user_id: Optional[int] = None
+    user_name: Optional[str] = None
+    user_email: Optional[str] = None
+
 # Item
 class ItemBase(BaseModel):
     description: str
-    category: str
+    # Nome da categoria, derivado de category_id (só nas respostas)
+    category: Optional[str] = None
     purchase_date: datetime
     invoice_value: float
     invoice_number: str
@@ -123,18 +148,29 @@ class ItemBase(BaseModel):
     supplier_id: Optional[int] = None
 
 class ItemCreate(ItemBase):
-    category_id: Optional[int] = None
+    # Obrigatório: o router resolve `category` (nome do formulário) para o id antes
+    category_id: int
     fixed_asset_number: Optional[str] = None
+    invoice_file: Optional[str] = None
 
 class ItemUpdate(BaseModel):
     description: Optional[str] = None
     category: Optional[str] = None
+    category_id: Optional[int] = None
     invoice_value: Optional[float] = None
     status: Optional[ItemStatus] = None
     fixed_asset_number: Optional[str] = None
     observations: Optional[str] = None
     supplier_id: Optional[int] = None
 
+class ItemAsOf(BaseModel):
+    id: int
+    description: Optional[str] = None
+    category: Optional[str] = None
+    fixed_asset_number: Optional[str] = None
+    status: Optional[ItemStatus] = None
+    branch_id: Optional[int] = None
+
 class ItemResponse(ItemBase):
     id: int
     status: ItemStatus
@@ -166,46 +202,78 @@ class ItemResponse(ItemBase):
         return self.calculate_accounting_value()
 
     def calculate_accounting_value(self) -> float:
-        if self.invoice_value is None or self.purchase_date is None:
-            return 0.0
-
-        depreciation_months = None
-        if self.category_rel:
-            depreciation_months = self.category_rel.depreciation_months
-
-        # Se não houver depreciação configurada ou for 0, mantém o valor original
-        if not depreciation_months or depreciation_months <= 0:
-            return self.invoice_value
-
-        from dateutil.relativedelta import relativedelta
-
-        # Normaliza datas para evitar problemas com timezones e frações de dia (usa apenas a data)
-        start_date = self.purchase_date.date() if isinstance(self.purchase_date, datetime) else self.purchase_date
-        today = date.today()
-
-        # Calcula data final baseado nos meses
-        end_date = start_date + relativedelta(months=depreciation_months)
+        depreciation_months = self.category_rel.depreciation_months if self.category_rel else None
+        return accounting_value(self.invoice_value, self.purchase_date, depreciation_months)
 
-        # Calcula dias totais de vida útil e dias passados
-        total_days = (end_date - start_date).days
-        elapsed_days = (today - start_date).days
-
-        if total_days <= 0:
-            return 0.0
-
-        if elapsed_days >= total_days:
-            return 0.0
-
-        if elapsed_days < 0:
-            return self.invoice_value
-
-        # Cálculo linear por dia
-        remaining_ratio = 1 - (elapsed_days / total_days)
-
-        # Garante que não retorne negativo (embora a checagem acima já deva prevenir)
-        final_value = max(0.0, self.invoice_value * remaining_ratio)
+# Formato normalizado de /items/ (?format=normalized)
+class NormalizedLog(BaseModel):
+    id: int
+    item_id: int
+    user_id: Optional[int] = None
+    action: str
+    timestamp: datetime
+    event_type: Optional[LogEventType] = None
+    from_status: Optional[ItemStatus] = None
+    to_status: Optional[ItemStatus] = None
+    from_branch_id: Optional[int] = None
+    to_branch_id: Optional[int] = None
+    justification: Optional[str] = None
+
+class NormalizedUser(UserBase):
+    id: int
+    name: Optional[str] = None
+    email: Optional[str] = None
+    role: Optional[UserRole] = None
+    branch_id: Optional[int] = None
+    all_branches: bool = False
+    branch_ids: List[int] = []
 
-        return round(final_value, 2)
+class NormalizedItem(BaseModel):
+    id: int
+    status: ItemStatus
+    description: Optional[str] = None
+    category: Optional[str] = None
+    category_id: Optional[int] = None
+    purchase_date: Optional[datetime] = None
+    invoice_value: Optional[float] = None
+    invoice_number: Optional[str] = None
+    serial_number: Optional[str] = None
+    branch_id: Optional[int] = None
+    transfer_target_branch_id: Optional[int] = None
+    responsible_id: Optional[int] = None
+    supplier_id: Optional[int] = None
+    observations: Optional[str] = None
+    fixed_asset_number: Optional[str] = None
+    invoice_file: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    accounting_value: float
+    logs: List[NormalizedLog] = []
+
+class IncludedEntities(BaseModel):
+    branches: Dict[int, BranchResponse] = {}
+    categories: Dict[int, CategoryResponse] = {}
+    suppliers: Dict[int, SupplierResponse] = {}
+    users: Dict[int, NormalizedUser] = {}
+
+class NormalizedItemList(BaseModel):
+    items: List[NormalizedItem]
+    included: IncludedEntities
+
+# Contagens de /items/facets (valor do filtro -> nº de itens)
+class ItemFacets(BaseModel):
+    status: Dict[str, int]
+    branch_id: Dict[int, int]
+    category_id: Dict[int, int]
+    supplier_id: Dict[int, int]
+
+# Lote reservado em POST /approvals/claim
+class ApprovalBatch(BaseModel):
+    claim_expires_at: datetime
+    items: List[ItemResponse]
+
+class ApprovalRelease(BaseModel):
+    released: int
 
 # Branding
 class BrandingBase(BaseModel):
@@ -0,0 +1,406 @@
+import json
+from datetime import datetime, date
+from typing import Optional
+from fastapi import HTTPException, Query, Response
+from sqlalchemy import select, bindparam, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from backend import models, schemas, crud, reference_cache
+from backend.accounting import accounting_value
+
+try:
+    import orjson
+except ImportError:  # orjson é opcional; sem ele usa o json da biblioteca padrão
+    orjson = None
+
+# Serialização rápida das listagens (itens, logs, usuários): monta o mesmo JSON dos
+# response_model a partir de projeções SQL (sem instâncias ORM nem validação Pydantic por
+# linha). Filiais, categorias e fornecedores vêm do cache de referência e o mesmo dict é
+# reaproveitado por todas as linhas que apontam para eles; usuários e logs são carregados
+# uma vez por página. Com `fields=` só as colunas e relacionamentos pedidos são lidos.
+
+ITEM_COLUMNS = {column.key: column for column in (
+    models.Item.id,
+    models.Item.description,
+    models.Item.purchase_date,
+    models.Item.invoice_value,
+    models.Item.invoice_number,
+    models.Item.serial_number,
+    models.Item.branch_id,
+    models.Item.responsible_id,
+    models.Item.observations,
+    models.Item.supplier_id,
+    models.Item.status,
+    models.Item.fixed_asset_number,
+    models.Item.invoice_file,
+    models.Item.created_at,
+    models.Item.updated_at,
+    models.Item.transfer_target_branch_id,
+    models.Item.category_id,
+)}
+
+LOG_COLUMNS = {column.key: column for column in (
+    models.Log.id,
+    models.Log.item_id,
+    models.Log.user_id,
+    models.Log.action,
+    models.Log.timestamp,
+    models.Log.event_type,
+    models.Log.from_status,
+    models.Log.to_status,
+    models.Log.from_branch_id,
+    models.Log.to_branch_id,
+    models.Log.justification,
+)}
+
+USER_COLUMNS = {column.key: column for column in (
+    models.User.id,
+    models.User.email,
+    models.User.name,
+    models.User.role,
+    models.User.branch_id,
+    models.User.all_branches,
+)}
+
+# Campos de cada resposta, na ordem do schema (a mesma do JSON gerado pelo Pydantic)
+ITEM_FIELDS = tuple(schemas.ItemResponse.model_fields) + ("accounting_value",)
+LOG_FIELDS = tuple(schemas.LogResponse.model_fields)
+USER_FIELDS = tuple(schemas.UserResponse.model_fields)
+NORMALIZED_ITEM_FIELDS = tuple(schemas.NormalizedItem.model_fields)
+
+# Campos que não são colunas -> colunas de que dependem
+ITEM_DEPENDENCIES = {
+    "category": ("category_id",),
+    "branch": ("branch_id",),
+    "transfer_target_branch": ("transfer_target_branch_id",),
+    "category_rel": ("category_id",),
+    "supplier": ("supplier_id",),
+    "responsible": ("responsible_id",),
+    # Cada log embute o resumo do item
+    "logs": ("description", "fixed_asset_number"),
+    "accounting_value": ("invoice_value", "purchase_date", "category_id"),
+}
+LOG_DEPENDENCIES = {"user": ("user_id",), "item": ("item_id",)}
+USER_DEPENDENCIES = {"branch": ("branch_id",)}
+
+# No formato normalizado os relacionamentos viram os ids correspondentes
+NORMALIZED_IDS = {
+    "branch": "branch_id",
+    "transfer_target_branch": "transfer_target_branch_id",
+    "category_rel": "category_id",
+    "supplier": "supplier_id",
+    "responsible": "responsible_id",
+}
+
+
+def field_selector(allowed):
+    # Dependência do parâmetro `fields` (lista separada por vírgula). O id sempre vem.
+    def dependency(fields: Optional[str] = Query(None, description="Campos da resposta, separados por vírgula")):
+        if not fields:
+            return None
+        names = {name.strip() for name in fields.split(",") if name.strip()}
+        invalid = names.difference(allowed)
+        if invalid:
+            raise HTTPException(status_code=400, detail=f"Campos inválidos: {', '.join(sorted(invalid))}")
+        return tuple(name for name in allowed if name in names or name == "id")
+    return dependency
+
+
+def _columns(fields, columns, dependencies, *always):
+    needed = {"id", *always}
+    for name in fields:
+        if name in columns:
+            needed.add(name)
+        needed.update(dependencies.get(name, ()))
+    return [column for key, column in columns.items() if key in needed]
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        # Mesmo formato do Pydantic: UTC como "Z"
+        text = value.isoformat()
+        return text[:-6] + "Z" if text.endswith("+00:00") else text
+    if isinstance(value, date):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def dumps(content) -> bytes:
+    if orjson is not None:
+        # Chaves int nos mapas `included` viram string, como no json padrão
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, default=_json_default, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+def json_response(content, response: Response = None) -> Response:
+    return encoded_json_response(dumps(content), response)
+
+
+def encoded_json_response(body: bytes, response: Response = None) -> Response:
+    # Corpo já serializado (ex: guardado no result_cache)
+    headers = dict(response.headers) if response is not None else None
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+async def _reference_map(db: AsyncSession, name: str, model, schema):
+    async def load():
+        result = await db.execute(select(model))
+        return {row.id: schema.model_validate(row).model_dump() for row in result.scalars().all()}
+
+    return await reference_cache.get_or_load(db, name, "by_id", load)
+
+
+async def _branches(db: AsyncSession):
+    return await _reference_map(db, reference_cache.BRANCHES, models.Branch, schemas.BranchResponse)
+
+
+async def _user_scopes(db: AsyncSession, user_ids):
+    # Ids das filiais de cada usuário (user_branches)
+    scopes = {}
+    if not user_ids:
+        return scopes
+    result = await db.execute(
+        select(models.user_branches.c.user_id, models.user_branches.c.branch_id)
+        .where(models.user_branches.c.user_id.in_(user_ids))
+    )
+    for user_id, branch_id in result.all():
+        scopes.setdefault(user_id, []).append(branch_id)
+    return scopes
+
+
+async def _load_users(db: AsyncSession, user_ids):
+    if not user_ids:
+        return [], {}
+    result = await db.execute(select(*USER_COLUMNS.values()).where(models.User.id.in_(user_ids)))
+    return result.all(), await _user_scopes(db, user_ids)
+
+
+def _user(user, branch_ids, branches):
+    return {
+        "email": user.email,
+        "name": user.name,
+        "role": user.role,
+        "id": user.id,
+        "branch_id": user.branch_id,
+        "all_branches": bool(user.all_branches),
+        "branch": branches.get(user.branch_id),
+        "branches": [branches[b] for b in branch_ids if b in branches],
+    }
+
+
+def _normalized_user(user, branch_ids):
+    return {
+        "email": user.email,
+        "name": user.name,
+        "role": user.role,
+        "id": user.id,
+        "branch_id": user.branch_id,
+        "all_branches": bool(user.all_branches),
+        "branch_ids": branch_ids,
+    }
+
+
+def _log(log):
+    return {name: getattr(log, name) for name in LOG_COLUMNS}
+
+
+def _category_name(item, categories):
+    category = categories.get(item.category_id)
+    return category["name"] if category else None
+
+
+def _accounting_value(item, categories):
+    category = categories.get(item.category_id)
+    return accounting_value(
+        item.invoice_value, item.purchase_date, category["depreciation_months"] if category else None
+    )
+
+
+def _getters(fields, columns, extra):
+    # (nome, função) de cada campo pedido, montados uma vez por página
+    getters = []
+    for name in fields:
+        if name in extra:
+            getters.append((name, extra[name]))
+        elif name in columns:
+            getters.append((name, lambda row, name=name: getattr(row, name)))
+    return getters
+
+
+async def _page_logs(db: AsyncSession, item_ids, include_archived=False):
+    query = select(*LOG_COLUMNS.values()).where(models.Log.item_id.in_(item_ids))
+    if include_archived:
+        # Itens arquivados levam os logs para archived_logs (mesmas colunas)
+        archived = models.ArchivedLog
+        query = union_all(query, select(*(getattr(archived, key) for key in LOG_COLUMNS)).where(
+            archived.item_id.in_(item_ids)
+        ))
+        result = await db.execute(query.order_by(query.selected_columns.id))
+    else:
+        result = await db.execute(query.order_by(models.Log.id))
+    return result.all()
+
+
+async def _item_rows(db: AsyncSession, fields, skip, limit, filters):
+    # Um statement por (campos, filtros ativos, ordenação), reaproveitado entre requisições.
+    # A chave de ordenação vem junto (sort_key) para montar o cursor da próxima página.
+    def build(apply, sort_key, item):
+        columns = [getattr(item, column.key) for column in _columns(fields, ITEM_COLUMNS, ITEM_DEPENDENCIES)]
+        columns.append(sort_key.label("sort_key"))
+        return apply(select(*columns)).offset(bindparam("skip")).limit(bindparam("limit"))
+
+    statement, params = crud.item_statement(("columns", fields), build, skip=skip, limit=limit, **filters)
+    return (await db.execute(statement, params)).all()
+
+
+async def item_list(db: AsyncSession, skip: int = 0, limit: int = 100, fields=None, **filters):
+    # Devolve (linhas, conteúdo): as linhas trazem id/sort_key para o cursor da próxima página
+    fields = fields or ITEM_FIELDS
+    wanted = set(fields)
+    items = await _item_rows(db, fields, skip, limit, filters)
+    if not items:
+        return items, []
+
+    branches = categories = suppliers = {}
+    if wanted & {"branch", "transfer_target_branch", "responsible", "logs"}:
+        branches = await _branches(db)
+    if wanted & {"category", "category_rel", "accounting_value"}:
+        categories = await _reference_map(db, reference_cache.CATEGORIES, models.Category, schemas.CategoryResponse)
+    if "supplier" in wanted:
+        suppliers = await _reference_map(db, reference_cache.SUPPLIERS, models.Supplier, schemas.SupplierResponse)
+
+    logs = await _page_logs(db, [item.id for item in items], filters.get("include_archived")) if "logs" in wanted else []
+    user_ids = {item.responsible_id for item in items if item.responsible_id} if "responsible" in wanted else set()
+    user_ids.update(log.user_id for log in logs if log.user_id)
+    users, scopes = await _load_users(db, user_ids)
+    users = {user.id: _user(user, scopes.get(user.id, []), branches) for user in users}
+
+    summaries = {
+        item.id: {"id": item.id, "description": item.description, "fixed_asset_number": item.fixed_asset_number}
+        for item in items
+    } if logs else {}
+    logs_by_item = {}
+    for log in logs:
+        row = _log(log)
+        row["user"] = users.get(log.user_id)
+        row["item"] = summaries[log.item_id]
+        logs_by_item.setdefault(log.item_id, []).append(row)
+
+    getters = _getters(fields, ITEM_COLUMNS, {
+        "category": lambda item: _category_name(item, categories),
+        "branch": lambda item: branches.get(item.branch_id),
+        "transfer_target_branch": lambda item: branches.get(item.transfer_target_branch_id),
+        "category_rel": lambda item: categories.get(item.category_id),
+        "supplier": lambda item: suppliers.get(item.supplier_id),
+        "responsible": lambda item: users.get(item.responsible_id),
+        "logs": lambda item: logs_by_item.get(item.id, []),
+        "accounting_value": lambda item: _accounting_value(item, categories),
+    })
+    return items, [{name: get(item) for name, get in getters} for item in items]
+
+
+def _normalized_fields(fields):
+    if fields is None:
+        return NORMALIZED_ITEM_FIELDS
+    names = {NORMALIZED_IDS.get(name, name) for name in fields}
+    return tuple(name for name in NORMALIZED_ITEM_FIELDS if name in names)
+
+
+async def normalized_item_list(db: AsyncSession, skip: int = 0, limit: int = 100, fields=None, **filters):
+    # Formato normalizado (?format=normalized): itens só com ids das entidades relacionadas
+    # e cada filial/categoria/fornecedor/usuário enviado uma única vez em `included`
+    fields = _normalized_fields(fields)
+    wanted = set(fields)
+    included = {"branches": {}, "categories": {}, "suppliers": {}, "users": {}}
+    items = await _item_rows(db, fields, skip, limit, filters)
+    if not items:
+        return items, {"items": [], "included": included}
+
+    categories = {}
+    if wanted & {"category", "category_id", "accounting_value"}:
+        categories = await _reference_map(db, reference_cache.CATEGORIES, models.Category, schemas.CategoryResponse)
+    if "category_id" in wanted:
+        included["categories"] = {c: categories[c] for c in {item.category_id for item in items} if c in categories}
+    if "supplier_id" in wanted:
+        suppliers = await _reference_map(db, reference_cache.SUPPLIERS, models.Supplier, schemas.SupplierResponse)
+        included["suppliers"] = {s: suppliers[s] for s in {item.supplier_id for item in items} if s in suppliers}
+
+    logs = await _page_logs(db, [item.id for item in items], filters.get("include_archived")) if "logs" in wanted else []
+    logs_by_item = {}
+    for log in logs:
+        logs_by_item.setdefault(log.item_id, []).append(_log(log))
+
+    user_ids = {item.responsible_id for item in items if item.responsible_id} if "responsible_id" in wanted else set()
+    user_ids.update(log.user_id for log in logs if log.user_id)
+    users, scopes = await _load_users(db, user_ids)
+
+    branch_ids = set()
+    for name in ("branch_id", "transfer_target_branch_id"):
+        if name in wanted:
+            branch_ids.update(getattr(item, name) for item in items)
+    for log in logs:
+        branch_ids.add(log.from_branch_id)
+        branch_ids.add(log.to_branch_id)
+    for user in users:
+        user_branch_ids = scopes.get(user.id, [])
+        included["users"][user.id] = _normalized_user(user, user_branch_ids)
+        branch_ids.add(user.branch_id)
+        branch_ids.update(user_branch_ids)
+    if branch_ids - {None}:
+        branches = await _branches(db)
+        included["branches"] = {b: branches[b] for b in branch_ids if b in branches}
+
+    getters = _getters(fields, ITEM_COLUMNS, {
+        "category": lambda item: _category_name(item, categories),
+        "logs": lambda item: logs_by_item.get(item.id, []),
+        "accounting_value": lambda item: _accounting_value(item, categories),
+    })
+    return items, {"items": [{name: get(item) for name, get in getters} for item in items], "included": included}
+
+
+async def log_list(db: AsyncSession, limit: int = 1000, fields=None, **filters):
+    # Devolve (linhas, conteúdo): as linhas trazem sempre id/timestamp para o cursor
+    fields = fields or LOG_FIELDS
+    wanted = set(fields)
+    query = crud._filter_logs(select(*_columns(fields, LOG_COLUMNS, LOG_DEPENDENCIES, "timestamp")), **filters)
+    logs = (await db.execute(query.limit(limit))).all()
+    if not logs:
+        return logs, []
+
+    users = summaries = {}
+    if "user" in wanted:
+        rows, scopes = await _load_users(db, {log.user_id for log in logs if log.user_id})
+        branches = await _branches(db) if rows else {}
+        users = {user.id: _user(user, scopes.get(user.id, []), branches) for user in rows}
+    if "item" in wanted:
+        result = await db.execute(
+            select(models.Item.id, models.Item.description, models.Item.fixed_asset_number)
+            .where(models.Item.id.in_({log.item_id for log in logs}))
+        )
+        summaries = {
+            item.id: {"id": item.id, "description": item.description, "fixed_asset_number": item.fixed_asset_number}
+            for item in result.all()
+        }
+
+    getters = _getters(fields, LOG_COLUMNS, {
+        "user": lambda log: users.get(log.user_id),
+        "item": lambda log: summaries.get(log.item_id),
+    })
+    return logs, [{name: get(log) for name, get in getters} for log in logs]
+
+
+async def user_list(db: AsyncSession, skip: int = 0, limit: int = 100, search: str = None, fields=None):
+    fields = fields or USER_FIELDS
+    wanted = set(fields)
+    query = crud._filter_users(select(*_columns(fields, USER_COLUMNS, USER_DEPENDENCIES)), search)
+    users = (await db.execute(query.offset(skip).limit(limit))).all()
+    if not users:
+        return []
+
+    branches = await _branches(db) if wanted & {"branch", "branches"} else {}
+    scopes = await _user_scopes(db, [user.id for user in users]) if "branches" in wanted else {}
+    getters = _getters(fields, USER_COLUMNS, {
+        "all_branches": lambda user: bool(user.all_branches),
+        "branch": lambda user: branches.get(user.branch_id),
+        "branches": lambda user: [branches[b] for b in scopes.get(user.id, []) if b in branches],
+    })
+    return [{name: get(user) for name, get in getters} for user in users]
@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+import logging
+import os
+import random
+import re
+import time
+from collections import deque
+from datetime import datetime, timezone
+from sqlalchemy import event
+from backend import metrics
+
+# Registro opcional de queries lentas. Desligado enquanto SLOW_QUERY_MS for 0.
+SLOW_QUERY_MS = float(os.getenv("SLOW_QUERY_MS", "0"))
+# Fração das queries lentas (somente SELECT, somente PostgreSQL) que ganham um EXPLAIN ANALYZE
+# (só EXPLAIN para SELECT ... FOR UPDATE/SHARE)
+SLOW_QUERY_EXPLAIN_SAMPLE_RATE = float(os.getenv("SLOW_QUERY_EXPLAIN_SAMPLE_RATE", "0.1"))
+SLOW_QUERY_BUFFER_SIZE = int(os.getenv("SLOW_QUERY_BUFFER_SIZE", "200"))
+
+logger = logging.getLogger(__name__)
+
+# Ring buffer com as últimas queries lentas deste worker
+recent = deque(maxlen=SLOW_QUERY_BUFFER_SIZE)
+# EXPLAINs em andamento: o event loop só guarda referência fraca das tasks
+_explain_tasks = set()
+
+_WHITESPACE = re.compile(r"\s+")
+_STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL = re.compile(r"\b\d+(?:\.\d+)?\b")
+# SELECT ... FOR UPDATE/SHARE (SKIP LOCKED): EXPLAIN ANALYZE executaria a query de novo e
+# pegaria (ou esperaria) os mesmos locks de linha da requisição; esses ganham só EXPLAIN
+_ROW_LOCKING = re.compile(r"\bFOR\s+(?:NO\s+KEY\s+)?(?:UPDATE|SHARE|KEY\s+SHARE)\b|\bSKIP\s+LOCKED\b", re.IGNORECASE)
+_PLACEHOLDER_LIST = re.compile(r"\(\s*(?:\?|\$\d+|%s|%\(\w+\)s|:\w+)(?:\s*,\s*(?:\?|\$\d+|%s|%\(\w+\)s|:\w+))+\s*\)")
+
+def normalize_sql(statement: str) -> str:
+    # Agrupa variações do mesmo formato de query (listas IN de tamanhos diferentes, literais)
+    sql = _WHITESPACE.sub(" ", statement).strip()
+    sql = _PLACEHOLDER_LIST.sub("(...)", sql)
+    sql = _STRING_LITERAL.sub("?", sql)
+    return _NUMBER_LITERAL.sub("?", sql)
+
+def explain_prefix(statement: str) -> str:
+    if _ROW_LOCKING.search(statement):
+        return "EXPLAIN "
+    return "EXPLAIN (ANALYZE, BUFFERS) "
+
+def params_hash(parameters) -> str:
+    return hashlib.sha1(repr(parameters).encode("utf-8")).hexdigest()[:12]
+
+def _current_route():
+    stats = metrics.current_request_metrics()
+    if stats is None or stats.scope is None:
+        return None, None
+    return stats.scope.get("method"), metrics.current_route(stats.scope)
+
+async def _capture_explain(async_engine, entry, statement, parameters):
+    # Conexão separada e transação descartada: o EXPLAIN ANALYZE não interfere
+    # na transação da requisição nem aumenta a latência dela
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execution_options(slow_query_explain=True)
+            result = await conn.exec_driver_sql(explain_prefix(statement) + statement, parameters)
+            entry["explain"] = "\n".join(row[0] for row in result.all())
+            await conn.rollback()
+    except Exception as e:
+        entry["explain"] = f"EXPLAIN falhou: {e}"
+
+def install(async_engine):
+    sync_engine = async_engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("slow_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration_ms = (time.perf_counter() - conn.info["slow_query_start"].pop()) * 1000
+        if duration_ms < SLOW_QUERY_MS or conn.get_execution_options().get("slow_query_explain"):
+            return
+
+        method, route = _current_route()
+        entry = {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "duration_ms": round(duration_ms, 2),
+            "method": method,
+            "route": route,
+            "sql": normalize_sql(statement),
+            "params_hash": params_hash(parameters),
+            "explain": None,
+        }
+        recent.append(entry)
+        logger.warning(
+            "Slow query (%.1f ms) %s %s params=%s: %s",
+            duration_ms, method or "-", route or "-", entry["params_hash"], entry["sql"]
+        )
+
+        if (
+            conn.dialect.name == "postgresql"
+            and not executemany
+            and statement.lstrip()[:6].upper() == "SELECT"
+            and random.random() < SLOW_QUERY_EXPLAIN_SAMPLE_RATE
+        ):
+            try:
+                task = asyncio.get_running_loop().create_task(
+                    _capture_explain(async_engine, entry, statement, parameters)
+                )
+                _explain_tasks.add(task)
+                task.add_done_callback(_explain_tasks.discard)
+            except RuntimeError:
+                # Fora de um event loop (scripts síncronos): registra sem EXPLAIN
+                pass
+
+def enable(*async_engines):
+    if SLOW_QUERY_MS <= 0:
+        return
+    for async_engine in {id(e): e for e in async_engines}.values():
+        install(async_engine)
@@ -19,4 +19,13 @@ echo "Migrations finished."
 # Iniciar o servidor
 # Note: Host 0.0.0.0 allows external access. Port 8000 is the internal container port.
 # External mapping is handled by Docker Compose (8001:8000).
-uvicorn backend.main:app --host 0.0.0.0 --port 8000 --reload
+# APP_ENV=production: sem reloader, com WEB_CONCURRENCY workers e seed executado uma única vez aqui.
+# Qualquer outro valor mantém o modo de desenvolvimento (--reload, seed no startup da aplicação).
+if [ "${APP_ENV:-development}" = "production" ]; then
+  echo "Seeding initial data..."
+  python3 -m backend.initial_data
+  export SEED_ON_STARTUP=false
+  exec uvicorn backend.main:app --host 0.0.0.0 --port 8000 --workers "${WEB_CONCURRENCY:-2}"
+else
+  exec uvicorn backend.main:app --host 0.0.0.0 --port 8000 --reload
+fi
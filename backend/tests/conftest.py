@@ -0,0 +1,108 @@
+import os
+
+# auth.py exige SECRET_KEY no import
+os.environ.setdefault("SECRET_KEY", "test-secret-key")
+
+import asyncio
+from datetime import datetime
+import pytest
+
+pytest.importorskip("aiosqlite")
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+from backend import models
+from backend.models import Base
+
+
+def make_sqlite_sessionmaker(path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+
+    async def create_all():
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+
+    asyncio.run(create_all())
+    return engine, sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False, autoflush=False)
+
+
+@pytest.fixture
+def sqlite_engine(tmp_path):
+    engine, session_factory = make_sqlite_sessionmaker(tmp_path / "primary.db")
+    yield engine, session_factory
+    asyncio.run(engine.dispose())
+
+
+@pytest.fixture
+def sqlite_db(sqlite_engine):
+    return sqlite_engine[1]
+
+
+@pytest.fixture
+def statements(sqlite_engine):
+    """Lista com os SQLs executados no banco de teste (para contar round trips)."""
+    executed = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(sqlite_engine[0].sync_engine, "before_cursor_execute", before_cursor_execute)
+    yield executed
+    event.remove(sqlite_engine[0].sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+async def _seed(session_factory):
+    async with session_factory() as db:
+        branches = [models.Branch(name="Sede"), models.Branch(name="Filial 2")]
+        category = models.Category(name="Eletrônicos", depreciation_months=60)
+        supplier = models.Supplier(name="Fornecedor", cnpj="00.000.000/0001-00")
+        admin = models.User(email="admin", name="Admin", hashed_password="x", role=models.UserRole.ADMIN)
+        operator = models.User(email="operador", name="Operador", hashed_password="x", role=models.UserRole.OPERATOR)
+        operator.branches = [branches[0]]
+        db.add_all(branches + [category, supplier, admin, operator])
+        await db.flush()
+        for i in range(10):
+            db.add(models.Item(
+                description=f"Notebook {i}",
+                category_id=category.id,
+                purchase_date=datetime(2024, 1 + i % 12, 10),
+                invoice_value=1000.0 + i,
+                invoice_number=f"NF-{i}",
+                fixed_asset_number=f"PAT-{i}",
+                branch_id=branches[i % 2].id,
+                supplier_id=supplier.id,
+                responsible_id=admin.id,
+                status=models.ItemStatus.APPROVED if i % 3 else models.ItemStatus.PENDING,
+            ))
+        await db.commit()
+
+
+@pytest.fixture
+def client(sqlite_engine):
+    """TestClient com get_db/get_read_db apontando para um SQLite já populado."""
+    from fastapi.testclient import TestClient
+    from backend.main import app
+    from backend.database import get_db, get_read_db
+    from backend.metrics import instrument_engine
+    from backend import reference_cache, result_cache
+
+    engine, sqlite_db = sqlite_engine
+    reference_cache.clear()
+    result_cache.clear()
+    instrument_engine(engine.sync_engine)
+    asyncio.run(_seed(sqlite_db))
+
+    async def override_get_db():
+        async with sqlite_db() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_read_db] = override_get_db
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+def auth_headers(email="admin"):
+    from backend.auth import create_access_token
+    return {"Authorization": f"Bearer {create_access_token({'sub': email})}"}
@@ -0,0 +1,66 @@
+import asyncio
+from backend import models
+from backend.routers import approvals
+from conftest import auth_headers
+
+
+def _add_approver(sqlite_engine):
+    async def add():
+        async with sqlite_engine[1]() as db:
+            db.add(models.User(email="aprovador", name="Aprovador", hashed_password="x", role=models.UserRole.APPROVER))
+            await db.commit()
+
+    asyncio.run(add())
+
+
+def _claim(client, email, **params):
+    response = client.post("/approvals/claim", params=params, headers=auth_headers(email))
+    assert response.status_code == 200, response.text
+    return [item["id"] for item in response.json()["items"]]
+
+
+def test_approvers_claim_disjoint_batches_and_decide_only_their_own(client, sqlite_engine):
+    _add_approver(sqlite_engine)
+    # Pendentes do seed: 1, 4, 7, 10
+    assert _claim(client, "admin", limit=2) == [1, 4]
+    assert _claim(client, "aprovador", limit=10) == [7, 10]
+    # Chamar de novo renova o mesmo lote
+    assert _claim(client, "admin", limit=2) == [1, 4]
+
+    response = client.post("/approvals/1/decision?status_update=APPROVED", headers=auth_headers("aprovador"))
+    assert response.status_code == 409
+    # A rota antiga respeita a reserva da mesma forma
+    response = client.put("/items/7/status?status_update=APPROVED", headers=auth_headers("admin"))
+    assert response.status_code == 409
+
+    # Baixa não é decisão possível para um item pendente de aprovação
+    response = client.post("/approvals/1/decision?status_update=WRITTEN_OFF", headers=auth_headers("admin"))
+    assert response.status_code == 409
+
+    response = client.post("/approvals/1/decision?status_update=APPROVED", headers=auth_headers("admin"))
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "APPROVED"
+
+    # Já decidido: uma segunda decisão não sobrescreve a primeira
+    response = client.post("/approvals/1/decision?status_update=REJECTED", headers=auth_headers("admin"))
+    assert response.status_code == 409
+    assert _claim(client, "admin", limit=2) == [4]
+
+
+def test_expired_and_released_claims_go_back_to_the_queue(client, sqlite_engine, monkeypatch):
+    _add_approver(sqlite_engine)
+    monkeypatch.setattr(approvals, "APPROVAL_LEASE_SECONDS", -1)
+    assert _claim(client, "admin", limit=2) == [1, 4]
+    # Reserva vencida: outro aprovador pode pegar
+    assert _claim(client, "aprovador", limit=1) == [1]
+
+    monkeypatch.setattr(approvals, "APPROVAL_LEASE_SECONDS", 300)
+    assert _claim(client, "aprovador", limit=3) == [1, 4, 7]
+    response = client.post("/approvals/release?item_ids=4&item_ids=7", headers=auth_headers("aprovador"))
+    assert response.json() == {"released": 2}
+    assert _claim(client, "admin", limit=2) == [4, 7]
+
+
+def test_operators_cannot_use_the_queue(client):
+    response = client.post("/approvals/claim", headers=auth_headers("operador"))
+    assert response.status_code == 403
@@ -0,0 +1,46 @@
+import asyncio
+from sqlalchemy import insert
+from backend import models
+from conftest import auth_headers
+
+
+async def _grant(session_factory, user_email, branch_id):
+    async with session_factory() as db:
+        user = (await db.execute(models.User.__table__.select().where(models.User.email == user_email))).first()
+        await db.execute(insert(models.user_branches).values(user_id=user.id, branch_id=branch_id))
+        await db.commit()
+
+
+def _item_selects(statements):
+    return [s for s in statements if s.startswith("SELECT") and "FROM items" in s and "user_branches.user_id" in s]
+
+
+def test_scope_uses_same_statement_for_any_number_of_branches(client, sqlite_engine, statements):
+    _, session_factory = sqlite_engine
+
+    statements.clear()
+    one = client.get("/items/", params={"fields": "branch_id"}, headers=auth_headers("operador")).json()
+    one_branch_sql = _item_selects(statements)
+    assert {item["branch_id"] for item in one} == {1}
+
+    asyncio.run(_grant(session_factory, "operador", 2))
+    statements.clear()
+    both = client.get("/items/", params={"fields": "branch_id"}, headers=auth_headers("operador")).json()
+    assert {item["branch_id"] for item in both} == {1, 2}
+    # Mesmo SQL (só muda o id do usuário nos parâmetros), sem lista IN por filial
+    assert one_branch_sql and _item_selects(statements) == one_branch_sql
+
+
+def test_dashboard_scope_includes_legacy_branch(client, sqlite_engine):
+    _, session_factory = sqlite_engine
+
+    async def set_legacy_branch():
+        async with session_factory() as db:
+            await db.execute(
+                models.User.__table__.update().where(models.User.email == "operador").values(branch_id=2)
+            )
+            await db.commit()
+
+    asyncio.run(set_legacy_branch())
+    stats = client.get("/dashboard/stats", headers=auth_headers("operador")).json()
+    assert {row["branch_id"] for row in stats["items_by_branch"]} == {1, 2}
@@ -0,0 +1,71 @@
+import asyncio
+import gzip
+from datetime import datetime
+import pytest
+from sqlalchemy import update
+from backend import compression, models
+from conftest import auth_headers
+
+
+async def _backdate_items(session_factory):
+    # SQLite grava now() com resolução de segundos; afasta created_at do updated_at da edição
+    async with session_factory() as db:
+        await db.execute(update(models.Item).values(created_at=datetime(2024, 1, 1), updated_at=None))
+        await db.commit()
+
+
+def test_item_list_revalidates_with_etag(client, sqlite_engine, statements):
+    asyncio.run(_backdate_items(sqlite_engine[1]))
+    first = client.get("/items/", params={"limit": 50}, headers=auth_headers())
+    etag = first.headers["etag"]
+    assert etag.startswith('W/"')
+
+    statements.clear()
+    cached = client.get("/items/", params={"limit": 50}, headers={**auth_headers(), "If-None-Match": etag})
+    assert cached.status_code == 304
+    # Sem carregar os itens: só autenticação e o resumo da página
+    assert not [s for s in statements if s.startswith("SELECT items.id, items.description")]
+
+    # Outros filtros, outro ETag
+    other = client.get("/items/", params={"limit": 50, "status": "PENDING"}, headers=auth_headers())
+    assert other.headers["etag"] != etag
+
+    client.put("/items/2/status?status_update=REJECTED", headers=auth_headers())
+    changed = client.get("/items/", params={"limit": 50}, headers={**auth_headers(), "If-None-Match": etag})
+    assert changed.status_code == 200
+
+
+def test_user_and_log_lists_carry_etags(client):
+    for path in ("/users/", "/logs/", "/logs/summary"):
+        response = client.get(path, headers=auth_headers())
+        assert response.status_code == 200
+        again = client.get(path, headers={**auth_headers(), "If-None-Match": response.headers["etag"]})
+        assert again.status_code == 304, path
+
+    etag = client.get("/users/", headers=auth_headers()).headers["etag"]
+    client.post("/users/", json={"email": "novo@x.com", "name": "Novo", "password": "123456", "role": "OPERATOR"},
+                headers=auth_headers())
+    assert client.get("/users/", headers={**auth_headers(), "If-None-Match": etag}).status_code == 200
+
+
+def test_large_json_is_gzipped_and_small_is_not(client):
+    large = client.get("/items/", headers={**auth_headers(), "Accept-Encoding": "gzip"})
+    assert large.headers["content-encoding"] == "gzip"
+    assert "Accept-Encoding" in large.headers["vary"]
+    assert large.json()[0]["id"]
+
+    small = client.get("/health", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in small.headers
+
+
+def test_brotli_preferred_when_available(client):
+    if compression.brotli is None:
+        pytest.skip("brotli não instalado")
+    response = client.get("/items/", headers={**auth_headers(), "Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+
+
+def test_choose_encoding_respects_quality():
+    assert compression.choose_encoding("gzip;q=0, identity") is None
+    assert compression.choose_encoding("deflate, gzip;q=0.5") == "gzip"
+    assert gzip.decompress(compression.compress(b"x" * 2000, "gzip")) == b"x" * 2000
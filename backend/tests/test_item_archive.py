@@ -0,0 +1,96 @@
+import asyncio
+from datetime import datetime, timezone
+from sqlalchemy import update, select, func
+from backend import models
+from backend.jobs import item_archive, inventory_snapshot
+from conftest import auth_headers
+
+
+async def _write_off(session_factory, descriptions, updated_at):
+    async with session_factory() as db:
+        await db.execute(
+            update(models.Item).where(models.Item.description.in_(descriptions))
+            .values(status=models.ItemStatus.WRITTEN_OFF, updated_at=updated_at)
+        )
+        item_ids = (await db.execute(
+            select(models.Item.id).where(models.Item.description.in_(descriptions))
+        )).scalars().all()
+        for item_id in item_ids:
+            db.add(models.Log(item_id=item_id, user_id=1, action="Baixa", to_status=models.ItemStatus.WRITTEN_OFF))
+        await db.commit()
+
+
+async def _count(session_factory, model):
+    async with session_factory() as db:
+        return (await db.execute(select(func.count()).select_from(model))).scalar()
+
+
+def test_old_written_off_items_move_to_archive_with_their_logs(client, sqlite_engine, monkeypatch):
+    engine, session_factory = sqlite_engine
+    monkeypatch.setattr(item_archive, "engine", engine)
+    asyncio.run(_write_off(session_factory, ["Notebook 0", "Notebook 3"], datetime(2020, 1, 1, tzinfo=timezone.utc)))
+    asyncio.run(_write_off(session_factory, ["Notebook 6"], datetime.now(timezone.utc)))
+
+    assert asyncio.run(item_archive.run(after_days=365, batch_size=1)) == {"items": 2, "logs": 2}
+    assert asyncio.run(_count(session_factory, models.ArchivedItem)) == 2
+    assert asyncio.run(_count(session_factory, models.ArchivedLog)) == 2
+    assert asyncio.run(_count(session_factory, models.Log)) == 1
+
+    live = client.get("/items/", headers=auth_headers()).json()
+    assert sorted(item["description"] for item in live) == [f"Notebook {i}" for i in (1, 2, 4, 5, 6, 7, 8, 9)]
+
+    everything = client.get(
+        "/items/", params={"include_archived": "true", "sort": "description"}, headers=auth_headers()
+    ).json()
+    assert [item["description"] for item in everything] == [f"Notebook {i}" for i in range(10)]
+    archived = next(item for item in everything if item["description"] == "Notebook 3")
+    assert archived["status"] == "WRITTEN_OFF"
+    assert archived["branch"]["name"] == "Filial 2"
+    assert [log["action"] for log in archived["logs"]] == ["Baixa"]
+
+    facets = client.get("/items/facets", params={"include_archived": "true"}, headers=auth_headers()).json()
+    assert facets["status"]["WRITTEN_OFF"] == 3
+    assert client.get("/items/facets", headers=auth_headers()).json()["status"]["WRITTEN_OFF"] == 1
+
+
+def test_as_of_before_the_write_off_still_sees_archived_items(client, sqlite_engine, monkeypatch):
+    engine, session_factory = sqlite_engine
+    monkeypatch.setattr(item_archive, "engine", engine)
+    monkeypatch.setattr(inventory_snapshot, "engine", engine)
+    written_off_at = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    async def write_off_with_event():
+        # Item 4 (Notebook 3, Filial 2, PENDING) criado em 2019 e baixado em 2020
+        async with session_factory() as db:
+            await db.execute(update(models.Item).values(created_at=datetime(2019, 1, 1, tzinfo=timezone.utc)))
+            await db.execute(
+                update(models.Item).where(models.Item.id == 4)
+                .values(status=models.ItemStatus.WRITTEN_OFF, updated_at=written_off_at)
+            )
+            db.add(models.Log(
+                item_id=4, user_id=1, action="Baixa", timestamp=written_off_at,
+                event_type=models.LogEventType.WRITE_OFF_APPROVED,
+                from_status=models.ItemStatus.PENDING, to_status=models.ItemStatus.WRITTEN_OFF,
+                from_branch_id=2,
+            ))
+            await db.commit()
+
+    asyncio.run(inventory_snapshot.take_snapshot(taken_at=datetime(2019, 6, 1, tzinfo=timezone.utc)))
+    asyncio.run(write_off_with_event())
+    assert asyncio.run(item_archive.run(after_days=365))["items"] == 1
+
+    def as_of(at):
+        response = client.get("/items/as-of", params={"date": at.isoformat()}, headers=auth_headers())
+        assert response.status_code == 200, response.text
+        return {item["id"]: item for item in response.json()}
+
+    # Antes da baixa: o item arquivado ainda aparece, pendente e na Filial 2
+    before = as_of(datetime(2019, 12, 1, tzinfo=timezone.utc))
+    assert len(before) == 10
+    assert (before[4]["status"], before[4]["branch_id"]) == ("PENDING", 2)
+    assert as_of(datetime(2020, 6, 1, tzinfo=timezone.utc))[4]["status"] == "WRITTEN_OFF"
+
+    filial = client.get(
+        "/branches/2/inventory-as-of", params={"date": "2019-12-01T00:00:00+00:00"}, headers=auth_headers()
+    ).json()
+    assert 4 in {item["id"] for item in filial}
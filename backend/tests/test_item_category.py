@@ -0,0 +1,63 @@
+from conftest import auth_headers
+
+
+def _create(client, **data):
+    form = {
+        "description": "Monitor",
+        "purchase_date": "2024-05-10T00:00:00",
+        "invoice_value": "900",
+        "invoice_number": "NF-100",
+        "branch_id": "1",
+        **data,
+    }
+    return client.post("/items/", data=form, headers=auth_headers())
+
+
+def test_category_name_resolves_from_cache(client, statements):
+    client.post("/categories/", json={"name": "Móveis", "depreciation_months": 120}, headers=auth_headers())
+    client.get("/categories/", headers=auth_headers())
+
+    statements.clear()
+    response = _create(client, category="Móveis")
+    assert response.status_code == 200, response.text
+    assert response.json()["category"] == "Móveis"
+    assert response.json()["category_rel"]["depreciation_months"] == 120
+    # Nome resolvido pelo cache: nenhum SELECT por nome na tabela de categorias
+    assert not [s for s in statements if "FROM categories" in s and "categories.name =" in s]
+
+    assert _create(client, category="Inexistente").status_code == 400
+
+
+def test_update_and_filters_use_category_id(client):
+    category_id = client.post("/categories/", json={"name": "Móveis"}, headers=auth_headers()).json()["id"]
+
+    response = client.put("/items/1", json={"category": "Móveis"}, headers=auth_headers())
+    assert response.status_code == 200, response.text
+    assert response.json()["category"] == "Móveis"
+    assert response.json()["category_rel"]["id"] == category_id
+
+    by_name = client.get("/items/", params={"category": "Móveis", "fields": "category"}, headers=auth_headers())
+    by_id = client.get("/items/", params={"category_id": category_id, "fields": "category"}, headers=auth_headers())
+    assert by_name.json() == by_id.json() == [{"id": 1, "category": "Móveis"}]
+
+    stats = client.get("/dashboard/stats", headers=auth_headers()).json()
+    counts = {row["category"]: (row["category_id"], row["count"]) for row in stats["items_by_category"]}
+    assert counts["Móveis"] == (category_id, 1)
+    assert counts["Eletrônicos"][1] == 9
+
+
+def test_unknown_or_missing_category_is_rejected(client):
+    assert _create(client, category_id="999").status_code == 400
+    response = _create(client)
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Categoria é obrigatória"
+
+    def category_of_first_item():
+        response = client.get("/items/", params={"fields": "category_id", "limit": 1}, headers=auth_headers())
+        return response.json()[0]["category_id"]
+
+    before = category_of_first_item()
+    assert before is not None
+    response = client.put("/items/1", json={"category_id": 999}, headers=auth_headers())
+    assert response.status_code == 400
+    assert category_of_first_item() == before
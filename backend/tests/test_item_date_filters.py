@@ -0,0 +1,44 @@
+import pytest
+from fastapi import HTTPException
+from datetime import datetime
+from backend.routers.items import partial_date_range
+from conftest import auth_headers
+
+# Seed: Notebook i comprado em 10/(1 + i % 12)/2024
+
+
+def _ids(client, **params):
+    response = client.get("/items/", params={**params, "fields": "id"}, headers=auth_headers())
+    assert response.status_code == 200, response.text
+    return sorted(item["id"] for item in response.json())
+
+
+@pytest.mark.parametrize("value, expected", [
+    ("2024", (datetime(2024, 1, 1), datetime(2025, 1, 1))),
+    ("2024-12", (datetime(2024, 12, 1), datetime(2025, 1, 1))),
+    ("2024-03-10", (datetime(2024, 3, 10), datetime(2024, 3, 11))),
+    ("03/2024", (datetime(2024, 3, 1), datetime(2024, 4, 1))),
+    ("10/03/2024", (datetime(2024, 3, 10), datetime(2024, 3, 11))),
+])
+def test_partial_date_range(value, expected):
+    assert partial_date_range(value) == expected
+
+
+@pytest.mark.parametrize("value", ["2024-13", "31/02/2024", "2024-0", "ontem"])
+def test_partial_date_range_rejects_invalid(value):
+    with pytest.raises(HTTPException):
+        partial_date_range(value)
+
+
+def test_purchase_date_filters(client):
+    assert _ids(client, purchase_date="2024-03") == [3]
+    assert _ids(client, purchase_date="2024") == list(range(1, 11))
+    assert _ids(client, purchase_date_from="2024-02-01", purchase_date_to="2024-04-10") == [2, 3]
+    # Atalho combinado com limite explícito
+    assert _ids(client, purchase_date="2024", purchase_date_from="2024-09-01") == [9, 10]
+    assert client.get("/items/", params={"purchase_date": "março"}, headers=auth_headers()).status_code == 400
+
+
+def test_created_at_filters(client):
+    assert _ids(client, created_at_from="2000-01-01T00:00:00Z") == list(range(1, 11))
+    assert _ids(client, created_at_to="2000-01-01") == []
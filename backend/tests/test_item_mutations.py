@@ -0,0 +1,64 @@
+from conftest import auth_headers
+
+# Round trips esperados por escrita, incluindo a autenticação do usuário:
+# auth (2) + item com relacionamentos (4) + UPDATE do item + INSERT do log.
+# Antes, cada escrita recarregava o item após o commit (20-30 statements).
+MAX_STATEMENTS = 8
+
+
+def test_create_item_with_attachment_uses_fixed_round_trips(client, statements):
+    statements.clear()
+    response = client.post(
+        "/items/",
+        data={
+            "description": "Monitor",
+            "category": "Eletrônicos",
+            "purchase_date": "2024-05-10T00:00:00",
+            "invoice_value": "900",
+            "invoice_number": "NF-100",
+            "branch_id": "1",
+        },
+        files={"file": ("nota fiscal.pdf", b"%PDF-1.4", "application/pdf")},
+        headers=auth_headers(),
+    )
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["invoice_file"] == "uploads/nota_fiscal.pdf"
+    assert body["branch"]["name"] == "Sede"
+    assert body["category_rel"]["name"] == "Eletrônicos"
+    assert len([s for s in statements if s.startswith("INSERT INTO items")]) == 1
+    assert not [s for s in statements if s.startswith("UPDATE items")]
+    assert len(statements) <= MAX_STATEMENTS
+
+
+def test_status_transfer_and_write_off_use_fixed_round_trips(client, statements):
+    statements.clear()
+    response = client.post("/items/2/transfer?target_branch_id=1", headers=auth_headers())
+    assert response.status_code == 200, response.text
+    assert response.json()["transfer_target_branch"]["name"] == "Sede"
+    assert len(statements) <= MAX_STATEMENTS
+
+    statements.clear()
+    response = client.put("/items/2/status?status_update=APPROVED", headers=auth_headers())
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["branch"]["name"] == "Sede"
+    assert body["transfer_target_branch"] is None
+    assert [log["user"]["email"] for log in body["logs"]] == ["admin", "admin"]
+    assert len(statements) <= MAX_STATEMENTS
+
+    statements.clear()
+    response = client.post("/items/3/write-off", data={"justification": "Quebrado"}, headers=auth_headers())
+    assert response.status_code == 200, response.text
+    assert response.json()["status"] == "WRITE_OFF_PENDING"
+    assert len(statements) <= MAX_STATEMENTS
+
+
+def test_update_item_keeps_relationships_in_sync(client, statements):
+    statements.clear()
+    response = client.put("/items/1", json={"description": "Notebook novo"}, headers=auth_headers())
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["description"] == "Notebook novo"
+    assert body["updated_at"] is not None
+    assert len(statements) <= MAX_STATEMENTS
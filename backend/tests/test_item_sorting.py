@@ -0,0 +1,51 @@
+from conftest import auth_headers
+
+
+def _pages(client, params, limit):
+    ids, cursor = [], None
+    while True:
+        page_params = {**params, "limit": limit, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/items/", params=page_params, headers=auth_headers())
+        assert response.status_code == 200
+        ids += [item["id"] for item in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            return ids
+
+
+def test_sort_orders_items_and_keyset_pages_follow_the_same_order(client):
+    for sort, key in (
+        ("description", lambda item: item["description"]),
+        ("purchase_date", lambda item: item["purchase_date"]),
+        ("invoice_value", lambda item: item["invoice_value"]),
+        ("accounting_value", lambda item: item["accounting_value"]),
+        ("branch", lambda item: item["branch"]["name"]),
+    ):
+        for order in ("asc", "desc"):
+            items = client.get("/items/", params={"sort": sort, "order": order}, headers=auth_headers()).json()
+            expected = sorted(items, key=lambda item: (key(item), item["id"]), reverse=order == "desc")
+            assert [item["id"] for item in items] == [item["id"] for item in expected], (sort, order)
+            assert _pages(client, {"sort": sort, "order": order}, limit=3) == [item["id"] for item in items]
+
+
+def test_invalid_sort_or_cursor_is_rejected(client):
+    assert client.get("/items/", params={"sort": "observations"}, headers=auth_headers()).status_code == 400
+    assert client.get("/items/", params={"order": "up"}, headers=auth_headers()).status_code == 400
+    assert client.get("/items/", params={"cursor": "nope"}, headers=auth_headers()).status_code == 400
+
+
+def test_facets_count_items_for_current_filters_and_scope(client):
+    response = client.get("/items/facets", headers=auth_headers())
+    assert response.status_code == 200
+    facets = response.json()
+    assert facets["status"] == {"APPROVED": 6, "PENDING": 4}
+    assert sorted(facets["branch_id"].values()) == [5, 5]
+    assert list(facets["category_id"].values()) == [10]
+
+    filtered = client.get("/items/facets", params={"status": "PENDING"}, headers=auth_headers()).json()
+    assert filtered["status"] == {"PENDING": 4}
+    assert sum(filtered["supplier_id"].values()) == 4
+
+    # Operador só vê a própria filial
+    scoped = client.get("/items/facets", headers=auth_headers("operador")).json()
+    assert list(scoped["branch_id"].values()) == [5]
@@ -0,0 +1,36 @@
+import pytest
+from backend import crud
+from conftest import auth_headers
+
+
+def test_same_filter_combination_reuses_statement_with_new_values():
+    first, params = crud.item_statement("items", crud._items_page, skip=0, limit=10, status="APPROVED", search="note")
+    second, other = crud.item_statement("items", crud._items_page, skip=20, limit=5, search="mouse", status="PENDING")
+    assert first is second
+    assert params == {"skip": 0, "limit": 10, "status": "APPROVED", "search": "%note%"}
+    assert other == {"skip": 20, "limit": 5, "status": "PENDING", "search": "%mouse%"}
+
+    # Filtro vazio não conta como ativo
+    unfiltered, _ = crud.item_statement("items", crud._items_page, status="", search=None)
+    assert unfiltered is not first
+    assert unfiltered is crud.item_statement("items", crud._items_page)[0]
+
+
+def test_unknown_filter_is_rejected():
+    with pytest.raises(TypeError):
+        crud.item_statement("items", crud._items_page, colour="red")
+
+
+def test_repeated_item_queries_hit_compiled_cache(client):
+    for search in ("Notebook 1", "Notebook 2"):
+        response = client.get("/items/", params={"search": search}, headers=auth_headers())
+        assert response.status_code == 200
+        assert [item["description"] for item in response.json()] == [search]
+
+    body = client.get("/metrics").text
+    assert "# TYPE db_compiled_cache_total counter" in body
+    hits = next(
+        line for line in body.splitlines()
+        if line.startswith('db_compiled_cache_total{method="GET",route="/items/",result="hit"}')
+    )
+    assert float(hits.split()[-1]) >= 1
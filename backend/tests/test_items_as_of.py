@@ -0,0 +1,56 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import update
+from backend import models
+from backend.jobs import inventory_snapshot
+from conftest import auth_headers
+
+
+async def _backdate_items(session_factory, created_at):
+    async with session_factory() as db:
+        await db.execute(update(models.Item).values(created_at=created_at))
+        await db.commit()
+
+
+def _branch_of(client, item_id, at):
+    response = client.get("/items/as-of", params={"date": at.isoformat(), "limit": 100}, headers=auth_headers())
+    assert response.status_code == 200, response.text
+    return {item["id"]: item for item in response.json()}[item_id]["branch_id"]
+
+
+def test_as_of_combines_snapshot_and_later_events(client, sqlite_engine, monkeypatch):
+    engine, session_factory = sqlite_engine
+    now = datetime.now(timezone.utc)
+    asyncio.run(_backdate_items(session_factory, now - timedelta(days=30)))
+    monkeypatch.setattr(inventory_snapshot, "engine", engine)
+
+    snapshot_at = now - timedelta(days=1)
+    assert asyncio.run(inventory_snapshot.take_snapshot(taken_at=snapshot_at))["items"] == 10
+
+    # Item 2 (Filial 2) transferido para a Sede depois da foto
+    client.post("/items/2/transfer?target_branch_id=1", headers=auth_headers())
+    client.put("/items/2/status?status_update=APPROVED", headers=auth_headers())
+
+    later = datetime.now(timezone.utc) + timedelta(seconds=5)
+    assert _branch_of(client, 2, later) == 1
+    # Na foto e antes dela (sem foto anterior: estado antes do primeiro evento posterior)
+    assert _branch_of(client, 2, snapshot_at) == 2
+    assert _branch_of(client, 2, now - timedelta(days=10)) == 2
+
+    sede = client.get(
+        "/branches/1/inventory-as-of", params={"date": later.isoformat()}, headers=auth_headers()
+    ).json()
+    assert 2 in {item["id"] for item in sede}
+
+    # Itens criados depois da data não aparecem
+    before_items = client.get(
+        "/items/as-of", params={"date": (now - timedelta(days=60)).isoformat()}, headers=auth_headers()
+    ).json()
+    assert before_items == []
+
+
+def test_operator_cannot_read_other_branch_history(client):
+    response = client.get(
+        "/branches/2/inventory-as-of", params={"date": "2024-01-01T00:00:00"}, headers=auth_headers("operador")
+    )
+    assert response.status_code == 403
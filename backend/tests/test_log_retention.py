@@ -0,0 +1,48 @@
+import asyncio
+import csv
+import gzip
+from datetime import datetime, timezone
+from backend import models
+from backend.jobs import log_retention
+from conftest import auth_headers
+
+
+async def _add_logs(session_factory, timestamps):
+    async with session_factory() as db:
+        for i, ts in enumerate(timestamps):
+            db.add(models.Log(item_id=1, user_id=1, action=f"log {i}", timestamp=ts))
+        await db.commit()
+
+
+def test_old_logs_are_archived_and_removed(client, sqlite_engine, tmp_path, monkeypatch):
+    engine, session_factory = sqlite_engine
+    monkeypatch.setattr(log_retention, "engine", engine)
+    asyncio.run(_add_logs(session_factory, [
+        datetime(2015, 3, 1, tzinfo=timezone.utc),
+        datetime(2015, 4, 1, tzinfo=timezone.utc),
+        datetime.now(timezone.utc),
+    ]))
+
+    archived = asyncio.run(log_retention.run(retention_months=24, archive_dir=str(tmp_path / "archive")))
+
+    assert [a["rows"] for a in archived] == [2]
+    with gzip.open(archived[0]["file"], "rt") as f:
+        rows = list(csv.DictReader(f))
+    assert [r["action"] for r in rows] == ["log 0", "log 1"]
+
+    remaining = client.get("/logs/", headers=auth_headers()).json()
+    assert [log["action"] for log in remaining] == ["log 2"]
+
+
+def test_logs_can_be_read_by_time_range(client, sqlite_engine):
+    asyncio.run(_add_logs(sqlite_engine[1], [
+        datetime(2024, 1, 15, tzinfo=timezone.utc),
+        datetime(2024, 2, 15, tzinfo=timezone.utc),
+        datetime(2024, 3, 15, tzinfo=timezone.utc),
+    ]))
+
+    response = client.get(
+        "/logs/", params={"start": "2024-02-01T00:00:00", "end": "2024-03-01T00:00:00"}, headers=auth_headers()
+    )
+    assert response.status_code == 200
+    assert [log["action"] for log in response.json()] == ["log 1"]
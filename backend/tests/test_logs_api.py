@@ -0,0 +1,82 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from backend import models
+from conftest import auth_headers
+
+
+async def _add_logs(session_factory):
+    async with session_factory() as db:
+        base = datetime(2024, 5, 1, tzinfo=timezone.utc)
+        for i in range(7):
+            # Dois logs por instante para exercitar o desempate por id
+            db.add(models.Log(
+                item_id=1 + i % 2, user_id=1 + i % 2, from_branch_id=1 + i % 2,
+                action="Status changed to ItemStatus.APPROVED" if i % 2 else "Item created",
+                timestamp=base + timedelta(hours=i // 2),
+            ))
+        await db.commit()
+
+
+def test_keyset_pages_cover_every_log_once(client, sqlite_engine):
+    asyncio.run(_add_logs(sqlite_engine[1]))
+
+    seen, cursor = [], None
+    while True:
+        params = {"limit": 3, **({"cursor": cursor} if cursor else {})}
+        response = client.get("/logs/", params=params, headers=auth_headers())
+        assert response.status_code == 200
+        seen += [log["id"] for log in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if not cursor:
+            break
+
+    assert seen == list(range(7, 0, -1))
+
+
+def test_summary_view_applies_filters(client, sqlite_engine, statements):
+    asyncio.run(_add_logs(sqlite_engine[1]))
+    statements.clear()
+
+    response = client.get(
+        "/logs/summary", params={"item_id": 2, "action": "status changed"}, headers=auth_headers()
+    )
+
+    assert response.status_code == 200
+    logs = response.json()
+    assert [log["id"] for log in logs] == [6, 4, 2]
+    assert logs[0]["user_id"] == 2 and logs[0]["user_email"]
+    assert logs[0]["item_description"] == "Notebook 1"
+    # Autenticação (2) + versões de referência + resumo para o ETag + a própria projeção,
+    # sem carregar usuários/filiais dos logs
+    assert len(statements) == 5
+
+
+def test_branch_filter_and_invalid_cursor(client, sqlite_engine):
+    asyncio.run(_add_logs(sqlite_engine[1]))
+
+    # Item 1 está na Sede (branch 1), item 2 na Filial 2
+    response = client.get("/logs/", params={"branch_id": 1}, headers=auth_headers())
+    assert {log["item_id"] for log in response.json()} == {1}
+
+    response = client.get("/logs/", params={"cursor": "nada"}, headers=auth_headers())
+    assert response.status_code == 400
+
+
+def test_operators_cannot_read_logs(client):
+    assert client.get("/logs/summary", headers=auth_headers("operador")).status_code == 403
+
+
+def test_item_workflow_emits_structured_events(client):
+    client.post("/items/2/transfer?target_branch_id=1", headers=auth_headers())
+    client.put("/items/2/status?status_update=APPROVED", headers=auth_headers())
+    client.post("/items/3/write-off", data={"justification": "Quebrado"}, headers=auth_headers())
+
+    transfers = client.get(
+        "/logs/summary", params={"event_type": "TRANSFER_APPROVED", "branch_id": 1}, headers=auth_headers()
+    ).json()
+    assert len(transfers) == 1
+    assert transfers[0]["from_branch_id"] == 2 and transfers[0]["to_branch_id"] == 1
+    assert transfers[0]["from_status"] == "TRANSFER_PENDING" and transfers[0]["to_status"] == "APPROVED"
+
+    write_offs = client.get("/logs/", params={"event_type": "WRITE_OFF_REQUESTED"}, headers=auth_headers()).json()
+    assert [log["justification"] for log in write_offs] == ["Quebrado"]
@@ -0,0 +1,18 @@
+from conftest import auth_headers
+
+
+def test_items_request_reports_server_timing_and_prometheus_metrics(client):
+    response = client.get("/items/", headers=auth_headers())
+    assert response.status_code == 200
+    timing = response.headers["server-timing"]
+    assert timing.startswith("app;dur=")
+    assert "queries" in timing and "ser;dur=" in timing
+
+    body = client.get("/metrics").text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_requests_total{method="GET",route="/items/",status="200"}' in body
+    count_line = next(
+        line for line in body.splitlines()
+        if line.startswith('db_statements_per_request_sum{method="GET",route="/items/"}')
+    )
+    assert float(count_line.split()[-1]) >= 1
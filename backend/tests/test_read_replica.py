@@ -0,0 +1,121 @@
+import asyncio
+from starlette.requests import Request
+from starlette.responses import Response
+from sqlalchemy.future import select
+from backend import database, models
+from conftest import make_sqlite_sessionmaker
+
+
+def _request(token):
+    return Request({"type": "http", "headers": [(b"authorization", f"Bearer {token}".encode())]})
+
+
+async def _branch_names(request):
+    gen = database.get_read_db(request)
+    session = await gen.__anext__()
+    result = await session.execute(select(models.Branch.name))
+    names = [row[0] for row in result.all()]
+    await gen.aclose()
+    return names
+
+
+def test_reads_go_to_replica_until_the_client_writes(tmp_path, monkeypatch):
+    primary_engine, primary = make_sqlite_sessionmaker(tmp_path / "primary.db")
+    replica_engine, replica = make_sqlite_sessionmaker(tmp_path / "replica.db")
+    monkeypatch.setattr(database, "SessionLocal", primary)
+    monkeypatch.setattr(database, "ReadSessionLocal", replica)
+    monkeypatch.setattr(database, "read_engine", replica_engine)
+    monkeypatch.setattr(database, "_recent_writes", {})
+
+    async def scenario():
+        # Escrita pelo cliente "a" no principal (a réplica ainda não recebeu)
+        gen = database.get_db(_request("a"))
+        session = await gen.__anext__()
+        session.add(models.Branch(name="Filial Nova"))
+        await session.commit()
+        await gen.aclose()
+
+        return await _branch_names(_request("a")), await _branch_names(_request("b"))
+
+    own_read, other_read = asyncio.run(scenario())
+    assert own_read == ["Filial Nova"]
+    assert other_read == []
+
+    asyncio.run(primary_engine.dispose())
+    asyncio.run(replica_engine.dispose())
+
+
+def test_without_replica_reads_use_primary(sqlite_db, monkeypatch):
+    monkeypatch.setattr(database, "SessionLocal", sqlite_db)
+    monkeypatch.setattr(database, "read_engine", database.engine)
+
+    async def scenario():
+        async with sqlite_db() as session:
+            session.add(models.Branch(name="Sede"))
+            await session.commit()
+        return await _branch_names(_request("x"))
+
+    assert asyncio.run(scenario()) == ["Sede"]
+
+
+def test_signed_write_marker_pins_reads_on_other_workers(tmp_path, monkeypatch):
+    primary_engine, primary = make_sqlite_sessionmaker(tmp_path / "primary.db")
+    replica_engine, replica = make_sqlite_sessionmaker(tmp_path / "replica.db")
+    monkeypatch.setattr(database, "SessionLocal", primary)
+    monkeypatch.setattr(database, "ReadSessionLocal", replica)
+    monkeypatch.setattr(database, "read_engine", replica_engine)
+    monkeypatch.setattr(database, "_recent_writes", {})
+
+    def request(token, marker=None):
+        headers = [(b"authorization", f"Bearer {token}".encode())]
+        if marker:
+            headers.append((database.READ_AFTER_WRITE_HEADER.lower().encode(), marker.encode()))
+        return Request({"type": "http", "headers": headers})
+
+    async def scenario():
+        response = Response()
+        gen = database.get_db(request("a"), response)
+        session = await gen.__anext__()
+        session.add(models.Branch(name="Filial Nova"))
+        await session.commit()
+        await gen.aclose()
+        marker = response.headers[database.READ_AFTER_WRITE_HEADER]
+
+        # Outro worker: não viu a escrita em memória, só o header reenviado pelo cliente
+        database._recent_writes.clear()
+        return (
+            await _branch_names(request("a", marker)),
+            await _branch_names(request("b", marker)),
+            await _branch_names(request("a", marker[:-1] + ("1" if marker.endswith("0") else "0"))),
+        )
+
+    own_read, other_client, tampered = asyncio.run(scenario())
+    assert own_read == ["Filial Nova"]
+    assert other_client == [] and tampered == []
+
+    asyncio.run(primary_engine.dispose())
+    asyncio.run(replica_engine.dispose())
+
+
+def test_write_responses_carry_the_marker(sqlite_db, monkeypatch):
+    # get_db real (o fixture `client` o substitui): o FastAPI injeta o Response da rota
+    from fastapi import Depends, FastAPI
+    from fastapi.testclient import TestClient
+
+    monkeypatch.setattr(database, "SessionLocal", sqlite_db)
+    app = FastAPI()
+
+    @app.post("/write")
+    async def write(db=Depends(database.get_db)):
+        db.add(models.Branch(name="Sede"))
+        await db.commit()
+        return {}
+
+    @app.get("/read")
+    async def read(db=Depends(database.get_db)):
+        return {}
+
+    client = TestClient(app)
+    headers = {"Authorization": "Bearer a"}
+    assert database.READ_AFTER_WRITE_HEADER in client.post("/write", headers=headers).headers
+    assert database.READ_AFTER_WRITE_HEADER not in client.get("/read", headers=headers).headers
@@ -0,0 +1,132 @@
+import asyncio
+from fastapi import Request
+from sqlalchemy import update
+from backend import database, models, result_cache
+from conftest import auth_headers, make_sqlite_sessionmaker
+
+
+def _item_selects(statements):
+    return [s for s in statements if s.startswith("SELECT") and "FROM items" in s]
+
+
+def test_concurrent_identical_calls_share_one_execution():
+    result_cache.clear()
+    calls = 0
+
+    async def compute():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"count": calls}
+
+    async def burst():
+        return await asyncio.gather(*[result_cache.get_or_compute("test", ("a",), compute) for _ in range(5)])
+
+    results = asyncio.run(burst())
+    assert calls == 1
+    assert all(result == {"count": 1} for result in results)
+    assert result_cache.stats == {("test", "miss"): 1, ("test", "merge"): 4}
+
+    # Dentro do TTL sai do cache; depois de invalidate() executa de novo
+    assert asyncio.run(result_cache.get_or_compute("test", ("a",), compute)) == {"count": 1}
+    result_cache.invalidate()
+    assert asyncio.run(result_cache.get_or_compute("test", ("a",), compute)) == {"count": 2}
+    assert result_cache.stats[("test", "hit")] == 1
+
+
+def test_failed_execution_is_not_cached():
+    result_cache.clear()
+
+    async def fail():
+        raise RuntimeError("banco fora")
+
+    for _ in range(2):
+        try:
+            asyncio.run(result_cache.get_or_compute("test", ("b",), fail))
+        except RuntimeError:
+            pass
+    assert result_cache.stats == {("test", "miss"): 2}
+
+
+def test_dashboard_is_cached_until_an_item_changes(client, statements):
+    first = client.get("/dashboard/stats", headers=auth_headers())
+    assert first.status_code == 200
+
+    statements.clear()
+    assert client.get("/dashboard/stats", headers=auth_headers()).json() == first.json()
+    assert not _item_selects(statements)
+
+    # Item pendente (id 4) aprovado: a mutação invalida o cache
+    response = client.put("/items/4/status?status_update=APPROVED", headers=auth_headers())
+    assert response.status_code == 200, response.text
+    refreshed = client.get("/dashboard/stats", headers=auth_headers()).json()
+    assert refreshed["pending_items_count"] == first.json()["pending_items_count"] - 1
+
+
+def test_item_pages_are_cached_per_scope_and_exported(client, statements):
+    admin = client.get("/items/", headers=auth_headers())
+    statements.clear()
+    # Escopo diferente (operador só vê a Sede): entrada própria
+    operator = client.get("/items/", headers=auth_headers("operador"))
+    assert operator.status_code == 200
+    assert len(operator.json()) < len(admin.json())
+    assert _item_selects(statements)
+
+    statements.clear()
+    assert client.get("/items/", headers=auth_headers("operador")).json() == operator.json()
+    assert not _item_selects(statements)
+
+    metrics = client.get("/metrics").text
+    assert 'result_cache_requests_total{endpoint="items",result="hit"} 1' in metrics
+    assert 'result_cache_requests_total{endpoint="items",result="miss"} 2' in metrics
+
+
+def test_replica_results_are_not_served_to_reads_pinned_to_the_primary(client, sqlite_engine, tmp_path, monkeypatch):
+    from backend.main import app
+
+    # Réplica atrasada: ainda sem nenhum item
+    replica_engine, replica = make_sqlite_sessionmaker(tmp_path / "replica.db")
+    monkeypatch.setattr(database, "read_engine", replica_engine)
+
+    async def read_db(request: Request):
+        # "x-primary" faz o papel do read-after-write do get_read_db
+        factory = sqlite_engine[1] if request.headers.get("x-primary") else replica
+        async with factory() as session:
+            yield session
+
+    app.dependency_overrides[database.get_read_db] = read_db
+    stale = client.get("/dashboard/stats", headers=auth_headers()).json()
+    fresh = client.get("/dashboard/stats", headers={**auth_headers(), "x-primary": "1"}).json()
+    assert stale["pending_items_count"] == 0
+    assert fresh["pending_items_count"] == 4
+
+    stale_items = client.get("/items/", headers=auth_headers()).json()
+    fresh_items = client.get("/items/", headers={**auth_headers(), "x-primary": "1"}).json()
+    assert stale_items == [] and len(fresh_items) == 10
+    asyncio.run(replica_engine.dispose())
+
+
+def test_writer_on_another_worker_bypasses_this_workers_cache(client, sqlite_engine):
+    headers = auth_headers()
+    warm = client.get("/dashboard/stats", headers=headers).json()
+    client.get("/items/", params={"status": "PENDING"}, headers=headers)
+
+    async def approve_elsewhere():
+        # Outro worker aprova o item 4: este processo não vê a escrita nem invalida o cache
+        async with sqlite_engine[1]() as db:
+            await db.execute(
+                update(models.Item).where(models.Item.id == 4).values(status=models.ItemStatus.APPROVED)
+            )
+            await db.commit()
+
+    asyncio.run(approve_elsewhere())
+    # Quem não escreveu continua recebendo a entrada em cache até o TTL
+    assert client.get("/dashboard/stats", headers=headers).json() == warm
+
+    # Quem escreveu traz a marca do outro worker (X-Last-Write) e lê direto do banco
+    writer = {**headers, database.READ_AFTER_WRITE_HEADER: database.write_marker(headers["Authorization"])}
+    fresh = client.get("/dashboard/stats", headers=writer).json()
+    assert fresh["pending_items_count"] == warm["pending_items_count"] - 1
+    pending = client.get("/items/", params={"status": "PENDING"}, headers=writer).json()
+    assert 4 not in {item["id"] for item in pending}
+    assert result_cache.stats[("dashboard.stats", "bypass")] == 1
@@ -0,0 +1,74 @@
+import asyncio
+import json
+from typing import List
+from pydantic import TypeAdapter
+from backend import crud, schemas, serializers
+from conftest import auth_headers
+
+
+async def _pydantic_items(session_factory, **filters):
+    async with session_factory() as db:
+        items = await crud.get_items(db, limit=100, **filters)
+        adapter = TypeAdapter(List[schemas.ItemResponse])
+        return json.loads(adapter.dump_json(adapter.validate_python(items)))
+
+
+def test_fast_item_list_matches_item_response(client, sqlite_engine):
+    _, session_factory = sqlite_engine
+    # Transferência pendente (transfer_target_branch) e logs com usuário/item
+    client.post("/items/2/transfer?target_branch_id=1", headers=auth_headers())
+    client.post("/items/3/write-off", data={"justification": "Quebrado"}, headers=auth_headers())
+
+    response = client.get("/items/", headers=auth_headers())
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/json"
+    assert "etag" in response.headers
+
+    expected = asyncio.run(_pydantic_items(session_factory))
+    by_id = lambda rows: {row["id"]: row for row in rows}
+    assert by_id(response.json()) == by_id(expected)
+    assert any(item["logs"] for item in response.json())
+
+
+def test_fast_item_list_respects_branch_scope(client, sqlite_engine):
+    _, session_factory = sqlite_engine
+    response = client.get("/items/", headers=auth_headers("operador"))
+    assert response.status_code == 200
+    branches = {item["branch_id"] for item in response.json()}
+    assert branches and branches <= {1}
+
+
+def test_dumps_formats_utc_like_pydantic():
+    from datetime import datetime, timezone
+    body = serializers.dumps({"at": datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc)})
+    assert json.loads(body) == {"at": "2024-01-02T03:04:05Z"}
+
+
+def test_normalized_item_list_side_loads_each_entity_once(client):
+    client.post("/items/2/transfer?target_branch_id=1", headers=auth_headers())
+    embedded = {item["id"]: item for item in client.get("/items/", headers=auth_headers()).json()}
+
+    response = client.get("/items/", params={"format": "normalized"}, headers=auth_headers())
+    assert response.status_code == 200
+    body = schemas.NormalizedItemList.model_validate(response.json())
+    assert {b.id for b in body.included.branches.values()} == {1, 2}
+    assert len(body.included.categories) == 1 and len(body.included.users) == 1
+
+    # Reconstruindo a partir dos ids chega-se ao mesmo conteúdo do formato padrão
+    included = response.json()["included"]
+    for item in response.json()["items"]:
+        full = embedded[item["id"]]
+        assert included["branches"][str(item["branch_id"])] == full["branch"]
+        assert included["categories"][str(item["category_id"])] == full["category_rel"]
+        assert included["suppliers"][str(item["supplier_id"])] == full["supplier"]
+        assert included["users"][str(item["responsible_id"])]["email"] == full["responsible"]["email"]
+        assert item["accounting_value"] == full["accounting_value"]
+        assert [log["id"] for log in item["logs"]] == [log["id"] for log in full["logs"]]
+
+    assert client.get("/items/", params={"format": "xml"}, headers=auth_headers()).status_code == 400
+
+
+def test_formats_have_distinct_etags(client):
+    embedded = client.get("/items/", headers=auth_headers())
+    normalized = client.get("/items/", params={"format": "normalized"}, headers=auth_headers())
+    assert embedded.headers["etag"] != normalized.headers["etag"]
@@ -0,0 +1,38 @@
+from backend import slow_queries
+
+
+def test_normalize_sql_groups_in_lists_and_literals():
+    a = slow_queries.normalize_sql("SELECT *\n  FROM items WHERE branch_id IN ($1, $2, $3) AND id > 10")
+    b = slow_queries.normalize_sql("SELECT * FROM items WHERE branch_id IN ($1, $2) AND id > 99")
+    assert a == b == "SELECT * FROM items WHERE branch_id IN (...) AND id > ?"
+
+
+def test_row_locking_selects_are_not_explain_analyzed():
+    assert slow_queries.explain_prefix("SELECT id FROM items ORDER BY id") == "EXPLAIN (ANALYZE, BUFFERS) "
+    for statement in (
+        "SELECT items.id FROM items WHERE items.id = $1 FOR UPDATE OF items",
+        "SELECT items.id FROM items ORDER BY items.id LIMIT $1 FOR UPDATE SKIP LOCKED",
+        "SELECT id FROM items for share",
+        "SELECT id FROM items FOR NO KEY UPDATE",
+    ):
+        assert slow_queries.explain_prefix(statement) == "EXPLAIN "
+
+
+def test_slow_statements_are_recorded(sqlite_engine, monkeypatch):
+    import asyncio
+    from sqlalchemy import text
+
+    engine, _ = sqlite_engine
+    monkeypatch.setattr(slow_queries, "SLOW_QUERY_MS", 0.0001)
+    slow_queries.recent.clear()
+    slow_queries.install(engine)
+
+    async def run():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT count(*) FROM items WHERE description = :d"), {"d": "x"})
+
+    asyncio.run(run())
+    entry = slow_queries.recent[-1]
+    assert entry["sql"] == "SELECT count(*) FROM items WHERE description = ?"
+    assert entry["explain"] is None  # EXPLAIN só no PostgreSQL
+    assert len(entry["params_hash"]) == 12
@@ -0,0 +1,63 @@
+import asyncio
+import json
+from typing import List
+from pydantic import TypeAdapter
+from backend import crud, schemas
+from conftest import auth_headers
+
+
+async def _pydantic(session_factory, load, schema):
+    async with session_factory() as db:
+        rows = await load(db)
+        adapter = TypeAdapter(List[schema])
+        return json.loads(adapter.dump_json(adapter.validate_python(rows)))
+
+
+def test_item_fields_narrow_response_and_queries(client, statements):
+    client.post("/items/2/transfer?target_branch_id=1", headers=auth_headers())
+    statements.clear()
+
+    response = client.get(
+        "/items/", params={"fields": "description,branch,status,accounting_value"}, headers=auth_headers()
+    )
+    assert response.status_code == 200
+    # Autenticação (2) + versões + fingerprint + itens + filiais + categorias; sem logs nem usuários
+    assert len(statements) == 7
+    assert not any("FROM logs" in sql or "FROM users" in sql for sql in statements[2:])
+
+    items = response.json()
+    assert set(items[0]) == {"id", "description", "branch", "status", "accounting_value"}
+    full = {item["id"]: item for item in client.get("/items/", headers=auth_headers()).json()}
+    for item in items:
+        assert item == {key: full[item["id"]][key] for key in item}
+
+
+def test_invalid_field_is_rejected(client):
+    response = client.get("/items/", params={"fields": "description,hashed_password"}, headers=auth_headers())
+    assert response.status_code == 400
+    assert "hashed_password" in response.json()["detail"]
+
+
+def test_log_fields_and_full_output(client, sqlite_engine):
+    _, session_factory = sqlite_engine
+    client.put("/items/1/status?status_update=APPROVED", headers=auth_headers())
+
+    full = client.get("/logs/", headers=auth_headers()).json()
+    expected = asyncio.run(_pydantic(session_factory, crud.get_all_logs, schemas.LogResponse))
+    assert full == expected and full[0]["user"]["email"] == "admin"
+
+    sparse = client.get("/logs/", params={"fields": "action,item"}, headers=auth_headers()).json()
+    assert sparse == [{"id": log["id"], "action": log["action"], "item": log["item"]} for log in full]
+
+
+def test_user_fields_and_full_output(client, sqlite_engine):
+    _, session_factory = sqlite_engine
+    by_id = lambda rows: {row["id"]: row for row in rows}
+    full = by_id(client.get("/users/", headers=auth_headers()).json())
+    expected = asyncio.run(_pydantic(session_factory, crud.get_users, schemas.UserResponse))
+    assert full == by_id(expected)
+
+    sparse = client.get("/users/", params={"fields": "email,branches"}, headers=auth_headers()).json()
+    assert by_id(sparse) == {
+        u["id"]: {"id": u["id"], "email": u["email"], "branches": u["branches"]} for u in full.values()
+    }
@@ -22,12 +22,19 @@ const api = axios.create({
     baseURL: baseURL,
 });
 
+// Marca assinada da última escrita (X-Last-Write): reenviada para que qualquer worker do
+// backend leia do banco principal logo depois de uma escrita nossa
+let lastWrite: string | null = null;
+
 api.interceptors.request.use(
     (config) => {
         const token = localStorage.getItem('token');
         if (token) {
             config.headers.Authorization = `Bearer ${token}`;
         }
+        if (lastWrite) {
+            config.headers['X-Last-Write'] = lastWrite;
+        }
         return config;
     },
     (error) => {
@@ -36,13 +43,26 @@ api.interceptors.request.use(
 );
 
 api.interceptors.response.use(
-    (response) => response,
+    (response) => {
+        const marker = response.headers['x-last-write'];
+        if (marker) {
+            lastWrite = marker;
+        }
+        return response;
+    },
     (error) => {
         if (error.response && error.response.status === 401) {
             // Token expired or invalid, logout user
             localStorage.removeItem('token');
             window.location.href = '/login';
         }
+        // Servidor saturado (controle de admissão): repete leituras uma vez após o Retry-After
+        const config = error.config as (typeof error.config & { retried429?: boolean }) | undefined;
+        if (error.response && error.response.status === 429 && config && config.method === 'get' && !config.retried429) {
+            config.retried429 = true;
+            const seconds = Math.min(Number(error.response.headers['retry-after']) || 1, 10);
+            return new Promise((resolve) => setTimeout(resolve, seconds * 1000)).then(() => api(config));
+        }
         return Promise.reject(error);
     }
 );
@@ -10,6 +10,10 @@ import * as XLSX from 'xlsx';
 import jsPDF from 'jspdf';
 import autoTable from 'jspdf-autotable';
 
+// Filtro de data de compra só vai ao backend quando estiver completo (ano, ano-mês ou data)
+const PARTIAL_DATE = /^(\d{4}(-\d{1,2}(-\d{1,2})?)?|(\d{1,2}\/)?\d{1,2}\/\d{4})$/;
+const isPartialDate = (value: string) => PARTIAL_DATE.test(value.trim());
+
 const StatusBadge = ({ status }: { status: string }) => {
     const map: any = {
         PENDING: { label: 'Pendente', class: 'bg-yellow-50 text-yellow-700 border-yellow-200 ring-yellow-600/20' },
@@ -73,14 +77,22 @@ const Inventory: React.FC = () => {
     const [filterFixedAsset, setFilterFixedAsset] = useState('');
     const [filterPurchaseDate, setFilterPurchaseDate] = useState('');
     const [globalSearch, setGlobalSearch] = useState('');
+    // Itens baixados e arquivados (archived_items) só aparecem quando pedidos
+    const [includeArchived, setIncludeArchived] = useState(false);
+
+    // Ordenação no servidor (sort/order de /items/) e contagens por filtro (/items/facets)
+    const [sortBy, setSortBy] = useState('');
+    const [sortOrder, setSortOrder] = useState<'asc' | 'desc'>('asc');
+    const [facets, setFacets] = useState<any>({ status: {}, branch_id: {}, category_id: {}, supplier_id: {} });
 
     // Debounce Logic helper
     useEffect(() => {
         const timer = setTimeout(() => {
             fetchItems(globalSearch, 0);
+            fetchFacets();
         }, 500);
         return () => clearTimeout(timer);
-    }, [filterDescription, filterCategory, filterBranch, filterFixedAsset, filterPurchaseDate, globalSearch]); // Trigger on filter change
+    }, [filterDescription, filterCategory, filterBranch, filterFixedAsset, filterPurchaseDate, globalSearch, sortBy, sortOrder, includeArchived]); // Trigger on filter change
 
     // Sync URL params with local state on load
     useEffect(() => {
@@ -91,26 +103,38 @@ const Inventory: React.FC = () => {
         if (br) setFilterBranch(br);
     }, []);
 
+    const filterParams = (search?: string) => {
+        const statusFilter = searchParams.get('status');
+        // We use local state for other filters now, but respect URL status
+
+        const params: any = {
+            search: search !== undefined ? search : globalSearch,
+        };
+
+        if (statusFilter) params.status = statusFilter;
+
+        // Apply column filters
+        if (filterCategory) params.category = filterCategory;
+        if (filterBranch) params.branch_id = filterBranch;
+        if (filterDescription) params.description = filterDescription;
+        if (filterFixedAsset) params.fixed_asset_number = filterFixedAsset;
+        if (isPartialDate(filterPurchaseDate)) params.purchase_date = filterPurchaseDate.trim();
+        if (includeArchived) params.include_archived = true;
+        if (sortBy) {
+            params.sort = sortBy;
+            params.order = sortOrder;
+        }
+        return params;
+    };
+
     const fetchItems = async (search?: string, pageNum: number = 0) => {
         try {
-            const statusFilter = searchParams.get('status');
-            // We use local state for other filters now, but respect URL status
-
             const params: any = {
-                search: search !== undefined ? search : globalSearch,
+                ...filterParams(search),
                 skip: pageNum * LIMIT,
                 limit: LIMIT
             };
 
-            if (statusFilter) params.status = statusFilter;
-
-            // Apply column filters
-            if (filterCategory) params.category = filterCategory;
-            if (filterBranch) params.branch_id = filterBranch;
-            if (filterDescription) params.description = filterDescription;
-            if (filterFixedAsset) params.fixed_asset_number = filterFixedAsset;
-            if (filterPurchaseDate) params.purchase_date = filterPurchaseDate;
-
             const response = await api.get('/items/', { params });
 
             if (pageNum === 0) {
@@ -131,6 +155,35 @@ const Inventory: React.FC = () => {
         }
     };
 
+    const fetchFacets = async () => {
+        try {
+            // Ordenação não muda as contagens
+            const params = filterParams();
+            delete params.sort;
+            delete params.order;
+            const response = await api.get('/items/facets', { params });
+            setFacets(response.data);
+        } catch (error) {
+            console.error("Erro ao carregar contagens", error);
+        }
+    }
+
+    const toggleSort = (field: string) => {
+        if (sortBy === field) {
+            setSortOrder(sortOrder === 'asc' ? 'desc' : 'asc');
+        } else {
+            setSortBy(field);
+            setSortOrder('asc');
+        }
+    };
+
+    const sortHeader = (field: string, label: string) => (
+        <button type="button" onClick={() => toggleSort(field)} className="inline-flex items-center gap-1 uppercase tracking-wider font-semibold hover:text-slate-700">
+            {label}
+            {sortBy === field && <span>{sortOrder === 'asc' ? '▲' : '▼'}</span>}
+        </button>
+    );
+
     const fetchBranches = async () => {
         try {
             const response = await api.get('/branches/');
@@ -172,17 +225,10 @@ const Inventory: React.FC = () => {
 
     // Export Logic
     const getAllFilteredItems = async () => {
-        const statusFilter = searchParams.get('status');
         const params: any = {
-            search: globalSearch,
+            ...filterParams(),
             skip: 0,
             limit: 100000, // Large limit for export
-            status: statusFilter || undefined,
-            category: filterCategory || undefined,
-            branch_id: filterBranch || undefined,
-            description: filterDescription || undefined,
-            fixed_asset_number: filterFixedAsset || undefined,
-            purchase_date: filterPurchaseDate || undefined
         };
         const response = await api.get('/items/', { params });
         return response.data;
@@ -453,6 +499,11 @@ const Inventory: React.FC = () => {
                         />
                     </div>
 
+                    <label className="flex items-center gap-2 text-sm text-slate-600 whitespace-nowrap">
+                        <input type="checkbox" checked={includeArchived} onChange={(e) => setIncludeArchived(e.target.checked)} />
+                        Incluir arquivados
+                    </label>
+
                     <div className="relative">
                         <button
                             onClick={() => setIsExportMenuOpen(!isExportMenuOpen)}
@@ -497,20 +548,26 @@ const Inventory: React.FC = () => {
                             <tr>
                                 <th className="px-6 py-4 min-w-[200px]">
                                     <div className="flex flex-col gap-2">
-                                        <span>Descrição</span>
+                                        {sortHeader('description', 'Descrição')}
                                         <input type="text" placeholder="Filtrar..." className="w-full px-2 py-1 text-xs border border-slate-200 rounded font-normal normal-case bg-white" value={filterDescription} onChange={e => setFilterDescription(e.target.value)} />
                                     </div>
                                 </th>
                                 <th className="px-6 py-4 min-w-[150px]">
                                      <div className="flex flex-col gap-2">
                                         <span>Categoria</span>
-                                        <input type="text" placeholder="Filtrar..." className="w-full px-2 py-1 text-xs border border-slate-200 rounded font-normal normal-case bg-white" value={filterCategory} onChange={e => setFilterCategory(e.target.value)} />
+                                        <select className="w-full px-2 py-1 text-xs border border-slate-200 rounded font-normal normal-case bg-white" value={filterCategory} onChange={e => setFilterCategory(e.target.value)}>
+                                            <option value="">Todas</option>
+                                            {categories.map(cat => <option key={cat.id} value={cat.name}>{cat.name} ({facets.category_id[cat.id] || 0})</option>)}
+                                        </select>
                                     </div>
                                 </th>
                                 <th className="px-6 py-4 min-w-[150px]">
                                      <div className="flex flex-col gap-2">
-                                        <span>Filial</span>
-                                        <input type="text" placeholder="Filtrar..." className="w-full px-2 py-1 text-xs border border-slate-200 rounded font-normal normal-case bg-white" value={filterBranch} onChange={e => setFilterBranch(e.target.value)} />
+                                        {sortHeader('branch', 'Filial')}
+                                        <select className="w-full px-2 py-1 text-xs border border-slate-200 rounded font-normal normal-case bg-white" value={filterBranch} onChange={e => setFilterBranch(e.target.value)}>
+                                            <option value="">Todas</option>
+                                            {branches.map(branch => <option key={branch.id} value={branch.id}>{branch.name} ({facets.branch_id[branch.id] || 0})</option>)}
+                                        </select>
                                     </div>
                                 </th>
                                 <th className="px-6 py-4 min-w-[130px]">
@@ -521,13 +578,13 @@ const Inventory: React.FC = () => {
                                 </th>
                                 <th className="px-6 py-4 min-w-[130px]">
                                      <div className="flex flex-col gap-2">
-                                        <span>Data Compra</span>
-                                        <input type="text" placeholder="Filtrar..." className="w-full px-2 py-1 text-xs border border-slate-200 rounded font-normal normal-case bg-white" value={filterPurchaseDate} onChange={e => setFilterPurchaseDate(e.target.value)} />
+                                        {sortHeader('purchase_date', 'Data Compra')}
+                                        <input type="text" placeholder="AAAA, AAAA-MM ou DD/MM/AAAA" className="w-full px-2 py-1 text-xs border border-slate-200 rounded font-normal normal-case bg-white" value={filterPurchaseDate} onChange={e => setFilterPurchaseDate(e.target.value)} />
                                     </div>
                                 </th>
-                                <th className="px-6 py-4">Valor Compra</th>
-                                <th className="px-6 py-4">Valor Contábil</th>
-                                <th className="px-6 py-4">Status</th>
+                                <th className="px-6 py-4">{sortHeader('invoice_value', 'Valor Compra')}</th>
+                                <th className="px-6 py-4">{sortHeader('accounting_value', 'Valor Contábil')}</th>
+                                <th className="px-6 py-4">{sortHeader('status', 'Status')}</th>
                                 <th className="px-6 py-4 text-right">Ações</th>
                             </tr>
                         </thead>
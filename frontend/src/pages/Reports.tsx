@@ -401,7 +401,9 @@ const Reports: React.FC = () => {
 
             // Strategy 1: Items Base
             if (['A.1', 'A.2', 'A.3', 'A.4', 'A.5', 'A.7', 'A.9', 'B.1', 'B.2', 'B.5', 'B.6', 'B.7', 'B.9', 'B.10', 'C.5', 'C.6', 'D.1', 'D.3', 'F.4'].includes(reportId)) {
-                const response = await api.get('/items/?limit=10000');
+                // Relatórios agrupados por filial/categoria já vêm ordenados do servidor
+                const sort = ({ 'A.2': 'branch', 'A.3': 'category' } as Record<string, string>)[reportId];
+                const response = await api.get('/items/', { params: { limit: 10000, sort } });
                 const items = response.data;
 
                 if (reportId === 'A.1') {
@@ -411,11 +413,11 @@ const Reports: React.FC = () => {
                         "Data Compra": formatDate(i.purchase_date), NF: i.invoice_number
                     }));
                 } else if (reportId === 'A.2') {
-                    data = items.sort((a: any, b: any) => (a.branch?.name || '').localeCompare(b.branch?.name || '')).map((i: any) => ({
+                    data = items.map((i: any) => ({
                         Filial: i.branch?.name, "Ativo Fixo": i.fixed_asset_number, Descrição: i.description, Categoria: i.category, "Valor Compra": formatCurrency(i.invoice_value), "Valor Contábil": formatCurrency(i.accounting_value)
                     }));
                 } else if (reportId === 'A.3') {
-                     data = items.sort((a: any, b: any) => (a.category || '').localeCompare(b.category || '')).map((i: any) => ({
+                     data = items.map((i: any) => ({
                         Categoria: i.category, "Ativo Fixo": i.fixed_asset_number, Descrição: i.description, Filial: i.branch?.name, "Valor Compra": formatCurrency(i.invoice_value), "Valor Contábil": formatCurrency(i.accounting_value)
                     }));
                 } else if (reportId === 'A.4') {
@@ -492,20 +494,20 @@ const Reports: React.FC = () => {
 
             // Strategy 2: Logs Base
             else if (['A.6', 'C.1', 'C.2', 'C.10'].includes(reportId)) {
-                 const response = await api.get('/logs/?limit=5000');
+                 const response = await api.get('/logs/summary?limit=5000');
                  const logs = response.data;
 
                  if (reportId === 'A.6' || reportId === 'C.1') {
                      data = logs.map((l: any) => ({
-                         Data: new Date(l.timestamp).toLocaleString('pt-BR'), Usuário: l.user?.email, Ação: translateLogAction(l.action), "Ativo Fixo": l.item?.fixed_asset_number, Item: l.item?.description
+                         Data: new Date(l.timestamp).toLocaleString('pt-BR'), Usuário: l.user_email, Ação: translateLogAction(l.action), "Ativo Fixo": l.item_fixed_asset_number, Item: l.item_description
                      }));
                  } else if (reportId === 'C.2') {
                      data = logs.filter((l: any) => l.action.includes('Status changed')).map((l: any) => ({
-                         Data: new Date(l.timestamp).toLocaleString('pt-BR'), Usuário: l.user?.email, Ação: translateLogAction(l.action), Item: l.item?.description
+                         Data: new Date(l.timestamp).toLocaleString('pt-BR'), Usuário: l.user_email, Ação: translateLogAction(l.action), Item: l.item_description
                      }));
                  } else if (reportId === 'C.10') {
                      data = logs.filter((l: any) => l.action.toLowerCase().includes('respons')).map((l: any) => ({
-                         Data: new Date(l.timestamp).toLocaleString('pt-BR'), Usuário: l.user?.email, Ação: translateLogAction(l.action), Item: l.item?.description
+                         Data: new Date(l.timestamp).toLocaleString('pt-BR'), Usuário: l.user_email, Ação: translateLogAction(l.action), Item: l.item_description
                      }));
                  }
             }
@@ -144,7 +144,13 @@ const MacroViewPage: React.FC = () => {
             // Se fossem IDs seria melhor. O CountByBranchChart usa nomes no 'name'.
 
             // Buscar todos e filtrar no front (estratégia atual do projeto para manter consistência)
-            const response = await api.get('/items/?limit=5000');
+            // Só os campos usados na tela (tabela, gráficos e exportações)
+            const response = await api.get('/items/', {
+                params: {
+                    limit: 5000,
+                    fields: 'description,fixed_asset_number,branch,category_rel,status,accounting_value'
+                }
+            });
             let data = response.data as Item[];
 
             // Aplicar filtro principal
@@ -153,8 +159,7 @@ const MacroViewPage: React.FC = () => {
                 data = data.filter(i => i.branch?.name === target);
             } else if (type === 'categoria') {
                 const target = decodeURIComponent(id || '');
-                // O backend retorna 'category' string legacy ou 'category_rel.name'
-                data = data.filter(i => (i.category_rel?.name === target) || ((i as any).category === target));
+                data = data.filter(i => i.category_rel?.name === target);
             } else if (type === 'status') {
                 const target = searchParams.get('value');
                 data = data.filter(i => i.status === target);